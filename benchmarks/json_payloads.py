@@ -0,0 +1,71 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+"""Compare JSON throughput of the standard library and orjson on openMINDS payloads.
+
+Encoding goes through the response classes, so it includes everything the service does to render a response.
+
+Usage: python -m benchmarks.json_payloads [--number N] [--repeat N]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+from benchmarks.payloads import get_payloads
+from kg_integration.core.serialization import ORJSONResponse
+
+ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    'json': JSONResponse(None).render,
+    'orjson': ORJSONResponse(None).render,
+}
+
+DECODERS: dict[str, Callable[[bytes], Any]] = {
+    'json': json.loads,
+    'orjson': orjson.loads,
+}
+
+
+def measure(function: Callable[[Any], Any], argument: Any, number: int, repeat: int) -> float:
+    """Return the best time of a single call in seconds."""
+
+    return min(timeit.repeat(lambda: function(argument), number=number, repeat=repeat)) / number
+
+
+def run(number: int, repeat: int) -> None:
+    sys.stdout.write(f'{"payload":<20}{"size, KiB":>10}{"operation":>10}{"library":>10}{"MiB/s":>10}{"speedup":>10}\n')
+
+    for name, payload in get_payloads().items():
+        body = JSONResponse(None).render(payload)
+        size = len(body)
+        for operation, functions, argument in (('encode', ENCODERS, payload), ('decode', DECODERS, body)):
+            baseline = None
+            for library, function in functions.items():
+                seconds = measure(function, argument, number, repeat)
+                baseline = baseline or seconds
+                sys.stdout.write(
+                    f'{name:<20}{size / 1024:>10.1f}{operation:>10}{library:>10}'
+                    f'{size / seconds / 2**20:>10.1f}{baseline / seconds:>9.1f}x\n'
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20, help='calls per measurement')
+    parser.add_argument('--repeat', type=int, default=5, help='measurements, the best one is reported')
+    arguments = parser.parse_args()
+
+    run(arguments.number, arguments.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+"""Compare building and rendering of the KG instance list response with and without validation.
+
+The validated path is what FastAPI does for a returned ``response_model``, the trusted path is what the routes do now.
+
+Usage: python -m benchmarks.kg_schemas [--instances N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.payloads import instance_list
+from kg_integration.core.serialization import ORJSONResponse
+from kg_integration.core.serialization import SchemaResponse
+from kg_integration.schemas.metadata import MetadataKGResponseListSchema
+
+RESPONSE_FIELD = create_model_field('response', MetadataKGResponseListSchema, mode='serialization')
+
+
+def validated(page: dict[str, Any]) -> bytes:
+    schema = MetadataKGResponseListSchema.from_kg_page(page)
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=schema))
+    return ORJSONResponse(content).body
+
+
+def trusted(page: dict[str, Any]) -> bytes:
+    return SchemaResponse(MetadataKGResponseListSchema.from_kg_page(page, trusted=True)).body
+
+
+def measure(function: Callable[[dict[str, Any]], bytes], page: dict[str, Any], repeat: int) -> float:
+    """Return the best time of a single call in seconds, the page is copied before every call as it is modified."""
+
+    timings = []
+    for _ in range(repeat):
+        argument = copy.deepcopy(page)
+        started_at = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started_at)
+
+    return min(timings)
+
+
+def run(instances: int, repeat: int) -> None:
+    page = instance_list(random.Random(0), instances)
+    assert validated(copy.deepcopy(page)) == trusted(copy.deepcopy(page))
+
+    baseline = None
+    sys.stdout.write(f'{"path":<12}{"instances":>10}{"ms":>10}{"us/instance":>14}{"speedup":>10}\n')
+    for name, function in (('validated', validated), ('trusted', trusted)):
+        seconds = measure(function, page, repeat)
+        baseline = baseline or seconds
+        sys.stdout.write(
+            f'{name:<12}{instances:>10}{seconds * 1000:>10.1f}{seconds / instances * 10**6:>14.2f}'
+            f'{baseline / seconds:>9.1f}x\n'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instances', type=int, default=10000, help='instances in the KG response')
+    parser.add_argument('--repeat', type=int, default=5, help='measurements, the best one is reported')
+    arguments = parser.parse_args()
+
+    run(arguments.instances, arguments.repeat)
+
+
+if __name__ == '__main__':
+    main()
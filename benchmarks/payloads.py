@@ -0,0 +1,129 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import random
+from typing import Any
+from uuid import UUID
+
+KG_INSTANCES = 'https://kg.ebrains.eu/api/instances/'
+KG_META = 'https://core.kg.ebrains.eu/vocab/meta/'
+OPENMINDS = 'https://openminds.ebrains.eu/'
+OPENMINDS_VOCAB = 'https://openminds.ebrains.eu/vocab/'
+
+
+def instance_id(rng: random.Random) -> str:
+    return KG_INSTANCES + str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def reference(rng: random.Random) -> dict[str, str]:
+    return {'@id': instance_id(rng)}
+
+
+def kg_instance(rng: random.Random, type_: str, properties: dict[str, Any]) -> dict[str, Any]:
+    """Wrap openMINDS properties into an instance the way KG returns it, with expanded IRIs and KG metadata."""
+
+    id_ = instance_id(rng)
+    return {
+        '@id': id_,
+        '@type': [OPENMINDS + type_],
+        'http://schema.org/identifier': [id_],
+        KG_META + 'space': 'collab-hdc-dataset',
+        KG_META + 'revision': f'_{rng.getrandbits(40):x}',
+        KG_META + 'user': reference(rng),
+        **{OPENMINDS_VOCAB + key: value for key, value in properties.items()},
+    }
+
+
+def person(rng: random.Random) -> dict[str, Any]:
+    return kg_instance(
+        rng,
+        'core/Person',
+        {
+            'givenName': rng.choice(['Matvey', 'Anna', 'Jörg', 'Zoë', 'Li']),
+            'familyName': rng.choice(['Loshakov', 'Müller', 'Dubois', 'Nakamura', 'Rossi']),
+            'affiliation': [{'@type': [OPENMINDS + 'core/Affiliation'], OPENMINDS_VOCAB + 'memberOf': reference(rng)}],
+            'contactInformation': reference(rng),
+            'digitalIdentifier': [reference(rng)],
+        },
+    )
+
+
+def file(rng: random.Random, index: int) -> dict[str, Any]:
+    return kg_instance(
+        rng,
+        'core/File',
+        {
+            'name': f'sub-{index:04d}_ses-01_T1w.nii.gz',
+            'IRI': f'https://data-proxy.ebrains.eu/api/v1/buckets/hdc/sub-{index:04d}/anat/T1w.nii.gz',
+            'storageSize': {
+                '@type': [OPENMINDS + 'core/QuantitativeValue'],
+                OPENMINDS_VOCAB + 'value': rng.randint(10**6, 10**9),
+                OPENMINDS_VOCAB + 'unit': reference(rng),
+            },
+            'hash': {
+                '@type': [OPENMINDS + 'core/Hash'],
+                OPENMINDS_VOCAB + 'algorithm': 'SHA256',
+                OPENMINDS_VOCAB + 'digest': f'{rng.getrandbits(256):064x}',
+            },
+            'fileRepository': reference(rng),
+            'format': reference(rng),
+            'isPartOf': [reference(rng)],
+            'specialUsageRole': reference(rng),
+        },
+    )
+
+
+def dataset_version(rng: random.Random, authors: int = 25, keywords: int = 40) -> dict[str, Any]:
+    return kg_instance(
+        rng,
+        'core/DatasetVersion',
+        {
+            'fullName': 'Structural MRI of the human hippocampus in temporal lobe epilepsy',
+            'shortName': 'Hippocampal sMRI',
+            'versionIdentifier': 'v1.2.0',
+            'versionInnovation': 'Added the follow-up sessions and corrected the defacing of two subjects.',
+            'description': ' '.join(['High resolution structural images acquired at 7T with MP2RAGE.'] * 30),
+            'releaseDate': '2023-02-10',
+            'author': [reference(rng) for _ in range(authors)],
+            'custodian': [reference(rng) for _ in range(3)],
+            'ethicsAssessment': reference(rng),
+            'experimentalApproach': [reference(rng) for _ in range(4)],
+            'keyword': [reference(rng) for _ in range(keywords)],
+            'license': reference(rng),
+            'studiedSpecimen': [reference(rng) for _ in range(authors * 2)],
+            'technique': [reference(rng) for _ in range(6)],
+            'repository': reference(rng),
+            'fullDocumentation': reference(rng),
+        },
+    )
+
+
+def instance_list(rng: random.Random, size: int) -> dict[str, Any]:
+    """Page of file instances like the KG list endpoint returns it."""
+
+    return {
+        'data': [file(rng, index) for index in range(size)],
+        'message': None,
+        'error': None,
+        'startTime': 1676042794406,
+        'durationInMs': 218,
+        'transactionId': None,
+        'total': size,
+        'size': size,
+        'from': 0,
+    }
+
+
+def get_payloads(seed: int = 0) -> dict[str, Any]:
+    """Return payloads of different sizes, the same for the same seed."""
+
+    rng = random.Random(seed)
+    return {
+        'person': person(rng),
+        'dataset_version': dataset_version(rng),
+        'instance_list_100': instance_list(rng, 100),
+        'instance_list_1000': instance_list(rng, 1000),
+    }
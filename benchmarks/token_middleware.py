@@ -0,0 +1,119 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+"""Measure the overhead of the token middleware on a request with Authorization header.
+
+The application behind the middleware only sends an empty response, so the numbers are the cost of the middleware
+itself. The previous ``BaseHTTPMiddleware`` implementation rewriting the query string is measured for comparison.
+
+Usage: python -m benchmarks.token_middleware [--requests N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from urllib.parse import urlencode
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from kg_integration.middleware import TokenMiddleware
+
+
+class QueryStringTokenMiddleware(BaseHTTPMiddleware):
+    """Previous implementation, which put the token from headers into query params."""
+
+    async def dispatch(self, request, call_next):
+        if not request.query_params.get('token'):
+            bearer_token = request.headers.get('Authorization')
+            if bearer_token:
+                _, token = bearer_token.split(' ')
+                params = dict(request.query_params)
+                params['token'] = token
+                request.scope['query_string'] = urlencode(params).encode('utf-8')
+
+        response = await call_next(request)
+        return response
+
+
+async def endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-length', b'0')]})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def receive() -> Message:
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+def get_scope() -> Scope:
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/v1/metadata/',
+        'raw_path': b'/v1/metadata/',
+        'root_path': '',
+        'query_string': b'space=myspace&stage=IN_PROGRESS&type=person',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'accept', b'application/json'),
+            (b'accept-encoding', b'gzip, br'),
+            (b'authorization', b'Bearer ' + b'x' * 1200),
+        ],
+        'client': ('127.0.0.1', 50000),
+        'server': ('127.0.0.1', 5064),
+    }
+
+
+async def measure(app, requests: int, repeat: int) -> float:
+    """Return the best time of a single request in seconds."""
+
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(requests):
+            await app(get_scope(), receive, send)
+        timings.append((time.perf_counter() - started_at) / requests)
+
+    return min(timings)
+
+
+async def run(requests: int, repeat: int) -> None:
+    applications = (
+        ('none', endpoint),
+        ('asgi', TokenMiddleware(endpoint)),
+        ('base_http', QueryStringTokenMiddleware(endpoint)),
+    )
+
+    baseline = None
+    sys.stdout.write(f'{"middleware":<12}{"us/request":>12}{"overhead us":>14}\n')
+    for name, app in applications:
+        seconds = await measure(app, requests, repeat)
+        baseline = seconds if baseline is None else baseline
+        sys.stdout.write(f'{name:<12}{seconds * 10**6:>12.2f}{(seconds - baseline) * 10**6:>14.2f}\n')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=10000, help='requests in a measurement')
+    parser.add_argument('--repeat', type=int, default=5, help='measurements, the best one is reported')
+    arguments = parser.parse_args()
+
+    asyncio.run(run(arguments.requests, arguments.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,12 +19,18 @@ from kg_integration.config import get_settings
 from kg_integration.core.exceptions import NotAvailable
 from kg_integration.core.exceptions import ServiceException
 from kg_integration.core.exceptions import UnhandledException
+from kg_integration.core.invalidation import create_cache_invalidation_bus
+from kg_integration.core.serialization import ORJSONResponse
+from kg_integration.middleware import CompressionMiddleware
 from kg_integration.middleware import TokenMiddleware
 from kg_integration.routers import api_root
 from kg_integration.routers.v1 import api_health
+from kg_integration.routers.v1 import api_jobs
 from kg_integration.routers.v1 import api_metadata
+from kg_integration.routers.v1 import api_metrics
 from kg_integration.routers.v1 import api_spaces
 from kg_integration.routers.v1 import api_users
+from kg_integration.worker.runner import WorkerRunner
 
 
 def create_app() -> FastAPI:
@@ -38,6 +44,7 @@ def create_app() -> FastAPI:
         docs_url='/v1/api-doc',
         redoc_url='/v1/api-redoc',
         version=settings.VERSION,
+        default_response_class=ORJSONResponse,
     )
 
     setup_logging(settings)
@@ -61,6 +68,8 @@ def setup_routers(app: FastAPI) -> None:
     app.include_router(api_spaces.router, prefix='/v1')
     app.include_router(api_metadata.router, prefix='/v1')
     app.include_router(api_users.router, prefix='/v1')
+    app.include_router(api_jobs.router, prefix='/v1')
+    app.include_router(api_metrics.router, prefix='/v1')
     app.include_router(api_root.router, prefix='/v1')
 
 
@@ -68,6 +77,8 @@ def setup_middlewares(app: FastAPI, settings: Settings) -> None:
     """Configure the application middlewares."""
     app.add_middleware(TokenMiddleware)
     app.add_middleware(DBSessionMiddleware, db_url=settings.RDS_DB_URI)
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware, settings=settings)
     app.add_middleware(
         CORSMiddleware,
         allow_origins='*',
@@ -80,12 +91,30 @@ def setup_middlewares(app: FastAPI, settings: Settings) -> None:
 def setup_dependencies(app: FastAPI, settings: Settings) -> None:
     """Perform dependencies setup/teardown at the application startup/shutdown events."""
 
-    app.add_event_handler('startup', partial(startup_event, settings))
+    app.add_event_handler('startup', partial(startup_event, app, settings))
+    app.add_event_handler('shutdown', partial(shutdown_event, app))
 
 
-async def startup_event(settings: Settings) -> None:
+async def startup_event(app: FastAPI, settings: Settings) -> None:
     """Initialise dependencies at the application startup event."""
-    pass
+
+    app.state.cache_invalidation_bus = create_cache_invalidation_bus(settings)
+    if app.state.cache_invalidation_bus is not None:
+        app.state.cache_invalidation_bus.start()
+
+    if settings.JOBS_EMBEDDED_WORKER:
+        app.state.worker_runner = WorkerRunner(settings)
+        app.state.worker_runner.start()
+
+
+async def shutdown_event(app: FastAPI) -> None:
+    """Release dependencies at the application shutdown event."""
+
+    if hasattr(app.state, 'worker_runner'):
+        await app.state.worker_runner.drain()
+
+    if getattr(app.state, 'cache_invalidation_bus', None) is not None:
+        await app.state.cache_invalidation_bus.close()
 
 
 def setup_exception_handlers(app: FastAPI) -> None:
@@ -29,6 +29,8 @@ class Settings(BaseSettings):
     RELOAD: bool = False
     LOGGING_LEVEL: int = logging.INFO
     LOGGING_FORMAT: str = 'json'
+    LOGGING_PAYLOADS: bool = False
+    LOGGING_PAYLOADS_SAMPLE_RATE: float = 0.01
     EXTERNAL_SERVICE_TIMEOUT: int = 1000
 
     RDS_SCHEMA_DEFAULT: str = 'kg_integration'
@@ -40,6 +42,7 @@ class Settings(BaseSettings):
 
     KG_ENV: str = 'ppd'
     KG_PREFIX: str = 'collab-'
+    KG_PAGE_SIZE: int = 100
 
     COLLAB_ENV: str = 'prod'
     COLLAB_PREFIX: str = 'hdc-'
@@ -58,6 +61,64 @@ class Settings(BaseSettings):
     DATASET_SERVICE: str = 'http://dataset.utility'
     PROJECT_SERVICE: str = 'http://project.utility'
 
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_VISIBILITY_TIMEOUT: int = 900
+    JOBS_RETRY_BASE_DELAY: float = 5
+    JOBS_RETRY_MAX_DELAY: float = 600
+    JOBS_POLL_INTERVAL: float = 1
+    JOBS_MAINTENANCE_INTERVAL: float = 60
+    JOBS_EMBEDDED_WORKER: bool = False
+
+    WORKER_CONCURRENCY: int = 4
+    WORKER_DRAIN_TIMEOUT: int = 60
+    WORKER_HEALTH_HOST: str = '127.0.0.1'
+    WORKER_HEALTH_PORT: int = 5065
+
+    COLLAB_POLL_MIN_INTERVAL: float = 1
+    COLLAB_POLL_MAX_INTERVAL: float = 30
+    COLLAB_POLL_TIMEOUT: float = 300
+    COLLAB_POLL_BATCH_SIZE: int = 10
+
+    DATASETS_CONCURRENCY: int = 10
+
+    CACHE_BACKEND: str = 'memory'
+    CACHE_REDIS_URL: str = 'redis://localhost:6379/0'
+    CACHE_NAMESPACE: str = 'kg-integration'
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_RECONNECT_DELAY: float = 5
+    CACHE_DATASETS_MAXSIZE: int = 10000
+    CACHE_DATASETS_TTL: int = 3600
+    CACHE_PROJECTS_MAXSIZE: int = 1000
+    CACHE_PROJECTS_TTL: int = 3600
+    CACHE_PROJECT_USERS_MAXSIZE: int = 1000
+    CACHE_PROJECT_USERS_TTL: int = 300
+    CACHE_TEMPLATES_TTL: int = 86400
+    CACHE_TEMPLATES_REFRESH_AFTER: int = 3600
+    CACHE_SPACES_MAXSIZE: int = 10000
+    CACHE_SPACES_TTL: int = 300
+    CACHE_SPACES_REFRESH_AFTER: int = 30
+    CACHE_USERS_MAXSIZE: int = 10000
+    CACHE_USERS_TTL: int = 300
+    CACHE_INSTANCES_MAXSIZE: int = 1000
+    CACHE_INSTANCES_TTL: int = 10
+    CACHE_MISSING_MAXSIZE: int = 10000
+    CACHE_MISSING_TTL: int = 30
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    SWEEPER_ENABLED: bool = True
+    SWEEPER_INTERVAL: int = 86400
+    SWEEPER_POLL_INTERVAL: float = 60
+    SWEEPER_BATCH_SIZE: int = 50
+    SWEEPER_BATCH_TIMEOUT: int = 900
+    SWEEPER_CONCURRENCY: int = 4
+    SWEEPER_CALLS_PER_MINUTE: int = 300
+    SWEEPER_REMOVE_EXTRA: bool = False
+
     def __init__(self, *args: Any, **kwds: Any) -> None:
         super().__init__(*args, **kwds)
 
@@ -0,0 +1,312 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import json
+import math
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+from typing import TypeVar
+
+from redis import RedisError
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from kg_integration.config import Settings
+from kg_integration.core.metrics import CACHE_REQUESTS
+from kg_integration.logger import logger
+
+T = TypeVar('T')
+
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """Storage of cache entries, expiration of the entries is handled by the backend.
+
+    Entries are stored serialized to JSON by every backend, so cached values are never shared with the callers and
+    a value which works with one backend works with the others.
+    """
+
+    @staticmethod
+    def dump(entry: dict[str, Any]) -> str:
+        return json.dumps(entry)
+
+    @staticmethod
+    def load(data: str | bytes) -> dict[str, Any]:
+        return json.loads(data)
+
+    @abstractmethod
+    async def get(self, key: str) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, entry: dict[str, Any], ttl: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self, prefix: str) -> None:
+        """Delete all the entries which keys start with the prefix."""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Bounded in-process storage with least recently used eviction."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+
+        expires_at, data = item
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return self.load(data)
+
+    async def set(self, key: str, entry: dict[str, Any], ttl: float) -> None:
+        self.entries[key] = (time.monotonic() + ttl, self.dump(entry))
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    async def clear(self, prefix: str) -> None:
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            del self.entries[key]
+
+
+class RedisBackend(CacheBackend):
+    """Storage shared by all the processes, unavailable Redis is treated as an empty cache."""
+
+    def __init__(self, client: Redis) -> None:
+        self.client = client
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        try:
+            data = await self.client.get(key)
+        except RedisError as e:
+            logger.warning(f'Could not read {key} from Redis: {e}')
+            return None
+
+        return None if data is None else self.load(data)
+
+    async def set(self, key: str, entry: dict[str, Any], ttl: float) -> None:
+        try:
+            if ttl > 0:
+                await self.client.set(key, self.dump(entry), px=math.ceil(ttl * 1000))
+            else:
+                await self.client.delete(key)
+        except RedisError as e:
+            logger.warning(f'Could not write {key} to Redis: {e}')
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(key)
+        except RedisError as e:
+            logger.warning(f'Could not delete {key} from Redis: {e}')
+
+    async def clear(self, prefix: str) -> None:
+        try:
+            keys = [key async for key in self.client.scan_iter(match=prefix + '*')]
+            if keys:
+                await self.client.delete(*keys)
+        except RedisError as e:
+            logger.warning(f'Could not delete {prefix}* from Redis: {e}')
+
+
+class TTLCache:
+    """Named cache with per-entry expiration on top of a storage backend.
+
+    Keys are prefixed with the namespace and the name of the cache, values have to be JSON serializable.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float, namespace: str = 'kg-integration') -> None:
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = f'{namespace}:{name}:'
+        self.refreshing: dict[str, asyncio.Task] = {}
+
+    async def lookup(self, key: str) -> dict[str, Any] | None:
+        """Return fresh entry for the key with the value and the time it should be refreshed at."""
+        return await self.backend.get(self.prefix + key)
+
+    async def get(self, key: str) -> Any:
+        """Return cached value or MISSING when there is no fresh entry for the key."""
+
+        entry = await self.lookup(key)
+        return MISSING if entry is None else entry['value']
+
+    async def set(self, key: str, value: Any, ttl: float | None = None, refresh_after: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        refresh_at = time.time() + (ttl if refresh_after is None else min(ttl, refresh_after))
+        await self.backend.set(self.prefix + key, {'value': value, 'refresh_at': refresh_at}, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(self.prefix + key)
+
+    async def clear(self) -> None:
+        await self.backend.clear(self.prefix)
+        for task in self.refreshing.values():
+            task.cancel()
+        self.refreshing.clear()
+
+    async def evict(self, key: str | None = None) -> None:
+        if key is None:
+            await self.clear()
+        else:
+            await self.delete(key)
+
+    async def invalidate(self, key: str | None = None, session: AsyncSession | None = None) -> None:
+        """Evict the key or the whole cache when the key is not set, in this and all the other processes.
+
+        With ``session`` the key is evicted once more, and other processes are notified, when its transaction is
+        committed, so a lookup running concurrently with the transaction can not put the old value back for good.
+        """
+
+        await self.evict(key)
+        if session is not None:
+            evict_after_commit(session, partial(self.evict, key))
+
+        if _invalidation_publisher is not None:
+            await _invalidation_publisher(self.name, key, session=session)
+
+    async def refresh(
+        self, key: str, loader: Callable[[], Awaitable[T]], ttl: float | None, refresh_after: float | None
+    ) -> None:
+        """Reload the value in the background, the current one is kept when loading fails."""
+
+        try:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, ttl, refresh_after)
+        except Exception as e:
+            logger.warning(f'Could not refresh {key} in cache {self.name}: {e}')
+        finally:
+            self.refreshing.pop(key, None)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl: float | None = None,
+        refresh_after: float | None = None,
+    ) -> T:
+        """Return cached value or load it, errors and None values are not cached.
+
+        With ``refresh_after`` the entry older than that is still returned, but reloaded in the background.
+        """
+
+        entry = await self.lookup(key)
+        if entry is not None:
+            CACHE_REQUESTS.labels(cache=self.name, result='hit').inc()
+            if entry['refresh_at'] <= time.time() and key not in self.refreshing:
+                self.refreshing[key] = asyncio.create_task(self.refresh(key, loader, ttl, refresh_after))
+            return entry['value']
+
+        CACHE_REQUESTS.labels(cache=self.name, result='miss').inc()
+        value = await loader()
+        if value is not None:
+            await self.set(key, value, ttl, refresh_after)
+
+        return value
+
+
+caches: dict[str, TTLCache] = {}
+
+_redis_backend: RedisBackend | None = None
+
+_invalidation_publisher: Callable[..., Awaitable[None]] | None = None
+
+EVICTIONS = 'cache_evictions'
+
+
+def _run_evictions(session: Session) -> None:
+    # savepoints are committed with the same event, the evictions wait for the outermost transaction
+    if session.in_nested_transaction():
+        return
+
+    evictions = session.info.get(EVICTIONS, [])
+    while evictions:
+        # the event is dispatched inside AsyncSession.commit, so the eviction is finished before it returns
+        await_only(evictions.pop(0)())
+
+
+def _drop_evictions(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.get(EVICTIONS, []).clear()
+
+
+def evict_after_commit(session: AsyncSession, eviction: Callable[[], Awaitable[None]]) -> None:
+    """Run the eviction when the transaction of the session is committed, it is dropped when it is rolled back."""
+
+    sync_session = session.sync_session
+    if EVICTIONS not in sync_session.info:
+        sync_session.info[EVICTIONS] = []
+        event.listen(sync_session, 'after_commit', _run_evictions)
+        event.listen(sync_session, 'after_rollback', _drop_evictions)
+
+    sync_session.info[EVICTIONS].append(eviction)
+
+
+def set_invalidation_publisher(publisher: Callable[..., Awaitable[None]] | None) -> None:
+    """Set the callback propagating invalidations to other processes."""
+
+    global _invalidation_publisher
+
+    _invalidation_publisher = publisher
+
+
+def create_backend(settings: Settings, maxsize: int) -> CacheBackend:
+    """Create the backend configured in settings, Redis backend is shared by all the caches."""
+
+    global _redis_backend
+
+    if settings.CACHE_BACKEND == 'redis':
+        if _redis_backend is None:
+            _redis_backend = RedisBackend(Redis.from_url(settings.CACHE_REDIS_URL))
+        return _redis_backend
+
+    return MemoryBackend(maxsize)
+
+
+def get_cache(settings: Settings, name: str, maxsize: int, ttl: float) -> TTLCache:
+    """Return the process wide cache with the given name."""
+
+    if name not in caches:
+        caches[name] = TTLCache(name, create_backend(settings, maxsize), ttl, settings.CACHE_NAMESPACE)
+
+    return caches[name]
+
+
+async def clear_caches() -> None:
+    """Drop entries of all the caches."""
+
+    for cache in caches.values():
+        await cache.clear()
@@ -8,6 +8,7 @@ from fastapi import Depends
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from kg_integration.config import Settings
@@ -33,6 +34,13 @@ class DBEngine:
         return self.instance
 
 
+def create_session_factory(settings: Settings) -> async_sessionmaker[AsyncSession]:
+    """Create a session factory for code running outside of the request scope."""
+
+    engine = DBEngine(settings)()
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
 async def get_db_engine(settings: Settings = Depends(get_settings)) -> AsyncEngine:
     engine = DBEngine(settings)
     yield engine()
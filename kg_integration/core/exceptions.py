@@ -7,6 +7,7 @@
 from abc import ABCMeta
 from abc import abstractmethod
 from http import HTTPStatus
+from typing import Any
 
 
 class ServiceException(Exception, metaclass=ABCMeta):
@@ -206,3 +207,29 @@ class MetadataAlreadyExists(ServiceException):
     @property
     def details(self) -> str:
         return 'Metadata already exists.'
+
+
+class DatasetsUpdateFailed(ServiceException):
+    """Raised when user membership could not be updated in some of the datasets."""
+
+    def __init__(self, succeeded: list[str], failed: dict[str, str]):
+        super().__init__(failed)
+        self.succeeded = succeeded
+        self.failed = failed
+
+    @property
+    def result(self) -> dict[str, Any]:
+        """Aggregate result of the update to be stored with the job."""
+        return {'succeeded': self.succeeded, 'failed': self.failed}
+
+    @property
+    def status(self) -> int:
+        return HTTPStatus.BAD_GATEWAY
+
+    @property
+    def code(self) -> str:
+        return 'datasets_update_failed'
+
+    @property
+    def details(self) -> str:
+        return f'Could not update user in datasets {sorted(self.failed)}'
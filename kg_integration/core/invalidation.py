@@ -0,0 +1,140 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import json
+from contextlib import suppress
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kg_integration.config import Settings
+from kg_integration.core.cache import caches
+from kg_integration.core.cache import clear_caches
+from kg_integration.core.cache import set_invalidation_publisher
+from kg_integration.core.db import DBEngine
+from kg_integration.logger import logger
+
+CHANNEL = 'kg_integration_cache'
+
+
+class CacheInvalidationBus:
+    """Propagate cache invalidations to all the processes through Postgres LISTEN/NOTIFY.
+
+    Invalidations published with a session are delivered only when its transaction is committed, so other processes
+    can not load the old value again after evicting it.
+    """
+
+    def __init__(self, engine: AsyncEngine, reconnect_delay: float = 5) -> None:
+        self.engine = engine
+        self.reconnect_delay = reconnect_delay
+        self.origin = uuid4().hex
+        self.listening = asyncio.Event()
+        self.listener: asyncio.Task | None = None
+        self.handlers: set[asyncio.Task] = set()
+        self.stop = asyncio.Event()
+
+    def notification(self, cache: str, key: str | None) -> Any:
+        payload = json.dumps({'origin': self.origin, 'cache': cache, 'key': key})
+        return select(func.pg_notify(CHANNEL, payload))
+
+    async def publish(self, cache: str, key: str | None = None, session: AsyncSession | None = None) -> None:
+        """Ask other processes to evict the key or the whole cache when the key is not set."""
+
+        if session is not None:
+            await session.execute(self.notification(cache, key))
+            return
+
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(self.notification(cache, key))
+        except Exception as e:
+            logger.warning(f'Could not publish invalidation of {key} in cache {cache}: {e}')
+
+    async def handle(self, payload: str) -> None:
+        """Evict the key from the local cache, invalidations published by this process are already applied."""
+
+        message = json.loads(payload)
+        if message['origin'] == self.origin or message['cache'] not in caches:
+            return
+
+        cache = caches[message['cache']]
+        if message['key'] is None:
+            await cache.clear()
+        else:
+            await cache.delete(message['key'])
+
+    def on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        task = asyncio.create_task(self.handle(payload))
+        self.handlers.add(task)
+        task.add_done_callback(self.handlers.discard)
+
+    async def listen_once(self) -> None:
+        """Listen for invalidations on a single connection until the bus is stopped or the connection is lost."""
+
+        lost = asyncio.Event()
+        async with self.engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            driver_connection.add_termination_listener(lambda _: lost.set())
+            await driver_connection.add_listener(CHANNEL, self.on_notification)
+            # invalidations published while there was no connection are lost
+            await clear_caches()
+            self.listening.set()
+
+            stopped = asyncio.create_task(self.stop.wait())
+            terminated = asyncio.create_task(lost.wait())
+            await asyncio.wait((stopped, terminated), return_when=asyncio.FIRST_COMPLETED)
+            stopped.cancel()
+            terminated.cancel()
+
+            if not lost.is_set():
+                await driver_connection.remove_listener(CHANNEL, self.on_notification)
+
+    async def listen(self) -> None:
+        """Keep listening for invalidations until the bus is stopped, reconnect when the connection is lost."""
+
+        while not self.stop.is_set():
+            try:
+                await self.listen_once()
+            except Exception:
+                logger.exception('Cache invalidation listener has failed')
+            finally:
+                self.listening.clear()
+
+            if not self.stop.is_set():
+                logger.warning(f'Cache invalidation listener reconnects in {self.reconnect_delay} seconds')
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.stop.wait(), self.reconnect_delay)
+
+    def start(self) -> None:
+        """Start listening and publish invalidations of all the caches of this process."""
+
+        self.stop.clear()
+        self.listener = asyncio.create_task(self.listen(), name='cache-invalidation-listener')
+        set_invalidation_publisher(self.publish)
+
+    async def close(self) -> None:
+        """Stop listening and publishing invalidations."""
+
+        set_invalidation_publisher(None)
+        self.stop.set()
+        if self.listener is not None:
+            await self.listener
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+
+def create_cache_invalidation_bus(settings: Settings) -> CacheInvalidationBus | None:
+    """Create the bus unless it is disabled or caches are already shared through Redis."""
+
+    if not settings.CACHE_INVALIDATION_ENABLED or settings.CACHE_BACKEND == 'redis':
+        return None
+
+    return CacheInvalidationBus(DBEngine(settings)(), settings.CACHE_INVALIDATION_RECONNECT_DELAY)
@@ -0,0 +1,38 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from prometheus_client import Counter
+
+MEMBERSHIP_DRIFT_FOUND = Counter(
+    'kg_integration_membership_drift_found_total',
+    'Collab memberships that differ from project roles, found by the membership sweeper.',
+    ['change'],
+)
+MEMBERSHIP_DRIFT_FIXED = Counter(
+    'kg_integration_membership_drift_fixed_total',
+    'Collab memberships brought in line with project roles by the membership sweeper.',
+    ['change'],
+)
+SWEPT_SPACES = Counter(
+    'kg_integration_swept_spaces_total',
+    'Spaces checked by the membership sweeper.',
+    ['outcome'],
+)
+CACHE_REQUESTS = Counter(
+    'kg_integration_cache_requests_total',
+    'Lookups of cached upstream data.',
+    ['cache', 'result'],
+)
+COMPRESSION_CPU_SECONDS = Counter(
+    'kg_integration_compression_cpu_seconds_total',
+    'CPU time spent compressing response bodies.',
+    ['encoding'],
+)
+COMPRESSION_BYTES = Counter(
+    'kg_integration_compression_bytes_total',
+    'Size of response bodies before and after compression.',
+    ['encoding', 'stage'],
+)
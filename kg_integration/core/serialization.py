@@ -0,0 +1,57 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from collections.abc import Callable
+from collections.abc import Coroutine
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+
+from kg_integration.schemas.base import BaseSchema
+
+__all__ = ['ORJSONRequest', 'ORJSONResponse', 'ORJSONRoute', 'SchemaResponse']
+
+
+class ORJSONRequest(Request):
+    """Request decoding JSON body with orjson.
+
+    Decoding errors are subclasses of ``json.JSONDecodeError``, so invalid bodies are still rejected by FastAPI with
+    the validation error.
+    """
+
+    async def json(self) -> Any:
+        if not hasattr(self, '_json'):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """Route passing ORJSONRequest to the endpoint, so JSON body parameters are decoded with orjson."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request) -> Response:
+            return await route_handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
+
+
+class SchemaResponse(Response):
+    """Response serializing the schema straight to JSON.
+
+    The schema is not validated and converted to Python objects again as it happens with ``response_model``, so it
+    should be used for schemas built by the service itself.
+    """
+
+    media_type = 'application/json'
+
+    def render(self, content: BaseSchema) -> bytes:
+        return content.to_json()
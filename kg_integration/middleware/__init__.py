@@ -0,0 +1,11 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from .compression import CompressionMiddleware
+from .token import TokenMiddleware
+from .token import get_token
+
+__all__ = ['CompressionMiddleware', 'TokenMiddleware', 'get_token']
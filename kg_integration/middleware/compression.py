@@ -0,0 +1,223 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import time
+import zlib
+from collections.abc import Callable
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from kg_integration.config import Settings
+from kg_integration.core.metrics import COMPRESSION_BYTES
+from kg_integration.core.metrics import COMPRESSION_CPU_SECONDS
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/ld+json', 'application/x-ndjson', 'text/')
+
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    """Mark the entity tag as weak, the encoded body is no longer byte-for-byte the one the strong tag was built for."""
+
+    etag = headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = f'W/{etag}'
+
+
+class Encoder:
+    """Streaming compressor of a response body."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress the chunk and flush it, so the client can decode everything sent so far."""
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+
+class GzipEncoder(Encoder):
+    def __init__(self, level: int) -> None:
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self, level: int) -> None:
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self, level: int) -> None:
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def get_available_encoders(settings: Settings) -> dict[str, Callable[[], Encoder]]:
+    """Return encoders in the order of preference, brotli and zstd are used only when their libraries are installed."""
+
+    encoders = {}
+    if zstandard is not None:
+        encoders['zstd'] = lambda: ZstdEncoder(settings.COMPRESSION_ZSTD_LEVEL)
+    if brotli is not None:
+        encoders['br'] = lambda: BrotliEncoder(settings.COMPRESSION_BROTLI_QUALITY)
+    encoders['gzip'] = lambda: GzipEncoder(settings.COMPRESSION_GZIP_LEVEL)
+    return encoders
+
+
+def negotiate_encoding(accept_encoding: str, available: list[str]) -> str | None:
+    """Pick the encoding with the highest quality in Accept-Encoding header, ties are resolved by our preference."""
+
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+class CompressionMiddleware:
+    """Compress JSON and text responses with the best encoding accepted by the client.
+
+    Responses smaller than ``minimum_size`` are sent as is. Larger ones are compressed chunk by chunk, and every chunk
+    is flushed to the client, so streamed responses keep being streamed. Routes that may be compressed should send
+    weak entity tags, so the tag does not depend on the size of the response, strong ones are weakened when compressed.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Settings) -> None:
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE
+        self.encoders = get_available_encoders(settings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''), list(self.encoders))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, encoding, self.encoders[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Wrap ``send`` of a single response to compress its body."""
+
+    def __init__(self, send: Send, encoding: str, encoder_factory: Callable[[], Encoder], minimum_size: int) -> None:
+        self.downstream = send
+        self.encoding = encoding
+        self.encoder_factory = encoder_factory
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.encoder: Encoder | None = None
+        self.buffer = b''
+        self.passthrough = False
+
+    def is_compressible(self, headers: Headers) -> bool:
+        content_type = headers.get('content-type', '')
+        return 'content-encoding' not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        """Compress the chunk and record the CPU time spent on it."""
+
+        started_at = time.thread_time()
+        encoded = self.encoder.compress(data) if data else b''
+        if final:
+            encoded += self.encoder.finish()
+        COMPRESSION_CPU_SECONDS.labels(encoding=self.encoding).inc(time.thread_time() - started_at)
+        COMPRESSION_BYTES.labels(encoding=self.encoding, stage='input').inc(len(data))
+        COMPRESSION_BYTES.labels(encoding=self.encoding, stage='output').inc(len(encoded))
+        return encoded
+
+    async def send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            self.passthrough = not self.is_compressible(Headers(raw=message['headers']))
+            return
+
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.flush_start()
+            await self.downstream(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self.encoder is None:
+            # the body may come in small chunks, the decision is made once enough of it is received
+            self.buffer += body
+            if more_body and len(self.buffer) < self.minimum_size:
+                return
+
+            body, self.buffer = self.buffer, b''
+            if not more_body and len(body) < self.minimum_size:
+                await self.flush_start()
+                await self.downstream({'type': 'http.response.body', 'body': body})
+                return
+
+            self.encoder = self.encoder_factory()
+            headers = MutableHeaders(raw=self.start_message['headers'])
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            weaken_etag(headers)
+            del headers['Content-Length']
+
+        body = self.encode(body, final=not more_body)
+        if self.start_message is not None and not more_body:
+            MutableHeaders(raw=self.start_message['headers'])['Content-Length'] = str(len(body))
+
+        await self.flush_start()
+        await self.downstream({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+    async def flush_start(self) -> None:
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.downstream(message)
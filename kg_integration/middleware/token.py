@@ -0,0 +1,39 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from fastapi import Query
+from fastapi import Request
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+class TokenMiddleware:
+    """Middleware to get bearer token from Authorization header (if exists) and put it into request state."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] in ('http', 'websocket'):
+            for name, value in scope['headers']:
+                if name == b'authorization':
+                    _, _, token = value.decode('latin-1').partition(' ')
+                    if token:
+                        scope.setdefault('state', {})['token'] = token
+                    break
+
+        await self.app(scope, receive, send)
+
+
+def get_token(
+    request: Request,
+    token: str | None = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+) -> str | None:
+    """Return token from query params, or from Authorization header when it is not passed in params."""
+
+    return token or getattr(request.state, 'token', None)
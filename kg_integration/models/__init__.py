@@ -5,19 +5,31 @@
 # You may not use this file except in compliance with the License.
 
 from .base import DBModel
+from .jobs import Jobs
+from .jobs import JobsCRUD
+from .jobs import get_jobs_crud
 from .metadata import Metadata
 from .metadata import MetadataCRUD
 from .metadata import get_metadata_crud
 from .spaces import Spaces
 from .spaces import SpacesCRUD
 from .spaces import get_spaces_crud
+from .sweeps import Sweeps
+from .sweeps import SweepsCRUD
+from .sweeps import get_sweeps_crud
 
 __all__ = [
     'DBModel',
     'Spaces',
     'Metadata',
+    'Jobs',
+    'Sweeps',
     'SpacesCRUD',
     'MetadataCRUD',
+    'JobsCRUD',
+    'SweepsCRUD',
     'get_spaces_crud',
     'get_metadata_crud',
+    'get_jobs_crud',
+    'get_sweeps_crud',
 ]
@@ -19,7 +19,10 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from kg_integration.core.cache import MISSING
+from kg_integration.core.cache import TTLCache
 from kg_integration.core.exceptions import NotFound
+from kg_integration.core.metrics import CACHE_REQUESTS
 from kg_integration.models import DBModel
 from kg_integration.schemas.base import BaseSchema
 
@@ -29,6 +32,7 @@ class CRUD:
 
     session: AsyncSession
     model: type[DBModel]
+    missing: TTLCache | None = None
 
     def __init__(self, db_session: AsyncSession) -> None:
         self.session = db_session
@@ -79,6 +83,41 @@ class CRUD:
 
         return instance
 
+    async def is_missing(self, key: str) -> bool:
+        """Check if the entry was recently looked up and not found."""
+
+        if self.missing is None:
+            return False
+
+        missing = await self.missing.get(key) is not MISSING
+        CACHE_REQUESTS.labels(cache=self.missing.name, result='hit' if missing else 'miss').inc()
+
+        return missing
+
+    async def remember_missing(self, *keys: str) -> None:
+        if self.missing is not None:
+            for key in keys:
+                await self.missing.set(key, True)
+
+    async def forget_missing(self, *keys: str) -> None:
+        """Evict the keys from the negative cache, here and in other processes, when the session is committed."""
+
+        if self.missing is not None:
+            for key in keys:
+                await self.missing.invalidate(key, session=self.session)
+
+    async def _retrieve_one_or_missing(self, key: str, statement: Executable) -> Row:
+        """Execute a statement to retrieve one entry, entries not found are remembered in the negative cache."""
+
+        if await self.is_missing(key):
+            raise NotFound()
+
+        try:
+            return await self._retrieve_one(statement)
+        except NotFound:
+            await self.remember_missing(key)
+            raise
+
     async def _retrieve_all(self, statement: Executable) -> Sequence[Row]:
         """Execute a statement to retrieve all rows."""
 
@@ -98,6 +137,14 @@ class CRUD:
         if result.rowcount == 0:
             raise NotFound()
 
+    async def _update_one(self, statement: Executable) -> None:
+        """Execute a statement to update one entry."""
+
+        result = await self.execute(statement)
+
+        if result.rowcount == 0:
+            raise NotFound()
+
     async def retrieve_by_pk(self, pk: Any) -> DBModel:
         """Get an existing entry by primary key."""
 
@@ -0,0 +1,11 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from .crud import JobsCRUD
+from .crud import get_jobs_crud
+from .jobs import Jobs
+
+__all__ = ['Jobs', 'JobsCRUD', 'get_jobs_crud']
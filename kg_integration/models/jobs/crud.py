@@ -0,0 +1,198 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import ColumnElement
+from sqlalchemy import and_
+from sqlalchemy import func
+from sqlalchemy import literal
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kg_integration.core.db import get_db_session
+from kg_integration.models.crud import CRUD
+from kg_integration.models.jobs.jobs import Jobs
+from kg_integration.schemas.job import JobCreateSchema
+from kg_integration.schemas.job import JobStatus
+
+
+class JobsCRUD(CRUD):
+
+    model = Jobs
+
+    async def enqueue(self, task: str, payload: dict[str, Any], max_attempts: int) -> Jobs:
+        """Put a new job into the queue."""
+
+        schema = JobCreateSchema(task=task, payload=payload, max_attempts=max_attempts)
+        return await self.create(entry_create=schema)
+
+    async def claim(self, visibility_timeout: int) -> Jobs | None:
+        """Lock the next due job for the caller.
+
+        Jobs are claimed with ``FOR UPDATE SKIP LOCKED`` so concurrent workers never pick the same row. A claimed job
+        stays invisible to other workers until ``locked_until`` passes, after which it is considered abandoned and can
+        be claimed again.
+        """
+
+        now = func.now()
+        candidate = (
+            select(self.model.id)
+            .where(
+                or_(
+                    and_(self.model.status == JobStatus.QUEUED.value, self.model.run_after <= now),
+                    and_(self.model.status == JobStatus.RUNNING.value, self.model.locked_until < now),
+                ),
+                self.model.attempts < self.model.max_attempts,
+            )
+            .order_by(self.model.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(self.model)
+            .where(self.model.id == candidate)
+            .values(
+                status=JobStatus.RUNNING.value,
+                attempts=self.model.attempts + 1,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+                updated_at=now,
+            )
+            .returning(self.model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await self.scalars(statement)
+
+        return result.first()
+
+    def lease_clause(self, pk: UUID, attempt: int | None) -> list[ColumnElement[bool]]:
+        """Match the job, and when the attempt is given only while the worker running that attempt holds it.
+
+        Every claim increments ``attempts``, so a worker whose lease has expired and the job was claimed again can not
+        overwrite the outcome of the new attempt.
+        """
+
+        clause = [self.model.id == pk]
+        if attempt is not None:
+            clause += [self.model.status == JobStatus.RUNNING.value, self.model.attempts == attempt]
+        return clause
+
+    async def extend_lease(self, pk: UUID, attempt: int, visibility_timeout: int) -> bool:
+        """Keep the running job invisible to other workers, return False when the lease was already lost."""
+
+        statement = (
+            update(self.model)
+            .where(*self.lease_clause(pk, attempt))
+            .values(locked_until=func.now() + timedelta(seconds=visibility_timeout), updated_at=func.now())
+        )
+        result = await self.execute(statement)
+
+        return result.rowcount > 0
+
+    async def mark_succeeded(self, pk: UUID, result: Any = None, attempt: int | None = None) -> None:
+        """Finish a job successfully."""
+
+        statement = (
+            update(self.model)
+            .where(*self.lease_clause(pk, attempt))
+            .values(status=JobStatus.SUCCEEDED.value, result=result, locked_until=None, updated_at=func.now())
+        )
+        await self._update_one(statement)
+
+    async def reschedule(
+        self, pk: UUID, error: str, delay: float, attempt: int | None = None, result: Any = None
+    ) -> None:
+        """Put a failed job back to the queue to be retried after the delay, keeping the partial result if any."""
+
+        statement = (
+            update(self.model)
+            .where(*self.lease_clause(pk, attempt))
+            .values(
+                status=JobStatus.QUEUED.value,
+                last_error=error,
+                result=result,
+                run_after=func.now() + timedelta(seconds=delay),
+                locked_until=None,
+                updated_at=func.now(),
+            )
+        )
+        await self._update_one(statement)
+
+    async def release(self, pk: UUID, attempt: int | None = None) -> None:
+        """Return an interrupted job to the queue without counting the attempt."""
+
+        statement = (
+            update(self.model)
+            .where(*self.lease_clause(pk, attempt))
+            .values(
+                status=JobStatus.QUEUED.value,
+                attempts=self.model.attempts - 1,
+                run_after=func.now(),
+                locked_until=None,
+                updated_at=func.now(),
+            )
+        )
+        await self._update_one(statement)
+
+    async def record_step(self, pk: UUID, step: str, output: Any = None) -> None:
+        """Mark a step of the job as completed and keep its output for the retries."""
+
+        state = func.jsonb_build_object('completed_at', func.now(), 'output', literal(output, JSONB))
+        statement = (
+            update(self.model)
+            .where(self.model.id == pk)
+            .values(
+                steps=self.model.steps.op('||')(func.jsonb_build_object(step, state)),
+                updated_at=func.now(),
+            )
+        )
+        await self._update_one(statement)
+
+    async def dead_letter(self, pk: UUID, error: str, attempt: int | None = None, result: Any = None) -> None:
+        """Give up on a job after it has exhausted all the attempts, keeping the partial result if any."""
+
+        statement = (
+            update(self.model)
+            .where(*self.lease_clause(pk, attempt))
+            .values(
+                status=JobStatus.DEAD.value, last_error=error, result=result, locked_until=None, updated_at=func.now()
+            )
+        )
+        await self._update_one(statement)
+
+    async def dead_letter_abandoned(self) -> int:
+        """Dead-letter jobs whose worker disappeared while running the last allowed attempt."""
+
+        statement = (
+            update(self.model)
+            .where(
+                self.model.status == JobStatus.RUNNING.value,
+                self.model.locked_until < func.now(),
+                self.model.attempts >= self.model.max_attempts,
+            )
+            .values(
+                status=JobStatus.DEAD.value,
+                last_error='Visibility timeout expired on the last attempt',
+                locked_until=None,
+                updated_at=func.now(),
+            )
+        )
+        result = await self.execute(statement)
+
+        return result.rowcount
+
+
+def get_jobs_crud(db_session: AsyncSession = Depends(get_db_session)) -> JobsCRUD:
+    """Return an instance of JobsCRUD as a dependency."""
+
+    return JobsCRUD(db_session)
@@ -0,0 +1,39 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from uuid import uuid4
+
+from sqlalchemy import INTEGER
+from sqlalchemy import TEXT
+from sqlalchemy import TIMESTAMP
+from sqlalchemy import UUID
+from sqlalchemy import VARCHAR
+from sqlalchemy import Column
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from kg_integration.config import get_settings
+from kg_integration.models import DBModel
+
+settings = get_settings()
+
+
+class Jobs(DBModel):
+    __tablename__ = 'jobs'
+    __table_args__ = {'schema': settings.RDS_SCHEMA_DEFAULT}
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    task = Column(VARCHAR, nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    status = Column(VARCHAR(16), nullable=False)
+    attempts = Column(INTEGER, nullable=False, default=0)
+    max_attempts = Column(INTEGER, nullable=False)
+    result = Column(JSONB)
+    steps = Column(JSONB, nullable=False, default=dict)
+    last_error = Column(TEXT)
+    run_after = Column(TIMESTAMP(timezone=True), default=func.now(), nullable=False)
+    locked_until = Column(TIMESTAMP(timezone=True))
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
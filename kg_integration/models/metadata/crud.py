@@ -4,6 +4,7 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from typing import Any
 from uuid import UUID
 
 from fastapi import Depends
@@ -13,49 +14,95 @@ from sqlalchemy import delete
 from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from kg_integration.config import get_settings
+from kg_integration.core.cache import get_cache
 from kg_integration.core.db import get_db_session
+from kg_integration.core.exceptions import NotFound
 from kg_integration.models.crud import CRUD
 from kg_integration.models.metadata.metadata import Metadata
+from kg_integration.schemas.base import BaseSchema
 
 
 class MetadataCRUD(CRUD):
 
     model = Metadata
 
+    def __init__(self, db_session: AsyncSession) -> None:
+        super().__init__(db_session)
+        settings = get_settings()
+        self.missing = get_cache(
+            settings, 'missing_metadata', settings.CACHE_MISSING_MAXSIZE, settings.CACHE_MISSING_TTL
+        )
+
     async def retrieve_by_metadata_id(self, metadata_id: UUID) -> Metadata:
         statement = self.select_query.where(self.model.metadata_id == metadata_id)
 
-        entry = await self._retrieve_one(statement)
+        entry = await self._retrieve_one_or_missing(f'metadata-id:{metadata_id}', statement)
 
         return entry
 
     async def retrieve_by_kg_instance_id(self, kg_instance_id: UUID) -> Metadata:
         statement = self.select_query.where(self.model.kg_instance_id == kg_instance_id)
 
-        entry = await self._retrieve_one(statement)
+        entry = await self._retrieve_one_or_missing(f'kg-instance-id:{kg_instance_id}', statement)
 
         return entry
 
     async def retrieve_by_metadata_ids(self, metadata_ids: list[UUID]) -> Sequence[Row]:
-        statement = self.select_query.where(self.model.metadata_id.in_(metadata_ids))
+        """Get entries uploaded for any of the ids, ids which are not found are remembered for a short time."""
+
+        unknown_ids = [
+            metadata_id for metadata_id in metadata_ids if not await self.is_missing(f'metadata-id:{metadata_id}')
+        ]
+        if not unknown_ids:
+            raise NotFound()
+
+        statement = self.select_query.where(self.model.metadata_id.in_(unknown_ids))
+        results = (await self.scalars(statement)).all()
 
-        results = await self._retrieve_all(statement)
+        found_ids = {entry.metadata_id for entry in results}
+        await self.remember_missing(
+            *(f'metadata-id:{metadata_id}' for metadata_id in unknown_ids if metadata_id not in found_ids)
+        )
+
+        if not results:
+            raise NotFound()
 
         return results
 
     async def retrieve_by_dataset_id(self, dataset_id: UUID) -> Sequence[Row]:
         statement = self.select_query.where(self.model.dataset_id == dataset_id)
 
-        results = await self._retrieve_all(statement)
+        if await self.is_missing(f'dataset-id:{dataset_id}'):
+            raise NotFound()
+
+        try:
+            results = await self._retrieve_all(statement)
+        except NotFound:
+            await self.remember_missing(f'dataset-id:{dataset_id}')
+            raise
 
         return results
 
+    async def create(self, entry_create: BaseSchema, **kwds: Any) -> Metadata:
+        """Create a new entry."""
+
+        entry = await super().create(entry_create, **kwds)
+        await self.forget_missing(
+            f'metadata-id:{entry.metadata_id}',
+            f'kg-instance-id:{entry.kg_instance_id}',
+            f'dataset-id:{entry.dataset_id}',
+        )
+
+        return entry
+
     async def delete_by_kg_instance_id(self, kg_instance_id: UUID) -> None:
         """Remove an existing entry."""
 
         statement = delete(self.model).where(self.model.kg_instance_id == kg_instance_id)
 
         await self._delete_one(statement)
+        await self.forget_missing(f'kg-instance-id:{kg_instance_id}')
 
     async def update_metadata_direction(self, entry: Metadata, direction: str) -> None:
         entry.direction = direction
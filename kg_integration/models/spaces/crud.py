@@ -13,12 +13,15 @@ from sqlalchemy import delete
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from kg_integration.config import get_settings
+from kg_integration.core.cache import get_cache
 from kg_integration.core.db import get_db_session
 from kg_integration.core.exceptions import NotFound
 from kg_integration.core.exceptions import SpaceAlreadyExists
 from kg_integration.logger import logger
 from kg_integration.models.crud import CRUD
 from kg_integration.models.spaces.spaces import Spaces
+from kg_integration.schemas.base import BaseSchema
 from kg_integration.schemas.space import SpaceCreateSchema
 
 
@@ -26,6 +29,11 @@ class SpacesCRUD(CRUD):
 
     model = Spaces
 
+    def __init__(self, db_session: AsyncSession) -> None:
+        super().__init__(db_session)
+        settings = get_settings()
+        self.missing = get_cache(settings, 'missing_spaces', settings.CACHE_MISSING_MAXSIZE, settings.CACHE_MISSING_TTL)
+
     async def retrieve_by_pk(self, pk: Any) -> Spaces:
         """Get an existing entry by primary key."""
 
@@ -35,7 +43,12 @@ class SpacesCRUD(CRUD):
         return entry
 
     async def retrieve_by_name(self, name: str) -> Spaces:
-        return await self.retrieve_by_pk(name)
+        """Get an existing entry by name, names which are not found are remembered for a short time."""
+
+        statement = self.select_query.where(self.model.name == name)
+        entry = await self._retrieve_one_or_missing(f'space:{name}', statement)
+
+        return entry
 
     async def retrieve_by_names(self, name_list: list[str]) -> Sequence[Row]:
         statement = self.select_query.where(self.model.name.in_(name_list))
@@ -59,15 +72,24 @@ class SpacesCRUD(CRUD):
             raise SpaceAlreadyExists()
         except NotFound:
             schema = SpaceCreateSchema(name=name, creator=username)
-            space = await super().create(entry_create=schema)
+            space = await self.create(entry_create=schema)
             return space
 
+    async def create(self, entry_create: BaseSchema, **kwds: Any) -> Spaces:
+        """Create a new entry."""
+
+        space = await super().create(entry_create, **kwds)
+        await self.forget_missing(f'space:{space.name}')
+
+        return space
+
     async def delete(self, pk: Any) -> None:
         """Remove an existing entry."""
 
         statement = delete(self.model).where(self.model.name == pk)
 
         await self._delete_one(statement)
+        await self.forget_missing(f'space:{pk}')
 
 
 def get_spaces_crud(db_session: AsyncSession = Depends(get_db_session)) -> SpacesCRUD:
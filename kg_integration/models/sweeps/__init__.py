@@ -0,0 +1,11 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from .crud import SweepsCRUD
+from .crud import get_sweeps_crud
+from .sweeps import Sweeps
+
+__all__ = ['Sweeps', 'SweepsCRUD', 'get_sweeps_crud']
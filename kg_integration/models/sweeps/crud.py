@@ -0,0 +1,109 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from fastapi import Depends
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kg_integration.core.db import get_db_session
+from kg_integration.models.crud import CRUD
+from kg_integration.models.spaces.spaces import Spaces
+from kg_integration.models.sweeps.sweeps import Sweeps
+
+
+class SweepsCRUD(CRUD):
+
+    model = Sweeps
+
+    async def claim_batch(self, name: str, batch_size: int, interval: float, timeout: float) -> list[Spaces]:
+        """Take the next batch of spaces for the sweep.
+
+        The cursor is moved past the batch only by ``complete_batch``. Until then the batch is held for the timeout,
+        and no other batch is given out. A batch of a worker that crashed is given out again once the timeout
+        passes. The sweep row stays locked until the caller commits, so concurrent workers never claim the same
+        batch. When the cursor reaches the end the sweep is finished and the next one starts after the interval.
+        """
+
+        await self.execute(insert(self.model).values(name=name).on_conflict_do_nothing())
+        statement = (
+            self.select_query.where(self.model.name == name)
+            .with_for_update(skip_locked=True)
+            .execution_options(populate_existing=True)
+        )
+        sweep = (await self.scalars(statement)).first()
+        if sweep is None:
+            return []
+
+        now = datetime.now(timezone.utc)
+        if sweep.batch_until is not None and sweep.batch_until > now:
+            return []
+
+        if sweep.cursor is None and sweep.batch_end is None and sweep.finished_at is not None:
+            if sweep.finished_at > now - timedelta(seconds=interval):
+                return []
+
+        statement = select(Spaces).order_by(Spaces.name).limit(batch_size)
+        if sweep.cursor is not None:
+            statement = statement.where(Spaces.name > sweep.cursor)
+        spaces = list((await self.scalars(statement)).all())
+
+        if spaces:
+            values = {'batch_end': spaces[-1].name, 'batch_until': func.now() + timedelta(seconds=timeout)}
+            if sweep.cursor is None and sweep.batch_end is None:
+                values['started_at'] = func.now()
+        else:
+            values = {'cursor': None, 'batch_end': None, 'batch_until': None, 'finished_at': func.now()}
+
+        await self._update_one(
+            update(self.model).where(self.model.name == name).values(**values, updated_at=func.now())
+        )
+
+        return spaces
+
+    async def complete_batch(self, name: str, batch_end: str) -> None:
+        """Move the cursor of the sweep past the processed batch, unless it was already done by another worker."""
+
+        statement = (
+            update(self.model)
+            .where(self.model.name == name, self.model.batch_end == batch_end)
+            .values(cursor=batch_end, batch_end=None, batch_until=None, updated_at=func.now())
+        )
+        await self.execute(statement)
+
+    async def take_budget(self, name: str, calls: int, capacity: int, rate: float) -> float:
+        """Take calls from the token bucket of the sweep shared by all the workers and return what is left.
+
+        The bucket is refilled with the rate per second since it was used last time. A negative result is the debt
+        the caller has to wait for before making the calls.
+        """
+
+        now = func.now()
+        elapsed = func.extract('epoch', now - func.coalesce(self.model.budget_updated_at, now))
+        available = func.least(capacity, func.coalesce(self.model.budget, capacity) + elapsed * rate)
+        statement = (
+            insert(self.model)
+            .values(name=name, budget=capacity - calls, budget_updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[self.model.name],
+                set_={'budget': available - calls, 'budget_updated_at': now, 'updated_at': now},
+            )
+            .returning(self.model.budget)
+        )
+
+        return (await self.scalars(statement)).one()
+
+
+def get_sweeps_crud(db_session: AsyncSession = Depends(get_db_session)) -> SweepsCRUD:
+    """Return an instance of SweepsCRUD as a dependency."""
+
+    return SweepsCRUD(db_session)
@@ -0,0 +1,30 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from sqlalchemy import FLOAT
+from sqlalchemy import TIMESTAMP
+from sqlalchemy import VARCHAR
+from sqlalchemy import Column
+from sqlalchemy import func
+
+from kg_integration.config import get_settings
+from kg_integration.models import DBModel
+
+settings = get_settings()
+
+
+class Sweeps(DBModel):
+    __tablename__ = 'sweeps'
+    __table_args__ = {'schema': settings.RDS_SCHEMA_DEFAULT}
+    name = Column(VARCHAR, primary_key=True)
+    cursor = Column(VARCHAR)
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    batch_end = Column(VARCHAR)
+    batch_until = Column(TIMESTAMP(timezone=True))
+    budget = Column(FLOAT)
+    budget_updated_at = Column(TIMESTAMP(timezone=True))
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,25 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from uuid import UUID
+
+from fastapi import APIRouter
+from fastapi import Depends
+
+from kg_integration.models import JobsCRUD
+from kg_integration.models import get_jobs_crud
+from kg_integration.schemas.job import JobSchema
+
+router = APIRouter(prefix='/jobs', tags=['Background jobs'])
+
+
+@router.get('/{job_id}', summary='Get status and step progress of a background job.', response_model=JobSchema)
+async def get_job(
+    job_id: UUID,
+    jobs_crud: JobsCRUD = Depends(get_jobs_crud),
+) -> JobSchema:
+    job = await jobs_crud.retrieve_by_pk(job_id)
+    return JobSchema.from_db(job)
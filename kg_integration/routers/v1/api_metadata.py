@@ -4,15 +4,24 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from collections.abc import AsyncIterator
+from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import Query
 from fastapi import Response
-from starlette.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from starlette.status import HTTP_304_NOT_MODIFIED
 
 from kg_integration.core.exceptions import NotFound
+from kg_integration.core.exceptions import UnhandledException
+from kg_integration.core.serialization import ORJSONResponse
+from kg_integration.core.serialization import ORJSONRoute
+from kg_integration.core.serialization import SchemaResponse
+from kg_integration.middleware import get_token
 from kg_integration.models import MetadataCRUD
 from kg_integration.models import get_metadata_crud
 from kg_integration.schemas.metadata import MetadataCreateSchema
@@ -20,32 +29,67 @@ from kg_integration.schemas.metadata import MetadataKGResponseListSchema
 from kg_integration.schemas.metadata import MetadataKGResponseSchema
 from kg_integration.schemas.metadata import MetadataListSchema
 from kg_integration.schemas.metadata import MetadataQueryListSchema
+from kg_integration.utils import jsonld
 from kg_integration.utils.dataset_manager import DatasetManager
 from kg_integration.utils.dataset_manager import get_dataset_manager
 from kg_integration.utils.helpers import NamespaceHelper
 from kg_integration.utils.helpers import get_namespace_helper
+from kg_integration.utils.jsonld import compact_iri
 from kg_integration.utils.keycloak_manager import KeycloakManager
 from kg_integration.utils.keycloak_manager import get_keycloak_manager
 from kg_integration.utils.kg_manager import KGManager
 from kg_integration.utils.kg_manager import get_kg_manager
 from kg_integration.utils.spaces_activity_log import KGActivityLog
 
-router = APIRouter(prefix='/metadata', tags=['Knowledge Graph metadata'])
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
 
+STREAM_CHUNK_SIZE = 64 * 1024
 
-@router.get('/', summary='List uploaded instances for given parameters.')
+router = APIRouter(prefix='/metadata', tags=['Knowledge Graph metadata'], route_class=ORJSONRoute)
+
+
+@router.get('/', summary='List uploaded instances for given parameters.', response_model=MetadataKGResponseListSchema)
 async def get_metadata(
     space: str,
     type: str,  # noqa: A002
     stage: str = Query(enum=['IN_PROGRESS', 'RELEASED']),
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    from_: int | None = Query(default=None, alias='from', ge=0, description='Number of instances to skip'),
+    size: int | None = Query(default=None, ge=1, description='Number of instances to return, all when not set'),
+    stream: bool = Query(default=False, description='Stream instances while they are received from KG'),
+    compact: bool = Query(default=False, description='Shorten IRIs with prefixes defined in @context, not streamed'),
+    token: str = Depends(get_token),
+    accept: str | None = Header(default=None),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     namespace: NamespaceHelper = Depends(get_namespace_helper),
     kg_manager: KGManager = Depends(get_kg_manager),
-) -> MetadataKGResponseListSchema:
+) -> Response:
     external_token = await keycloak_manager.exchange_token(token)
-    data = await kg_manager.get_metadata(namespace.for_kg(space), stage, type, external_token)
-    return MetadataKGResponseListSchema.from_kg_response(data)
+    if not stream:
+        if size is None:
+            # KG is asked for bounded pages instead of building a single response with the whole space
+            instances = kg_manager.iter_metadata(namespace.for_kg(space), stage, type, external_token, from_=from_ or 0)
+            data = [instance async for instance in instances]
+            page = {'data': data, 'total': (from_ or 0) + len(data), 'from': from_ or 0, 'size': len(data)}
+        else:
+            page = await kg_manager.get_metadata_page(namespace.for_kg(space), stage, type, external_token, from_, size)
+        schema = MetadataKGResponseListSchema.from_kg_page(page, trusted=True)
+        if compact:
+            for instance in schema.result:
+                instance.type = [compact_iri(type_) for type_ in instance.type]
+                instance.data = jsonld.compact(instance.data)
+            schema.context = jsonld.CONTEXT
+        return SchemaResponse(schema)
+
+    if size is None:
+        instances = kg_manager.iter_metadata(namespace.for_kg(space), stage, type, external_token, from_=from_ or 0)
+    else:
+        instances = kg_manager.stream_metadata(namespace.for_kg(space), stage, type, external_token, from_, size)
+    # errors received before the first instance are still returned with their status
+    first = await anext(instances, None)
+    ndjson = NDJSON_MEDIA_TYPE in (accept or '')
+    return StreamingResponse(
+        encode_instances(first, instances, ndjson), media_type=NDJSON_MEDIA_TYPE if ndjson else 'application/json'
+    )
 
 
 @router.post('/', summary='Check a list of metadata if they were uploaded.')
@@ -57,18 +101,69 @@ async def check_metadata(
     return MetadataListSchema(metadata=result)
 
 
+async def encode_instances(
+    first: dict[str, Any] | None, instances: AsyncIterator[dict[str, Any]], ndjson: bool
+) -> AsyncIterator[bytes]:
+    """Convert KG instances one by one and write them out as NDJSON or as the result list in chunks."""
+
+    chunk = bytearray() if ndjson else bytearray(b'{"result":[')
+    count = 0
+    try:
+        instance = first
+        while instance is not None:
+            if count and not ndjson:
+                chunk += b','
+            chunk += MetadataKGResponseSchema.from_kg_response(instance, trusted=True).to_json()
+            if ndjson:
+                chunk += b'\n'
+            count += 1
+
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+            instance = await anext(instances, None)
+    finally:
+        await instances.aclose()
+
+    if not ndjson:
+        chunk += b']}'
+    if chunk:
+        yield bytes(chunk)
+
+
+def etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    """Check if the entity tag is listed in If-None-Match header, tags are compared with the weak comparison."""
+
+    if not if_none_match or not etag:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    return etag.removeprefix('W/') in {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+
+
 @router.get('/{metadata_id}', summary='Get metadata by ID.')
 async def get_metadata_by_id(
     metadata_id: UUID,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
+    compact: bool = Query(default=False, description='Shorten IRIs with prefixes defined in @context'),
+    if_none_match: str | None = Header(default=None),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
-) -> JSONResponse:
+) -> Response:
     external_token = await keycloak_manager.exchange_token(token)
     metadata = await kg_manager.get_metadata_details(
-        kg_instance_id=metadata_id, stage='IN_PROGRESS', token=external_token
+        kg_instance_id=metadata_id, stage='IN_PROGRESS', token=external_token, cached=True
     )
-    return JSONResponse(content=metadata)
+    etag = kg_manager.get_etag(metadata, 'compact' if compact else None)
+    headers = {'ETag': etag} if etag else None
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if compact:
+        metadata = {'@context': jsonld.CONTEXT, **jsonld.compact(metadata)}
+    return ORJSONResponse(content=metadata, headers=headers)
 
 
 @router.get('/upload/{kg_instance_id}/{dataset_id}', summary='Download metadata from KG by ID to specified dataset.')
@@ -77,21 +172,30 @@ async def download_metadata_by_id(
     dataset_id: UUID,
     uploader: str,
     filename: str | None = Query(default=None),
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     metadata_crud: MetadataCRUD = Depends(get_metadata_crud),
     activity_log: KGActivityLog = Depends(),
-) -> JSONResponse:
+) -> ORJSONResponse:
     external_token = await keycloak_manager.exchange_token(token)
     openminds_schema = await dataset_manager.get_openminds_template()
     metadata_status = await kg_manager.check_metadata_status(kg_instance_id=kg_instance_id, token=external_token)
     stage = 'IN_PROGRESS' if metadata_status == 'UNRELEASED' else 'RELEASED'
     metadata = await kg_manager.get_metadata_details(kg_instance_id=kg_instance_id, stage=stage, token=external_token)
-    response = await dataset_manager.upload_new_openminds_schema(
-        dataset_id=dataset_id, uploader=uploader, metadata=metadata, filename=filename, template=openminds_schema
-    )
+    try:
+        response = await dataset_manager.upload_new_openminds_schema(
+            dataset_id=dataset_id, uploader=uploader, metadata=metadata, filename=filename, template=openminds_schema
+        )
+    except UnhandledException:
+        # cached template id may be outdated, retry once with the current one
+        refreshed_schema = await dataset_manager.get_openminds_template(refresh=True)
+        if refreshed_schema == openminds_schema:
+            raise
+        response = await dataset_manager.upload_new_openminds_schema(
+            dataset_id=dataset_id, uploader=uploader, metadata=metadata, filename=filename, template=refreshed_schema
+        )
     data = response.json()
     await metadata_crud.create(
         MetadataCreateSchema(
@@ -102,20 +206,20 @@ async def download_metadata_by_id(
     await activity_log.send_metadata_on_download_event(
         dataset_code=dataset_code, target_name=filename or str(kg_instance_id) + '.jsonld', creator=uploader
     )
-    return JSONResponse(content=data['result'])
+    return ORJSONResponse(content=data['result'])
 
 
 @router.get('/refresh/{metadata_id}', summary='Refresh metadata from KG.')
 async def update_metadata_from_kg_to_hdc(
     metadata_id: UUID,
     username: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     metadata_crud: MetadataCRUD = Depends(get_metadata_crud),
     activity_log: KGActivityLog = Depends(),
-) -> JSONResponse:
+) -> ORJSONResponse:
     external_token = await keycloak_manager.exchange_token(token)
     uploaded_metadata = await metadata_crud.retrieve_by_metadata_id(metadata_id)
     if not uploaded_metadata:
@@ -141,13 +245,13 @@ async def update_metadata_from_kg_to_hdc(
 async def bulk_update_metadata_from_kg_to_hdc(
     dataset_id: UUID,
     username: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     metadata_crud: MetadataCRUD = Depends(get_metadata_crud),
     activity_log: KGActivityLog = Depends(),
-) -> JSONResponse:
+) -> ORJSONResponse:
     external_token = await keycloak_manager.exchange_token(token)
     dataset_metadata = await metadata_crud.retrieve_by_dataset_id(dataset_id)
     refreshed_metadata = []
@@ -176,23 +280,23 @@ async def upload_metadata(
     metadata_id: UUID,
     dataset_id: UUID,
     uploader: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     namespace: NamespaceHelper = Depends(get_namespace_helper),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     metadata_crud: MetadataCRUD = Depends(get_metadata_crud),
     activity_log: KGActivityLog = Depends(),
-) -> MetadataKGResponseSchema:
+) -> Response:
     external_token = await keycloak_manager.exchange_token(token)
     data = await kg_manager.upload_metadata(namespace.for_kg(space), metadata, external_token)
-    instance = MetadataKGResponseSchema.from_kg_response(data)
+    instance = MetadataKGResponseSchema.from_kg_response(data, trusted=True)
     await metadata_crud.create(
         MetadataCreateSchema(metadata_id=metadata_id, kg_instance_id=instance.id, dataset_id=dataset_id, direction='KG')
     )
     dataset_code = await dataset_manager.get_dataset_code(dataset_id=dataset_id)
     await activity_log.send_metadata_on_upload_event(dataset_code=dataset_code, creator=uploader)
-    return instance
+    return SchemaResponse(instance)
 
 
 @router.put(
@@ -205,25 +309,25 @@ async def update_metadata_from_hdc_to_kg(
     metadata_id: UUID,
     dataset_id: UUID,
     uploader: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     namespace: NamespaceHelper = Depends(get_namespace_helper),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     metadata_crud: MetadataCRUD = Depends(get_metadata_crud),
     activity_log: KGActivityLog = Depends(),
-) -> MetadataKGResponseSchema:
+) -> Response:
     external_token = await keycloak_manager.exchange_token(token)
     try:
         metadata_upload = await metadata_crud.retrieve_by_metadata_id(metadata_id)
         instance_id = metadata_upload.kg_instance_id
         data = await kg_manager.update_metadata(instance_id=instance_id, data=metadata, token=external_token)
-        instance = MetadataKGResponseSchema.from_kg_response(data)
+        instance = MetadataKGResponseSchema.from_kg_response(data, trusted=True)
         await metadata_crud.update_metadata_direction(metadata_upload, 'KG')
-        return instance
+        return SchemaResponse(instance)
     except NotFound:
         data = await kg_manager.upload_metadata(namespace.for_kg(space), metadata, external_token)
-        instance = MetadataKGResponseSchema.from_kg_response(data)
+        instance = MetadataKGResponseSchema.from_kg_response(data, trusted=True)
         await metadata_crud.create(
             MetadataCreateSchema(
                 metadata_id=metadata_id, kg_instance_id=instance.id, dataset_id=dataset_id, direction='KG'
@@ -233,7 +337,7 @@ async def update_metadata_from_hdc_to_kg(
         await activity_log.send_metadata_on_upload_event(
             dataset_code=dataset_code, target_name=filename, creator=uploader
         )
-        return instance
+        return SchemaResponse(instance)
 
 
 @router.put(
@@ -243,14 +347,14 @@ async def update_metadata_from_hdc_to_kg(
 async def bulk_update_metadata_from_hdc_to_kg(
     dataset_id: UUID,
     username: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     metadata_crud: MetadataCRUD = Depends(get_metadata_crud),
     namespace: NamespaceHelper = Depends(get_namespace_helper),
     activity_log: KGActivityLog = Depends(),
-) -> JSONResponse:
+) -> ORJSONResponse:
     external_token = await keycloak_manager.exchange_token(token)
     dataset_code = await dataset_manager.get_dataset_code(dataset_id=dataset_id)
     all_dataset_metadata = await dataset_manager.get_all_dataset_schemas(dataset_id)
@@ -286,7 +390,7 @@ async def bulk_update_metadata_from_hdc_to_kg(
 async def delete_metadata(
     kg_instance_id: UUID,
     username: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
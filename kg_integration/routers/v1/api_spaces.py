@@ -7,15 +7,17 @@
 from json import JSONDecodeError
 
 from fastapi import APIRouter
-from fastapi import BackgroundTasks
 from fastapi import Depends
 from fastapi import Query
 from fastapi import Response
 from starlette.status import HTTP_201_CREATED
 
 from kg_integration.core.exceptions import ServiceException
+from kg_integration.core.exceptions import UnhandledException
+from kg_integration.middleware import get_token
 from kg_integration.models import SpacesCRUD
 from kg_integration.models import get_spaces_crud
+from kg_integration.schemas.job import JobCreatedSchema
 from kg_integration.schemas.space import SpaceListResponseSchema
 from kg_integration.schemas.space import SpaceListSchema
 from kg_integration.schemas.space import SpaceSchema
@@ -23,8 +25,8 @@ from kg_integration.utils.auth_manager import AuthManager
 from kg_integration.utils.auth_manager import get_auth_manager
 from kg_integration.utils.dataset_manager import DatasetManager
 from kg_integration.utils.dataset_manager import get_dataset_manager
-from kg_integration.utils.helpers import HeavyTasksHelper
-from kg_integration.utils.helpers import get_heavy_tasks_helper
+from kg_integration.utils.job_queue import JobQueue
+from kg_integration.utils.job_queue import get_job_queue
 from kg_integration.utils.keycloak_manager import KeycloakManager
 from kg_integration.utils.keycloak_manager import get_keycloak_manager
 from kg_integration.utils.kg_manager import KGManager
@@ -38,7 +40,7 @@ router = APIRouter(prefix='/spaces', tags=['Knowledge Graph spaces'])
 
 @router.get('/', summary='List all available to user KG spaces.', response_model=SpaceListResponseSchema)
 async def list_spaces(
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
 ) -> SpaceListResponseSchema:
@@ -65,84 +67,66 @@ async def get_space(
     return space
 
 
-@router.post('/create', summary='Create a KG space.', status_code=HTTP_201_CREATED)
+@router.post('/create', summary='Create a KG space.', status_code=HTTP_201_CREATED, response_model=JobCreatedSchema)
 async def create_space(
     name: str = Query(description='Name of the space to be created'),
     username: str = Query(description='Name of the creator'),
-    keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
-    heavy_tasks: HeavyTasksHelper = Depends(get_heavy_tasks_helper),
-    background_tasks: BackgroundTasks = BackgroundTasks,
-) -> Response:
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> JobCreatedSchema:
     space = await spaces_crud.create_space(name, username)
 
-    service_account_token = await keycloak_manager.get_service_account_token()
+    job = await job_queue.enqueue('create_space', space_name=space.name, users=[])
 
-    background_tasks.add_task(
-        heavy_tasks.create_space,
-        space_name=space.name,
-        users=[],
-        external_token=service_account_token,
-        service_account_token=service_account_token,
-    )
-
-    return Response(status_code=201)
+    return JobCreatedSchema(job_id=job.id)
 
 
 @router.post(
     '/create/project/{project_code}',
     summary='Create a KG space for an HDC project.',
     status_code=HTTP_201_CREATED,
+    response_model=JobCreatedSchema,
 )
 async def create_space_for_project(
     project_code: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     auth_manager: AuthManager = Depends(get_auth_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
-    heavy_tasks: HeavyTasksHelper = Depends(get_heavy_tasks_helper),
-    background_tasks: BackgroundTasks = BackgroundTasks,
-) -> Response:
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> JobCreatedSchema:
     external_token = await keycloak_manager.exchange_token(token)
-    service_account_token = await keycloak_manager.get_service_account_token()
     user_data = await kg_manager.get_user_details(external_token)
     username = user_data.get('http://schema.org/alternateName')
     space = await spaces_crud.create_space(project_code, username)
 
     users = await auth_manager.get_project_users(project_code)
 
-    background_tasks.add_task(
-        heavy_tasks.create_space,
-        space_name=space.name,
-        users=users,
-        external_token=external_token,
-        service_account_token=service_account_token,
-    )
+    job = await job_queue.enqueue('create_space', space_name=space.name, users=users, username=username)
 
-    return Response(status_code=201)
+    return JobCreatedSchema(job_id=job.id)
 
 
 @router.post(
     '/create/dataset/{dataset_code}',
     summary='Create a KG space for a dataset.',
     status_code=HTTP_201_CREATED,
+    response_model=JobCreatedSchema,
 )
 async def create_space_for_dataset(
     dataset_code: str,
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     auth_manager: AuthManager = Depends(get_auth_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
     project_manager: ProjectManager = Depends(get_project_manager),
     kg_manager: KGManager = Depends(get_kg_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
-    heavy_tasks: HeavyTasksHelper = Depends(get_heavy_tasks_helper),
-    background_tasks: BackgroundTasks = BackgroundTasks,
+    job_queue: JobQueue = Depends(get_job_queue),
     activity_log: KGActivityLog = Depends(),
-) -> Response:
+) -> JobCreatedSchema:
     external_token = await keycloak_manager.exchange_token(token)
-    service_account_token = await keycloak_manager.get_service_account_token()
     user_data = await kg_manager.get_user_details(external_token)
     username = user_data.get('http://schema.org/alternateName')
     space = await spaces_crud.create_space(dataset_code, username)
@@ -152,15 +136,13 @@ async def create_space_for_dataset(
         project_id = await dataset_manager.get_project_id(dataset_code)
         project_code = await project_manager.get_project_code(project_id)
         users = await auth_manager.get_project_users(project_code)
-
-        background_tasks.add_task(
-            heavy_tasks.create_space,
-            space_name=space.name,
-            users=users,
-            external_token=external_token,
-            service_account_token=service_account_token,
-        )
-    except (ServiceException, JSONDecodeError):
+    except ServiceException:
         await spaces_crud.delete(space.name)
+        raise
+    except JSONDecodeError as e:
+        await spaces_crud.delete(space.name)
+        raise UnhandledException() from e
+
+    job = await job_queue.enqueue('create_space', space_name=space.name, users=users, username=username)
 
-    return Response(status_code=201)
+    return JobCreatedSchema(job_id=job.id)
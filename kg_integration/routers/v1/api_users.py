@@ -7,32 +7,44 @@
 from uuid import UUID
 
 from fastapi import APIRouter
-from fastapi import BackgroundTasks
 from fastapi import Depends
 from fastapi import Query
 from fastapi import Response
 
+from kg_integration.middleware import get_token
 from kg_integration.models import SpacesCRUD
 from kg_integration.models import get_spaces_crud
+from kg_integration.utils.auth_manager import AuthManager
+from kg_integration.utils.auth_manager import get_auth_manager
 from kg_integration.utils.collab_manager import CollabManager
 from kg_integration.utils.collab_manager import get_collab_manager
 from kg_integration.utils.dataset_manager import DatasetManager
 from kg_integration.utils.dataset_manager import get_dataset_manager
-from kg_integration.utils.helpers import HeavyTasksHelper
 from kg_integration.utils.helpers import NamespaceHelper
-from kg_integration.utils.helpers import get_heavy_tasks_helper
 from kg_integration.utils.helpers import get_namespace_helper
+from kg_integration.utils.job_queue import JobQueue
+from kg_integration.utils.job_queue import get_job_queue
 from kg_integration.utils.keycloak_manager import KeycloakManager
 from kg_integration.utils.keycloak_manager import get_keycloak_manager
+from kg_integration.utils.project_manager import ProjectManager
+from kg_integration.utils.project_manager import get_project_manager
 
 router = APIRouter(prefix='/users', tags=['Knowledge Graph users'])
 
 
+async def invalidate_project_users(
+    project_id: UUID, project_manager: ProjectManager, auth_manager: AuthManager
+) -> None:
+    """Drop cached membership of the project, memberships of all projects are dropped if its code is not cached."""
+    project_code = await project_manager.get_cached_project_code(str(project_id))
+    await auth_manager.invalidate_project_users(project_code)
+
+
 @router.get('/{space}', summary='Get users on the given space')
 async def get_user_list(
     space: str,
     role: str = Query(enum=['administrator', 'editor', 'viewer']),
-    token: str = Query(default=None, description='Authentication bearer token from HDC Keycloak'),
+    token: str = Depends(get_token),
     keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     namespace: NamespaceHelper = Depends(get_namespace_helper),
     collab_manager: CollabManager = Depends(get_collab_manager),
@@ -47,21 +59,20 @@ async def invite_user(
     project_id: UUID,
     username: str,
     role: str = Query(enum=['administrator', 'editor', 'viewer']),
-    keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
+    project_manager: ProjectManager = Depends(get_project_manager),
+    auth_manager: AuthManager = Depends(get_auth_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
-    heavy_tasks: HeavyTasksHelper = Depends(get_heavy_tasks_helper),
-    background_tasks: BackgroundTasks = BackgroundTasks,
+    job_queue: JobQueue = Depends(get_job_queue),
 ):
-    service_account_token = await keycloak_manager.get_service_account_token()
+    await invalidate_project_users(project_id, project_manager, auth_manager)
     dataset_codes = await dataset_manager.get_all_project_datasets(project_id=project_id)
     dataset_codes = await spaces_crud.retrieve_only_existing_names(dataset_codes)
-    background_tasks.add_task(
-        heavy_tasks.add_user_task,
+    await job_queue.enqueue(
+        'add_user_task',
         username=username,
         role=role,
-        dataset_codes=dataset_codes,
-        service_account_token=service_account_token,
+        dataset_codes=list(dataset_codes),
     )
     return Response(status_code=204)
 
@@ -71,21 +82,20 @@ async def remove_user(
     project_id: UUID,
     username: str,
     role: str = Query(enum=['administrator', 'editor', 'viewer']),
-    keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
+    project_manager: ProjectManager = Depends(get_project_manager),
+    auth_manager: AuthManager = Depends(get_auth_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
-    heavy_tasks: HeavyTasksHelper = Depends(get_heavy_tasks_helper),
-    background_tasks: BackgroundTasks = BackgroundTasks,
+    job_queue: JobQueue = Depends(get_job_queue),
 ):
-    service_account_token = await keycloak_manager.get_service_account_token()
+    await invalidate_project_users(project_id, project_manager, auth_manager)
     dataset_codes = await dataset_manager.get_all_project_datasets(project_id=project_id)
     dataset_codes = await spaces_crud.retrieve_only_existing_names(dataset_codes)
-    background_tasks.add_task(
-        heavy_tasks.remove_user_task,
+    await job_queue.enqueue(
+        'remove_user_task',
         username=username,
         role=role,
-        dataset_codes=dataset_codes,
-        service_account_token=service_account_token,
+        dataset_codes=list(dataset_codes),
     )
     return Response(status_code=204)
 
@@ -96,21 +106,20 @@ async def update_user(
     username: str,
     current_role: str = Query(enum=['administrator', 'editor', 'viewer']),
     new_role: str = Query(enum=['administrator', 'editor', 'viewer']),
-    keycloak_manager: KeycloakManager = Depends(get_keycloak_manager),
     dataset_manager: DatasetManager = Depends(get_dataset_manager),
+    project_manager: ProjectManager = Depends(get_project_manager),
+    auth_manager: AuthManager = Depends(get_auth_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
-    heavy_tasks: HeavyTasksHelper = Depends(get_heavy_tasks_helper),
-    background_tasks: BackgroundTasks = BackgroundTasks,
+    job_queue: JobQueue = Depends(get_job_queue),
 ):
-    service_account_token = await keycloak_manager.get_service_account_token()
+    await invalidate_project_users(project_id, project_manager, auth_manager)
     dataset_codes = await dataset_manager.get_all_project_datasets(project_id=project_id)
     dataset_codes = await spaces_crud.retrieve_only_existing_names(dataset_codes)
-    background_tasks.add_task(
-        heavy_tasks.update_user_task,
+    await job_queue.enqueue(
+        'update_user_task',
         username=username,
         current_role=current_role,
         new_role=new_role,
-        dataset_codes=dataset_codes,
-        service_account_token=service_account_token,
+        dataset_codes=list(dataset_codes),
     )
     return Response(status_code=204)
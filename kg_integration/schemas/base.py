@@ -15,3 +15,7 @@ class BaseSchema(BaseModel):
 
     def to_payload(self) -> dict[str, Any]:
         return json.loads(self.json())
+
+    def to_json(self) -> bytes:
+        """Serialize the schema the same way FastAPI does for response models."""
+        return self.__pydantic_serializer__.to_json(self, by_alias=True)
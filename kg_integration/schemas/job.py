@@ -0,0 +1,101 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from pydantic import ConfigDict
+
+from kg_integration.schemas.base import BaseSchema
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a background job."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    DEAD = 'dead'
+
+
+class CreateSpaceStep(str, Enum):
+    """Steps of the space creation task."""
+
+    USER_FOUND = 'user_found'
+    COLLAB_CREATED = 'collab_created'
+    ROLES_READY = 'roles_ready'
+    USERS_SYNCED = 'users_synced'
+    KG_SPACE_CREATED = 'kg_space_created'
+
+
+TASK_STEPS = {
+    'create_space': [step.value for step in CreateSpaceStep],
+}
+
+
+class JobCreateSchema(BaseSchema):
+    """Job schema for DB queries."""
+
+    model_config = ConfigDict(use_enum_values=True)
+
+    task: str
+    payload: dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+    max_attempts: int
+
+
+class JobCreatedSchema(BaseSchema):
+    """Response schema for requests that put a job to the queue."""
+
+    job_id: UUID
+
+
+class JobStepSchema(BaseSchema):
+    name: str
+    completed: bool
+    completed_at: datetime | None = None
+
+
+class JobSchema(BaseSchema):
+    """Response schema for job status requests."""
+
+    id: UUID
+    task: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    last_error: str | None
+    result: Any
+    steps: list[JobStepSchema]
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_db(cls, job: Any) -> 'JobSchema':
+        recorded = dict(job.steps or {})
+        names = TASK_STEPS.get(job.task, [])
+        names = names + [name for name in recorded if name not in names]
+        steps = [
+            JobStepSchema(
+                name=name, completed=name in recorded, completed_at=recorded.get(name, {}).get('completed_at')
+            )
+            for name in names
+        ]
+
+        return cls(
+            id=job.id,
+            task=job.task,
+            status=job.status,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            last_error=job.last_error,
+            result=job.result,
+            steps=steps,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
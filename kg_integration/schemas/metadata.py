@@ -10,9 +10,13 @@ from typing import Any
 from uuid import UUID
 
 from pydantic import ConfigDict
+from pydantic import Field
 
 from kg_integration.schemas.base import BaseSchema
 
+KG_INSTANCES = 'https://kg.ebrains.eu/api/instances/'
+KG_META = 'https://core.kg.ebrains.eu/vocab/meta/'
+
 
 class MetadataKGResponseSchema(BaseSchema):
     id: UUID
@@ -23,29 +27,51 @@ class MetadataKGResponseSchema(BaseSchema):
     data: dict
 
     @classmethod
-    def from_kg_response(cls, data: dict[str, Any]) -> 'MetadataKGResponseSchema':
+    def from_kg_response(cls, data: dict[str, Any], trusted: bool = False) -> 'MetadataKGResponseSchema':
+        """Build the schema from KG instance, the instance is modified in place.
+
+        With ``trusted`` the instance received from KG is not validated, only the IDs are parsed.
+        """
         data.pop('http://schema.org/identifier')
-        return cls(
-            id=data.pop('@id').removeprefix('https://kg.ebrains.eu/api/instances/'),
-            creator=data.pop('https://core.kg.ebrains.eu/vocab/meta/user')['@id'].removeprefix(
-                'https://kg.ebrains.eu/api/instances/'
-            ),
-            type=data.pop('@type'),
-            space=data.pop('https://core.kg.ebrains.eu/vocab/meta/space'),
-            revision=data.pop('https://core.kg.ebrains.eu/vocab/meta/revision'),
-            data=data,
-        )
+        fields = {
+            'id': data.pop('@id').removeprefix(KG_INSTANCES),
+            'creator': data.pop(KG_META + 'user')['@id'].removeprefix(KG_INSTANCES),
+            'type': data.pop('@type'),
+            'space': data.pop(KG_META + 'space'),
+            'revision': data.pop(KG_META + 'revision'),
+            'data': data,
+        }
+        if not trusted:
+            return cls(**fields)
+
+        fields['id'] = UUID(fields['id'])
+        fields['creator'] = UUID(fields['creator'])
+        return cls.model_construct(**fields)
 
 
 class MetadataKGResponseListSchema(BaseSchema):
+    context: dict | None = Field(default=None, serialization_alias='@context', exclude_if=lambda value: value is None)
     result: list
+    total: int | None = None
+    from_: int = Field(default=0, serialization_alias='from')
+    size: int | None = None
 
     @classmethod
-    def from_kg_response(cls, data: list[dict[str, Any]]) -> 'MetadataKGResponseListSchema':
+    def from_kg_response(
+        cls, data: list[dict[str, Any]], trusted: bool = False, **paging: Any
+    ) -> 'MetadataKGResponseListSchema':
         all_metadata = []
         for metadata in data:
-            all_metadata.append(MetadataKGResponseSchema.from_kg_response(metadata))
-        return cls(result=all_metadata)
+            all_metadata.append(MetadataKGResponseSchema.from_kg_response(metadata, trusted))
+        if trusted:
+            return cls.model_construct(result=all_metadata, **paging)
+        return cls(result=all_metadata, **paging)
+
+    @classmethod
+    def from_kg_page(cls, page: dict[str, Any], trusted: bool = False) -> 'MetadataKGResponseListSchema':
+        return cls.from_kg_response(
+            page['data'], trusted, total=page.get('total'), from_=page.get('from') or 0, size=page.get('size')
+        )
 
 
 class MetadataQuerySchema(BaseSchema):
@@ -12,11 +12,14 @@ from fastavro import schemaless_writer
 
 from kg_integration.logger import logger
 from kg_integration.utils.kafka_manager import get_kafka_client
+from kg_integration.utils.payload_logger import get_payload_logger
 
 
 class ActivityLogService:
     async def _message_send(self, data: dict[str, Any] = None) -> dict:
-        logger.info(f'Sending socket notification: {str(data)}')
+        get_payload_logger().info(
+            'Sending socket notification %(activity_type)s', data, keys=('activity_type', 'container_code')
+        )
         loaded_schema = schema.load_schema(self.avro_schema_path)
         bio = io.BytesIO()
         try:
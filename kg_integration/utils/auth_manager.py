@@ -4,6 +4,7 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from functools import partial
 from typing import Any
 
 import httpx
@@ -11,6 +12,7 @@ from fastapi import Depends
 
 from kg_integration.config import Settings
 from kg_integration.config import get_settings
+from kg_integration.core.cache import get_cache
 from kg_integration.core.exceptions import UnhandledException
 from kg_integration.logger import logger
 
@@ -19,8 +21,24 @@ class AuthManager:
     def __init__(self, settings: Settings) -> None:
         self.url = settings.AUTH_SERVICE + '/v1/'
         self.roles = ('admin', 'collaborator', 'contributor')
+        self.cache = get_cache(
+            settings, 'project_users', settings.CACHE_PROJECT_USERS_MAXSIZE, settings.CACHE_PROJECT_USERS_TTL
+        )
 
     async def get_project_users(self, project_code: str) -> list[dict[Any, str]]:
+        """Get active users of the project with their roles, the membership is cached."""
+        return await self.cache.get_or_load(
+            f'project-users:{project_code}', partial(self.fetch_project_users, project_code)
+        )
+
+    async def invalidate_project_users(self, project_code: str | None = None) -> None:
+        """Drop cached membership of the project or of all the projects when the code is not known."""
+        if project_code is None:
+            await self.cache.invalidate()
+        else:
+            await self.cache.invalidate(f'project-users:{project_code}')
+
+    async def fetch_project_users(self, project_code: str) -> list[dict[Any, str]]:
         body = {'role_names': [f'{project_code}-{role}' for role in self.roles], 'status': 'active'}
         logger.info(f'Getting all the users and their roles from project {project_code}')
         async with httpx.AsyncClient() as client:
@@ -4,6 +4,7 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
 from typing import Any
 
 import backoff
@@ -15,19 +16,21 @@ from kg_integration.config import Settings
 from kg_integration.config import get_settings
 from kg_integration.core.exceptions import NoData
 from kg_integration.core.exceptions import RemoteServiceException
-from kg_integration.core.exceptions import UnhandledException
 from kg_integration.logger import logger
 from kg_integration.schemas.collab import CollabCreationSchema
+from kg_integration.utils.collab_poller import get_collab_status_poller
 
 
 class CollabManager:
 
     PROJECT_TO_COLLAB_ROLES_MAPPING = {'admin': 'administrator', 'collaborator': 'editor', 'contributor': 'viewer'}
+    COLLAB_ROLES = ('administrator', 'editor', 'viewer')
 
     def __init__(self, settings: Settings) -> None:
         self.url = settings.COLLAB_URL + 'v1/'
         self.jobstatus_url = settings.COLLAB_URL + 'jobstatus/'
         self.timeout = settings.EXTERNAL_SERVICE_TIMEOUT
+        self.status_poller = get_collab_status_poller(settings)
 
     @staticmethod
     def check_response_error(response: Response) -> Response:
@@ -96,17 +99,9 @@ class CollabManager:
                 logger.info(f'Collab {name} was successfully created')
                 return data
 
-    @backoff.on_exception(backoff.fibo, UnhandledException, max_tries=10, jitter=None)
     async def check_collab_creation_status(self, name: str, token: str):
-        """Check if creation of Collab has finished."""
-        headers = {'Authorization': 'Bearer ' + token}
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            logger.info(f'Checking Collab creation status for: {name}')
-            response = await client.get(self.url + f'collabs/{name}', headers=headers)
-            logger.info(f'Creation status: {response.text}')
-
-            if response.status_code != 200:
-                raise UnhandledException(f'Collab {name} creation is not finished yet: {response.text}')
+        """Wait until creation of Collab has finished."""
+        await self.status_poller.wait_until_ready(name, token)
 
     @backoff.on_exception(backoff.fibo, RemoteServiceException, max_tries=5, jitter=None)
     async def add_user_to_collab(self, collab: str, role: str, username: str, token: str) -> Response:
@@ -122,19 +117,97 @@ class CollabManager:
 
             return self.check_response_error(response)
 
-    async def sync_users_in_collab(self, collab: str, user_list: list[dict[Any, str]], token: str) -> None:
-        """Add all the users of the project to collab with corresponding roles."""
+    async def sync_users_in_collab(
+        self,
+        collab: str,
+        user_list: list[dict[Any, str]],
+        token: str,
+        delta: bool = True,
+        remove_extra: bool = False,
+    ) -> dict[str, int]:
+        """Make Collab team match the users of the project with corresponding roles.
+
+        In delta mode the current team is read first and only missing memberships and role changes are written. Team
+        members that are not in the project are removed only when remove_extra is set. Otherwise, every user is added
+        and the already existing memberships are skipped by Collaboratory.
+        """
         logger.info(f'Syncing users of {collab}')
-        for user in user_list:
-            collab_role = self.PROJECT_TO_COLLAB_ROLES_MAPPING[user.get('permission')]
-            await self.add_user_to_collab(collab=collab, role=collab_role, username=user.get('username'), token=token)
+        desired = self.desired_team(user_list)
+
+        if not desired and not remove_extra:
+            return {'added': 0, 'removed': 0}
+
+        if not delta:
+            for username, role in desired.items():
+                await self.add_user_to_collab(collab=collab, role=role, username=username, token=token)
+            return {'added': len(desired), 'removed': 0}
+
+        team = await self.get_team(collab, token)
+        additions, removals = self.compute_team_delta(team, desired, remove_extra)
+        logger.info(f'Collab {collab} needs {len(additions)} additions and {len(removals)} removals')
+
+        await self.apply_team_delta(collab, additions, removals, token)
+
+        return {'added': len(additions), 'removed': len(removals)}
+
+    async def apply_team_delta(
+        self, collab: str, additions: list[tuple[str, str]], removals: list[tuple[str, str]], token: str
+    ) -> None:
+        """Write the membership changes to the Collab team."""
+        # new roles are granted before old ones are revoked so users do not lose access during role changes
+        for username, role in additions:
+            await self.add_user_to_collab(collab=collab, role=role, username=username, token=token)
+        for username, role in removals:
+            await self.remove_user_from_collab(collab=collab, role=role, username=username, token=token)
 
+    @classmethod
+    def desired_team(cls, user_list: list[dict[Any, str]]) -> dict[str, str]:
+        """Map project users to the Collab roles they should have."""
+        return {user.get('username'): cls.PROJECT_TO_COLLAB_ROLES_MAPPING[user.get('permission')] for user in user_list}
+
+    async def get_team(self, collab: str, token: str) -> dict[str, set[str]]:
+        """Get roles of every member of the Collab team."""
+        responses = await asyncio.gather(*(self.get_user_list(collab, role, token) for role in self.COLLAB_ROLES))
+
+        team = {}
+        for role, response in zip(self.COLLAB_ROLES, responses):
+            for user in response.json().get('users', []):
+                team.setdefault(user['username'], set()).add(role)
+
+        return team
+
+    @staticmethod
+    def compute_team_delta(
+        team: dict[str, set[str]], desired: dict[str, str], remove_extra: bool = False
+    ) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+        """Calculate memberships to be added and removed to get from the current team to the desired one."""
+        additions = []
+        removals = []
+        for username, role in desired.items():
+            roles = team.get(username, set())
+            if role not in roles:
+                additions.append((username, role))
+            removals.extend((username, other_role) for other_role in sorted(roles - {role}))
+
+        if remove_extra:
+            for username, roles in team.items():
+                if username not in desired:
+                    removals.extend((username, role) for role in sorted(roles))
+
+        return additions, removals
+
+    @backoff.on_exception(backoff.fibo, RemoteServiceException, max_tries=5, jitter=None)
     async def remove_user_from_collab(self, collab: str, role: str, username: str, token: str) -> Response:
         """Remove user from the Collab."""
         headers = {'Authorization': 'Bearer ' + token}
         logger.info(f'Removing user {username} from collab {collab} with role {role}')
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.delete(self.url + f'collabs/{collab}/team/{role}/users/{username}', headers=headers)
+
+            if response.status_code == 404:
+                logger.warning(f'User {username} was already removed from the collab {collab}')
+                return response
+
             return self.check_response_error(response)
 
     async def get_user_list(self, collab: str, role: str, token: str) -> Response:
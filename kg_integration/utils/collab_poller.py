@@ -0,0 +1,136 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from contextlib import suppress
+
+import httpx
+
+from kg_integration.config import Settings
+from kg_integration.config import get_settings
+from kg_integration.core.exceptions import UnhandledException
+from kg_integration.logger import logger
+
+
+class PendingCollab:
+    """Collab waiting for its creation to finish."""
+
+    def __init__(self, name: str, token: str, interval: float, deadline: float) -> None:
+        self.name = name
+        self.token = token
+        self.interval = interval
+        self.deadline = deadline
+        self.next_poll_at = 0.0
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class CollabStatusPoller:
+    """Single scheduler polling creation status of all pending collabs.
+
+    Every collab is polled with its own interval, which doubles after each unfinished check, and no more than
+    ``batch_size`` collabs are polled at once, so the traffic to Collaboratory does not grow with the number of
+    collabs being created at the same time.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.url = settings.COLLAB_URL + 'v1/'
+        self.timeout = settings.EXTERNAL_SERVICE_TIMEOUT
+        self.min_interval = settings.COLLAB_POLL_MIN_INTERVAL
+        self.max_interval = settings.COLLAB_POLL_MAX_INTERVAL
+        self.wait_timeout = settings.COLLAB_POLL_TIMEOUT
+        self.batch_size = settings.COLLAB_POLL_BATCH_SIZE
+        self.pending: dict[str, PendingCollab] = {}
+        self.wakeup = asyncio.Event()
+        self.scheduler: asyncio.Task | None = None
+
+    async def wait_until_ready(self, name: str, token: str) -> None:
+        """Wait until creation of the collab is finished.
+
+        Waiters of the same collab share a single future.
+        """
+
+        loop = asyncio.get_running_loop()
+        collab = self.pending.get(name)
+        if collab is None or collab.future.get_loop() is not loop:
+            collab = PendingCollab(name, token, self.min_interval, loop.time() + self.wait_timeout)
+            self.pending[name] = collab
+            self.wakeup.set()
+
+        if self.scheduler is None or self.scheduler.done() or self.scheduler.get_loop() is not loop:
+            # collabs left by a scheduler of another event loop can not be resolved anymore
+            self.pending = {key: value for key, value in self.pending.items() if value.future.get_loop() is loop}
+            self.wakeup = asyncio.Event()
+            self.scheduler = asyncio.create_task(self.run())
+
+        await asyncio.shield(collab.future)
+
+    async def poll(self, client: httpx.AsyncClient, collab: PendingCollab) -> None:
+        """Check creation status of a single collab and schedule the next check if it is not finished."""
+
+        loop = asyncio.get_running_loop()
+        headers = {'Authorization': 'Bearer ' + collab.token}
+        logger.info(f'Checking Collab creation status for: {collab.name}')
+        try:
+            response = await client.get(self.url + f'collabs/{collab.name}', headers=headers)
+            logger.info(f'Creation status: {response.text}')
+            finished = response.status_code == 200
+        except httpx.HTTPError as e:
+            logger.warning(f'Could not check Collab creation status for {collab.name}: {e}')
+            finished = False
+
+        if finished:
+            self.pending.pop(collab.name, None)
+            collab.future.set_result(None)
+        elif loop.time() >= collab.deadline:
+            self.pending.pop(collab.name, None)
+            logger.error(f'Collab {collab.name} creation is not finished after {self.wait_timeout} seconds')
+            collab.future.set_exception(UnhandledException(f'Collab {collab.name} creation is not finished yet'))
+        else:
+            collab.next_poll_at = loop.time() + collab.interval
+            collab.interval = min(collab.interval * 2, self.max_interval)
+
+    async def run(self) -> None:
+        """Poll pending collabs until there are none left."""
+
+        loop = asyncio.get_running_loop()
+        try:
+            # collabs added while the client is being closed are picked up by the next round with a new client
+            while self.pending:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    while self.pending:
+                        self.wakeup.clear()
+                        now = loop.time()
+                        due = sorted(
+                            (collab for collab in self.pending.values() if collab.next_poll_at <= now),
+                            key=lambda collab: collab.next_poll_at,
+                        )[: self.batch_size]
+                        await asyncio.gather(*(self.poll(client, collab) for collab in due))
+
+                        if self.pending:
+                            next_poll_at = min(collab.next_poll_at for collab in self.pending.values())
+                            with suppress(asyncio.TimeoutError):
+                                await asyncio.wait_for(self.wakeup.wait(), max(0.0, next_poll_at - loop.time()))
+        except BaseException:
+            # waiters are failed only when the scheduler is cancelled or crashes, nobody would resolve them otherwise
+            for collab in self.pending.values():
+                if not collab.future.done():
+                    collab.future.set_exception(UnhandledException('Collab creation status poller has stopped'))
+            self.pending.clear()
+            raise
+
+
+_collab_status_poller: CollabStatusPoller | None = None
+
+
+def get_collab_status_poller(settings: Settings | None = None) -> CollabStatusPoller:
+    """Return the process wide instance of CollabStatusPoller."""
+
+    global _collab_status_poller
+
+    if _collab_status_poller is None:
+        _collab_status_poller = CollabStatusPoller(settings or get_settings())
+
+    return _collab_status_poller
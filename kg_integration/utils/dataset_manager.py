@@ -4,6 +4,7 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from functools import partial
 from typing import Any
 from uuid import UUID
 
@@ -12,7 +13,9 @@ from fastapi import Depends
 
 from kg_integration.config import Settings
 from kg_integration.config import get_settings
+from kg_integration.core.cache import get_cache
 from kg_integration.core.exceptions import NoProject
+from kg_integration.core.exceptions import NotFound
 from kg_integration.core.exceptions import UnhandledException
 from kg_integration.logger import logger
 
@@ -20,13 +23,34 @@ from kg_integration.logger import logger
 class DatasetManager:
     def __init__(self, settings: Settings) -> None:
         self.url = settings.DATASET_SERVICE + '/v1/'
+        self.cache = get_cache(settings, 'datasets', settings.CACHE_DATASETS_MAXSIZE, settings.CACHE_DATASETS_TTL)
+        self.templates_cache = get_cache(settings, 'templates', 1, settings.CACHE_TEMPLATES_TTL)
+        self.templates_refresh_after = settings.CACHE_TEMPLATES_REFRESH_AFTER
 
     async def get_project_id(self, dataset_code: str) -> str:
+        """Get id of the project the dataset belongs to, the mapping is cached."""
+        return await self.cache.get_or_load(f'project-id:{dataset_code}', partial(self.fetch_project_id, dataset_code))
+
+    async def get_dataset_code(self, dataset_id: UUID) -> str:
+        """Get code of the dataset by its id, the mapping is cached."""
+        return await self.cache.get_or_load(f'dataset-code:{dataset_id}', partial(self.fetch_dataset_code, dataset_id))
+
+    async def invalidate_dataset(self, dataset_code: str | None = None, dataset_id: UUID | None = None) -> None:
+        """Drop cached mappings of the dataset."""
+        if dataset_code is not None:
+            await self.cache.invalidate(f'project-id:{dataset_code}')
+        if dataset_id is not None:
+            await self.cache.invalidate(f'dataset-code:{dataset_id}')
+
+    async def fetch_project_id(self, dataset_code: str) -> str:
         logger.info(f'Getting project id from dataset code {dataset_code}')
         async with httpx.AsyncClient() as client:
             response = await client.get(self.url + f'datasets/{dataset_code}')
-            data = response.json()
 
+        if response.status_code == 404:
+            raise NotFound()
+
+        data = response.json()
         if response.status_code != 200:
             logger.error('Could not get dataset details from dataset service')
             raise UnhandledException('Could not get dataset details: ' + response.text)
@@ -36,7 +60,7 @@ class DatasetManager:
         else:
             return data.get('project_id')
 
-    async def get_dataset_code(self, dataset_id: UUID) -> str:
+    async def fetch_dataset_code(self, dataset_id: UUID) -> str:
         logger.info(f'Getting dataset code from dataset id {dataset_id}')
         async with httpx.AsyncClient() as client:
             response = await client.get(self.url + f'datasets/{dataset_id}')
@@ -97,7 +121,18 @@ class DatasetManager:
 
         return data
 
-    async def get_openminds_template(self) -> UUID:
+    async def get_openminds_template(self, refresh: bool = False) -> UUID:
+        """Get id of the OpenMINDS template, the id is cached and refreshed in the background.
+
+        With ``refresh`` the cached id is dropped and loaded again, e.g. when the template was rejected upstream.
+        """
+        if refresh:
+            await self.templates_cache.invalidate('openminds')
+        return await self.templates_cache.get_or_load(
+            'openminds', self.fetch_openminds_template, refresh_after=self.templates_refresh_after
+        )
+
+    async def fetch_openminds_template(self) -> UUID:
         templates = await self.get_all_schema_templates()
         for template in templates['result']:
             if template['name'] == 'Open_minds':
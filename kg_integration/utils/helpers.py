@@ -4,6 +4,9 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
 from collections.abc import Sequence
 from typing import Any
 
@@ -11,15 +14,22 @@ from fastapi import Depends
 
 from kg_integration.config import Settings
 from kg_integration.config import get_settings
+from kg_integration.core.exceptions import DatasetsUpdateFailed
 from kg_integration.core.exceptions import RemoteServiceException
-from kg_integration.core.exceptions import UnhandledException
+from kg_integration.core.exceptions import ServiceException
 from kg_integration.logger import logger
 from kg_integration.models import SpacesCRUD
 from kg_integration.models import get_spaces_crud
+from kg_integration.schemas.job import CreateSpaceStep
 from kg_integration.utils.collab_manager import CollabManager
 from kg_integration.utils.collab_manager import get_collab_manager
 from kg_integration.utils.kg_manager import KGManager
 from kg_integration.utils.kg_manager import get_kg_manager
+from kg_integration.utils.step_graph import Step
+from kg_integration.utils.step_graph import StepGraph
+from kg_integration.utils.step_graph import StepProgress
+
+DATASET_STEP_PREFIX = 'dataset:'
 
 
 class NamespaceHelper:
@@ -50,41 +60,118 @@ class HeavyTasksHelper:
         namespace: NamespaceHelper,
         collab_manager: CollabManager,
         spaces_crud: SpacesCRUD,
+        progress: StepProgress | None = None,
+        datasets_concurrency: int = 10,
     ):
         self.kg_manager = kg_manager
         self.namespace = namespace
         self.collab_manager = collab_manager
         self.spaces_crud = spaces_crud
+        self.progress = progress or StepProgress()
+        self.datasets_concurrency = datasets_concurrency
 
     async def create_space(
         self,
         space_name: str,
         users: list[dict[Any, str]],
-        external_token: str,
         service_account_token: str,
+        username: str | None = None,
     ):
-        try:
-            user_data = await self.kg_manager.get_user_details(external_token)
-            username = user_data.get('http://schema.org/alternateName')
-
-            # removing username from users list to avoid duplicated user addition
-            users = [u for u in users if u.get('username') != username]
-
-            await self.collab_manager.assure_collab_created(
-                self.namespace.for_collab(space_name), service_account_token
-            )
+        collab = self.namespace.for_collab(space_name)
+
+        async def find_user(outputs: dict[str, Any]) -> str:
+            # the creator is resolved while handling the request, spaces created without it belong to the service
+            if username:
+                return username
+            user_data = await self.kg_manager.get_user_details(service_account_token)
+            return user_data.get('http://schema.org/alternateName')
+
+        async def create_collab(outputs: dict[str, Any]) -> bool:
+            collab_jobs = await self.collab_manager.create_collab(collab, service_account_token)
+            return collab_jobs is not None
+
+        async def prepare_roles(outputs: dict[str, Any]) -> None:
+            if outputs[CreateSpaceStep.COLLAB_CREATED.value]:
+                await self.collab_manager.check_collab_creation_status(collab, service_account_token)
             await self.collab_manager.add_user_to_collab(
-                self.namespace.for_collab(space_name), 'administrator', username, service_account_token
+                collab, 'administrator', outputs[CreateSpaceStep.USER_FOUND.value], service_account_token
             )
 
-            await self.collab_manager.sync_users_in_collab(self.namespace.for_collab(space_name), users, external_token)
-            response = await self.kg_manager.create_space(self.namespace.for_kg(space_name), service_account_token)
-            if response.is_success:
-                logger.info(f'Space {space_name} was successfully created')
-            else:
-                logger.error(f'Something went wrong with space creation: {response.content}')
-        except UnhandledException as e:
+        async def sync_users(outputs: dict[str, Any]) -> None:
+            # removing username from users list to avoid duplicated user addition
+            members = [u for u in users if u.get('username') != outputs[CreateSpaceStep.USER_FOUND.value]]
+            await self.collab_manager.sync_users_in_collab(collab, members, service_account_token)
+
+        async def create_kg_space(outputs: dict[str, Any]) -> None:
+            await self.kg_manager.create_space(self.namespace.for_kg(space_name), service_account_token)
+
+        graph = StepGraph(
+            [
+                Step(CreateSpaceStep.USER_FOUND.value, find_user),
+                Step(CreateSpaceStep.COLLAB_CREATED.value, create_collab),
+                Step(
+                    CreateSpaceStep.ROLES_READY.value,
+                    prepare_roles,
+                    depends_on=[CreateSpaceStep.USER_FOUND.value, CreateSpaceStep.COLLAB_CREATED.value],
+                ),
+                Step(
+                    CreateSpaceStep.USERS_SYNCED.value,
+                    sync_users,
+                    depends_on=[CreateSpaceStep.USER_FOUND.value, CreateSpaceStep.ROLES_READY.value],
+                ),
+                Step(
+                    CreateSpaceStep.KG_SPACE_CREATED.value,
+                    create_kg_space,
+                    depends_on=[CreateSpaceStep.ROLES_READY.value],
+                ),
+            ]
+        )
+        try:
+            await graph.run(self.progress)
+            logger.info(f'Space {space_name} was successfully created')
+        except ServiceException as e:
             logger.error(f'Could not create a space: {e}')
+            raise
+
+    async def for_each_dataset(
+        self, dataset_codes: Sequence[str], action: Callable[[str], Awaitable[Any]]
+    ) -> dict[str, Any]:
+        """Run the action for every dataset with bounded concurrency.
+
+        Failure of one dataset does not affect the others. Collab calls are retried by CollabManager, every dataset
+        that is done is recorded as a step of the job, so when the job is retried the action runs only for datasets
+        that failed before. The actions have to be idempotent.
+        """
+
+        semaphore = asyncio.Semaphore(self.datasets_concurrency)
+        lock = asyncio.Lock()
+
+        async def run(dataset_code: str) -> str | None:
+            step = DATASET_STEP_PREFIX + dataset_code
+            if step in self.progress.completed:
+                return None
+
+            async with semaphore:
+                try:
+                    await action(dataset_code)
+                except RemoteServiceException as e:
+                    logger.error(f'Could not update user in dataset {dataset_code}: {e.details}')
+                    return e.details
+
+            # progress is persisted one dataset at a time
+            async with lock:
+                await self.progress.complete(step, None)
+            return None
+
+        errors = await asyncio.gather(*(run(dataset_code) for dataset_code in dataset_codes))
+        failed = {dataset_code: error for dataset_code, error in zip(dataset_codes, errors) if error is not None}
+        succeeded = [dataset_code for dataset_code in dataset_codes if dataset_code not in failed]
+        logger.info(f'User was updated in {len(succeeded)} datasets, failed in {len(failed)}')
+
+        if failed:
+            raise DatasetsUpdateFailed(succeeded, failed)
+
+        return {'succeeded': succeeded, 'failed': failed}
 
     async def update_user_task(
         self,
@@ -93,17 +180,16 @@ class HeavyTasksHelper:
         new_role: str,
         dataset_codes: Sequence[str],
         service_account_token: str,
-    ):
-        try:
-            for dataset_code in dataset_codes:
-                await self.collab_manager.remove_user_from_collab(
-                    self.namespace.for_collab(dataset_code), current_role, username, service_account_token
-                )
-                await self.collab_manager.add_user_to_collab(
-                    self.namespace.for_collab(dataset_code), new_role, username, service_account_token
-                )
-        except RemoteServiceException as e:
-            logger.error(f'Could not update user: {e}')
+    ) -> dict[str, Any]:
+        async def update_user(dataset_code: str) -> None:
+            await self.collab_manager.remove_user_from_collab(
+                self.namespace.for_collab(dataset_code), current_role, username, service_account_token
+            )
+            await self.collab_manager.add_user_to_collab(
+                self.namespace.for_collab(dataset_code), new_role, username, service_account_token
+            )
+
+        return await self.for_each_dataset(dataset_codes, update_user)
 
     async def remove_user_task(
         self,
@@ -111,14 +197,13 @@ class HeavyTasksHelper:
         role: str,
         dataset_codes: Sequence[str],
         service_account_token: str,
-    ):
-        try:
-            for dataset_code in dataset_codes:
-                await self.collab_manager.remove_user_from_collab(
-                    self.namespace.for_collab(dataset_code), role, username, service_account_token
-                )
-        except RemoteServiceException as e:
-            logger.error(f'Could not update user: {e}')
+    ) -> dict[str, Any]:
+        async def remove_user(dataset_code: str) -> None:
+            await self.collab_manager.remove_user_from_collab(
+                self.namespace.for_collab(dataset_code), role, username, service_account_token
+            )
+
+        return await self.for_each_dataset(dataset_codes, remove_user)
 
     async def add_user_task(
         self,
@@ -126,14 +211,13 @@ class HeavyTasksHelper:
         role: str,
         dataset_codes: Sequence[str],
         service_account_token: str,
-    ):
-        try:
-            for dataset_code in dataset_codes:
-                await self.collab_manager.add_user_to_collab(
-                    self.namespace.for_collab(dataset_code), role, username, service_account_token
-                )
-        except RemoteServiceException as e:
-            logger.error(f'Could not update user: {e}')
+    ) -> dict[str, Any]:
+        async def add_user(dataset_code: str) -> None:
+            await self.collab_manager.add_user_to_collab(
+                self.namespace.for_collab(dataset_code), role, username, service_account_token
+            )
+
+        return await self.for_each_dataset(dataset_codes, add_user)
 
 
 async def get_namespace_helper(settings: Settings = Depends(get_settings)) -> NamespaceHelper:
@@ -146,6 +230,13 @@ async def get_heavy_tasks_helper(
     namespace: NamespaceHelper = Depends(get_namespace_helper),
     collab_manager: CollabManager = Depends(get_collab_manager),
     spaces_crud: SpacesCRUD = Depends(get_spaces_crud),
+    settings: Settings = Depends(get_settings),
 ) -> HeavyTasksHelper:
     """Create a FastAPI callable dependency for SpaceNameHelper."""
-    return HeavyTasksHelper(kg_manager, namespace, collab_manager, spaces_crud)
+    return HeavyTasksHelper(
+        kg_manager,
+        namespace,
+        collab_manager,
+        spaces_crud,
+        datasets_concurrency=settings.DATASETS_CONCURRENCY,
+    )
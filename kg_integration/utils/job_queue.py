@@ -0,0 +1,218 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from contextlib import suppress
+from functools import partial
+from typing import Any
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kg_integration.config import Settings
+from kg_integration.config import get_settings
+from kg_integration.core.exceptions import DatasetsUpdateFailed
+from kg_integration.core.exceptions import NotFound
+from kg_integration.logger import logger
+from kg_integration.models import Jobs
+from kg_integration.models import JobsCRUD
+from kg_integration.models import SpacesCRUD
+from kg_integration.models import get_jobs_crud
+from kg_integration.utils.collab_manager import CollabManager
+from kg_integration.utils.helpers import HeavyTasksHelper
+from kg_integration.utils.helpers import NamespaceHelper
+from kg_integration.utils.keycloak_manager import KeycloakManager
+from kg_integration.utils.kg_manager import KGManager
+from kg_integration.utils.step_graph import StepProgress
+
+HEAVY_TASKS = ('create_space', 'add_user_task', 'remove_user_task', 'update_user_task')
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+class JobQueue:
+    """Publisher of heavy tasks to the durable job queue."""
+
+    def __init__(self, jobs_crud: JobsCRUD, settings: Settings) -> None:
+        self.jobs_crud = jobs_crud
+        self.max_attempts = settings.JOBS_MAX_ATTEMPTS
+
+    async def enqueue(self, task: str, **payload: Any) -> Jobs:
+        """Store a job for one of the HeavyTasksHelper methods to be picked up by a worker."""
+
+        if task not in HEAVY_TASKS:
+            raise ValueError(f'Unknown task {task}')
+
+        job = await self.jobs_crud.enqueue(task, payload, self.max_attempts)
+        logger.info(f'Job {job.id} for task {task} was queued')
+
+        return job
+
+
+class JobWorker:
+    """Consumer that claims queued jobs and runs them through HeavyTasksHelper."""
+
+    def __init__(self, settings: Settings, session_factory: SessionFactory) -> None:
+        self.settings = settings
+        self.session_factory = session_factory
+        self.visibility_timeout = settings.JOBS_VISIBILITY_TIMEOUT
+        self.retry_base_delay = settings.JOBS_RETRY_BASE_DELAY
+        self.retry_max_delay = settings.JOBS_RETRY_MAX_DELAY
+        self.poll_interval = settings.JOBS_POLL_INTERVAL
+        self.heartbeat_interval = max(settings.JOBS_VISIBILITY_TIMEOUT / 3, 1)
+        self.maintenance_interval = settings.JOBS_MAINTENANCE_INTERVAL
+        self.maintained_at: float | None = None
+
+    def retry_delay(self, attempts: int) -> float:
+        """Calculate exponential backoff with jitter for the next attempt."""
+
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def record_step(self, pk: UUID, step: str, output: Any) -> None:
+        """Persist the progress of the job right away so it is visible while the job is still running."""
+
+        async with self.session_factory() as session:
+            await JobsCRUD(session).record_step(pk, step, output)
+            await session.commit()
+
+    async def run_task(self, job: Jobs, session: AsyncSession) -> Any:
+        """Run the task of the job with fresh upstream credentials."""
+
+        helper = HeavyTasksHelper(
+            KGManager(self.settings),
+            NamespaceHelper(self.settings),
+            CollabManager(self.settings),
+            SpacesCRUD(session),
+            StepProgress(
+                {name: state['output'] for name, state in job.steps.items()}, partial(self.record_step, job.id)
+            ),
+            datasets_concurrency=self.settings.DATASETS_CONCURRENCY,
+        )
+        service_account_token = await KeycloakManager(self.settings).get_service_account_token()
+        task = getattr(helper, job.task)
+
+        return await task(service_account_token=service_account_token, **job.payload)
+
+    async def heartbeat(self, job: Jobs, attempt: int) -> None:
+        """Renew the lease of the running job, so it is not claimed by another worker while it takes long."""
+
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            async with self.session_factory() as session:
+                extended = await JobsCRUD(session).extend_lease(job.id, attempt, self.visibility_timeout)
+                await session.commit()
+            if not extended:
+                logger.warning(f'Job {job.id} lost its lease, the attempt {attempt} will not be recorded')
+                return
+
+    async def finish(self, job: Jobs, attempt: int, outcome: Callable[[JobsCRUD], Awaitable[None]]) -> None:
+        """Record the outcome of the attempt unless the job was claimed by another worker in the meantime."""
+
+        try:
+            async with self.session_factory() as session:
+                await outcome(JobsCRUD(session))
+                await session.commit()
+        except NotFound:
+            logger.warning(f'Job {job.id} is no longer held by attempt {attempt}, its outcome is dropped')
+
+    async def process(self, job: Jobs) -> None:
+        """Run a claimed job and record the outcome."""
+
+        logger.info(f'Running job {job.id} for task {job.task}, attempt {job.attempts} of {job.max_attempts}')
+        attempt = job.attempts
+        heartbeat = asyncio.create_task(self.heartbeat(job, attempt))
+        try:
+            async with self.session_factory() as session:
+                result = await self.run_task(job, session)
+                await session.commit()
+        except asyncio.CancelledError:
+            logger.warning(f'Job {job.id} was interrupted and returned to the queue')
+            await self.finish(job, attempt, lambda jobs_crud: jobs_crud.release(job.id, attempt))
+            raise
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            partial_result = e.result if isinstance(e, DatasetsUpdateFailed) else None
+            if attempt >= job.max_attempts:
+                logger.error(f'Job {job.id} failed on the last attempt and was dead-lettered: {error}')
+                await self.finish(
+                    job, attempt, lambda jobs_crud: jobs_crud.dead_letter(job.id, error, attempt, partial_result)
+                )
+            else:
+                delay = self.retry_delay(attempt)
+                logger.warning(f'Job {job.id} failed, retrying in {delay:.1f} seconds: {error}')
+                await self.finish(
+                    job, attempt, lambda jobs_crud: jobs_crud.reschedule(job.id, error, delay, attempt, partial_result)
+                )
+            return
+        finally:
+            heartbeat.cancel()
+            with suppress(asyncio.CancelledError):
+                await heartbeat
+
+        await self.finish(job, attempt, lambda jobs_crud: jobs_crud.mark_succeeded(job.id, result, attempt))
+        logger.info(f'Job {job.id} for task {job.task} has succeeded')
+
+    async def maintain(self, jobs_crud: JobsCRUD) -> None:
+        """Dead-letter abandoned jobs, at most once per maintenance interval of this worker."""
+
+        now = time.monotonic()
+        if self.maintained_at is not None and now - self.maintained_at < self.maintenance_interval:
+            return
+
+        self.maintained_at = now
+        await jobs_crud.dead_letter_abandoned()
+
+    async def run_once(self) -> bool:
+        """Claim and process a single job, return False when there was nothing to do."""
+
+        async with self.session_factory() as session:
+            jobs_crud = JobsCRUD(session)
+            await self.maintain(jobs_crud)
+            job = await jobs_crud.claim(self.visibility_timeout)
+            await session.commit()
+
+        if job is None:
+            return False
+
+        await self.process(job)
+        return True
+
+    async def run_pending(self) -> int:
+        """Process jobs until the queue has nothing due and return how many were processed."""
+
+        processed = 0
+        while await self.run_once():
+            processed += 1
+
+        return processed
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Keep consuming jobs until the stop event is set."""
+
+        while not stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception('Could not process the job queue')
+                processed = False
+
+            if not processed:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+
+
+async def get_job_queue(
+    jobs_crud: JobsCRUD = Depends(get_jobs_crud), settings: Settings = Depends(get_settings)
+) -> JobQueue:
+    """Create a FastAPI callable dependency for JobQueue."""
+    return JobQueue(jobs_crud, settings)
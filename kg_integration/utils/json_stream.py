@@ -0,0 +1,165 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import json
+import re
+from collections.abc import Iterator
+from typing import Any
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ArrayItemsParser:
+    """Incremental parser of a JSON object yielding items of the array stored under the given top level key.
+
+    Text is fed in chunks of any size and only the unparsed tail of the document is kept, so the memory does not depend
+    on the number of items. Values of other keys are skipped, ``found`` tells if the array was present and not null.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.state = 'start'
+        self.current_key: str | None = None
+        self.value: Any = None
+        self.ready = False
+        self.found = False
+
+    def skip_whitespace(self) -> None:
+        self.position = WHITESPACE.match(self.buffer, self.position).end()
+
+    def expect(self, *tokens: str) -> str | None:
+        """Consume one of the tokens, return None when more text is needed."""
+
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            return None
+
+        token = self.buffer[self.position]
+        if token not in tokens:
+            raise json.JSONDecodeError(f'Expecting one of {", ".join(tokens)}', self.buffer, self.position)
+
+        self.position += 1
+        return token
+
+    def decode(self, final: bool) -> bool:
+        """Decode the next value into ``value``, return False when more text is needed."""
+
+        self.skip_whitespace()
+        try:
+            self.value, end = self.decoder.raw_decode(self.buffer, self.position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False
+
+        # a number at the end of the buffer may continue in the next chunk
+        if end == len(self.buffer) and not final:
+            return False
+
+        self.position = end
+        return True
+
+    def parse_start(self, final: bool) -> bool:
+        if self.expect('{') is None:
+            return False
+        self.state = 'key'
+        return True
+
+    def parse_key(self, final: bool) -> bool:
+        token = self.expect('"', '}')
+        if token is None:
+            return False
+        if token == '}':
+            self.state = 'end'
+            return True
+
+        self.position -= 1
+        if not self.decode(final):
+            return False
+        self.current_key = self.value
+        self.state = 'colon'
+        return True
+
+    def parse_colon(self, final: bool) -> bool:
+        if self.expect(':') is None:
+            return False
+        self.state = 'items' if self.current_key == self.key else 'value'
+        return True
+
+    def parse_value(self, final: bool) -> bool:
+        if not self.decode(final):
+            return False
+        self.state = 'next_key'
+        return True
+
+    def parse_next_key(self, final: bool) -> bool:
+        token = self.expect(',', '}')
+        if token is None:
+            return False
+        self.state = 'key' if token == ',' else 'end'
+        return True
+
+    def parse_items(self, final: bool) -> bool:
+        self.skip_whitespace()
+        if self.buffer.startswith('n', self.position):
+            if not self.decode(final):
+                return False
+            if self.value is not None:
+                raise json.JSONDecodeError(f'Expecting array under {self.key}', self.buffer, self.position)
+            self.state = 'next_key'
+            return True
+
+        if self.expect('[') is None:
+            return False
+        self.found = True
+        self.state = 'item'
+        return True
+
+    def parse_item(self, final: bool) -> bool:
+        self.skip_whitespace()
+        if self.buffer.startswith(']', self.position):
+            self.position += 1
+            self.state = 'next_key'
+            return True
+
+        if not self.decode(final):
+            return False
+        self.ready = True
+        self.state = 'next_item'
+        return True
+
+    def parse_next_item(self, final: bool) -> bool:
+        token = self.expect(',', ']')
+        if token is None:
+            return False
+        self.state = 'item' if token == ',' else 'next_key'
+        return True
+
+    def parse(self, final: bool) -> Iterator[Any]:
+        while self.state != 'end' and getattr(self, f'parse_{self.state}')(final):
+            if self.ready:
+                self.ready = False
+                yield self.value
+
+    def feed(self, text: str) -> Iterator[Any]:
+        """Parse the chunk and yield completed items of the array."""
+
+        self.buffer = self.buffer[self.position :] + text
+        self.position = 0
+        yield from self.parse(final=False)
+
+    def close(self) -> Iterator[Any]:
+        """Parse the rest of the document and check that it is complete."""
+
+        yield from self.parse(final=True)
+        self.skip_whitespace()
+        if self.state != 'end':
+            raise json.JSONDecodeError('Unexpected end of document', self.buffer, self.position)
+        if self.position < len(self.buffer):
+            raise json.JSONDecodeError('Extra data', self.buffer, self.position)
@@ -0,0 +1,85 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from typing import Any
+
+CONTEXT = {
+    'kg': 'https://kg.ebrains.eu/api/instances/',
+    'kgmeta': 'https://core.kg.ebrains.eu/vocab/meta/',
+    'omv': 'https://openminds.ebrains.eu/vocab/',
+    'om': 'https://openminds.ebrains.eu/',
+    'schema': 'http://schema.org/',
+}
+
+# keywords with IRIs as values rather than keys
+IRI_KEYWORDS = ('@id', '@type')
+
+# the longest IRI has to be tried first, e.g. openMINDS vocabulary before other openMINDS IRIs
+_PREFIXES = sorted(((iri, prefix) for prefix, iri in CONTEXT.items()), key=lambda item: len(item[0]), reverse=True)
+
+
+def compact_iri(iri: Any) -> Any:
+    if not isinstance(iri, str):
+        return iri
+
+    for base, prefix in _PREFIXES:
+        if iri.startswith(base):
+            return f'{prefix}:{iri[len(base):]}'
+    return iri
+
+
+def compact(value: Any) -> Any:
+    """Replace IRIs in keys, identifiers and types with prefixed names defined in CONTEXT, nested objects included."""
+
+    if isinstance(value, list):
+        return [compact(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    compacted = {}
+    for key, item in value.items():
+        if key in IRI_KEYWORDS:
+            compacted[key] = [compact_iri(type_) for type_ in item] if isinstance(item, list) else compact_iri(item)
+        else:
+            compacted[compact_iri(key)] = compact(item)
+    return compacted
+
+
+def _expand_iri(name: Any) -> Any:
+    if not isinstance(name, str):
+        return name
+
+    prefix, separator, suffix = name.partition(':')
+    if separator and not suffix.startswith('//') and prefix in CONTEXT:
+        return CONTEXT[prefix] + suffix
+    return name
+
+
+def _expand(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    expanded = {}
+    for key, item in value.items():
+        if key in IRI_KEYWORDS:
+            expanded[key] = [_expand_iri(iri) for iri in item] if isinstance(item, list) else _expand_iri(item)
+        else:
+            expanded[_expand_iri(key)] = _expand(item)
+    return expanded
+
+
+def expand(data: dict[str, Any]) -> dict[str, Any]:
+    """Reverse ``compact`` for documents with the ``@context`` it adds, any other document is returned as is.
+
+    Documents with their own context, e.g. with ``@vocab`` or term definitions, are left for KG to interpret.
+    """
+
+    if data.get('@context') != CONTEXT:
+        return data
+
+    return _expand({key: value for key, value in data.items() if key != '@context'})
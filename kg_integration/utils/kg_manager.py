@@ -4,6 +4,9 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
+from collections.abc import AsyncIterator
+from functools import partial
 from typing import Any
 from uuid import UUID
 
@@ -14,10 +17,16 @@ from httpx import Response
 
 from kg_integration.config import Settings
 from kg_integration.config import get_settings
+from kg_integration.core.cache import get_cache
 from kg_integration.core.exceptions import NoData
 from kg_integration.core.exceptions import RemoteServiceException
 from kg_integration.core.exceptions import UnhandledException
 from kg_integration.logger import logger
+from kg_integration.utils.json_stream import ArrayItemsParser
+from kg_integration.utils.jsonld import expand
+from kg_integration.utils.payload_logger import PayloadLogger
+from kg_integration.utils.tokens import get_token_lifetime
+from kg_integration.utils.tokens import get_token_subject
 
 
 class KGManager:
@@ -26,6 +35,14 @@ class KGManager:
     def __init__(self, settings: Settings) -> None:
         self.url = settings.KG_URL + 'v3/'
         self.timeout = settings.EXTERNAL_SERVICE_TIMEOUT
+        self.page_size = settings.KG_PAGE_SIZE
+        self.payload_logger = PayloadLogger(settings)
+        self.spaces_cache = get_cache(settings, 'spaces', settings.CACHE_SPACES_MAXSIZE, settings.CACHE_SPACES_TTL)
+        self.spaces_refresh_after = settings.CACHE_SPACES_REFRESH_AFTER
+        self.users_cache = get_cache(settings, 'users', settings.CACHE_USERS_MAXSIZE, settings.CACHE_USERS_TTL)
+        self.instances_cache = get_cache(
+            settings, 'instances', settings.CACHE_INSTANCES_MAXSIZE, settings.CACHE_INSTANCES_TTL
+        )
 
     @staticmethod
     def check_response_error(response: Response) -> Response:
@@ -46,6 +63,8 @@ class KGManager:
 
     @staticmethod
     def clean_data(data: dict[Any, Any]) -> dict[Any, Any]:
+        """Expand compacted keys and drop KG metadata, which can not be uploaded."""
+        data = expand(data)
         return {
             k: v
             for k, v in data.items()
@@ -53,7 +72,21 @@ class KGManager:
         }
 
     async def get_spaces(self, token: str) -> list[dict[Any, str]]:
-        """Get all available spaces for user."""
+        """Get all available spaces for user.
+
+        Spaces are cached per EBRAINS user, an older list is served while it is being reloaded in the background.
+        """
+        return await self.spaces_cache.get_or_load(
+            f'spaces:{get_token_subject(token)}',
+            partial(self.fetch_spaces, token),
+            refresh_after=self.spaces_refresh_after,
+        )
+
+    async def invalidate_spaces(self) -> None:
+        """Drop cached spaces of all users."""
+        await self.spaces_cache.invalidate()
+
+    async def fetch_spaces(self, token: str) -> list[dict[Any, str]]:
         headers = {'Authorization': 'Bearer ' + token}
         logger.info('Getting all the spaces')
         async with httpx.AsyncClient(timeout=self.timeout) as client:
@@ -79,19 +112,122 @@ class KGManager:
                 logger.error(f'Could not create a space {name}')
                 raise UnhandledException('Could not create a space: ' + response.text)
 
-            return response
+        await self.invalidate_spaces()
+        return response
+
+    @staticmethod
+    def get_metadata_params(
+        space: str, stage: str, _type: str, from_: int | None = None, size: int | None = None
+    ) -> dict[str, Any]:
+        params = {'space': space, 'stage': stage, 'type': _type}
+        if from_ is not None:
+            params['from'] = from_
+        if size is not None:
+            params['size'] = size
+        return params
 
     async def get_metadata(self, space: str, stage: str, _type: str, token: str) -> list[dict[Any, str]]:
-        """Get metadata for given parameters."""
+        """Get metadata for given parameters, KG is asked for one page at a time."""
+        return [instance async for instance in self.iter_metadata(space, stage, _type, token)]
+
+    async def get_metadata_page(
+        self, space: str, stage: str, _type: str, token: str, from_: int | None = None, size: int | None = None
+    ) -> dict[str, Any]:
+        """Get a page of metadata for given parameters along with the total number of instances.
+
+        Without ``from_`` and ``size`` KG returns all the instances in a single page.
+        """
         headers = {'Authorization': 'Bearer ' + token}
-        params = {'space': space, 'stage': stage, 'type': _type}
+        params = self.get_metadata_params(space, stage, _type, from_, size)
         logger.info(f'Getting metadata from space {space}')
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.get(self.url + 'instances', params=params, headers=headers)
-            return self.check_response_data(response)
+            self.check_response_error(response)
+
+        page = response.json()
+        if page.get('data') is None:
+            raise NoData()
+
+        return page
+
+    async def iter_metadata(
+        self, space: str, stage: str, _type: str, token: str, page_size: int | None = None, from_: int = 0
+    ) -> AsyncIterator[dict[Any, str]]:
+        """Yield metadata for given parameters page by page, the next page is fetched while the current one is used."""
+        size = page_size or self.page_size
+        next_page = asyncio.create_task(self.get_metadata_page(space, stage, _type, token, from_, size))
+        try:
+            while next_page is not None:
+                page = await next_page
+                next_page = None
+                from_ += len(page['data'])
+                total = page.get('total')
+                has_more = from_ < total if total is not None else len(page['data']) == size
+                if page['data'] and has_more:
+                    next_page = asyncio.create_task(self.get_metadata_page(space, stage, _type, token, from_, size))
 
-    async def get_metadata_details(self, kg_instance_id: UUID, stage: str, token: str) -> dict[Any, str]:
-        """Get metadata for given ID."""
+                for instance in page['data']:
+                    yield instance
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def stream_metadata(
+        self, space: str, stage: str, _type: str, token: str, from_: int | None = None, size: int | None = None
+    ) -> AsyncIterator[dict[Any, str]]:
+        """Yield metadata for given parameters while the KG response is being received.
+
+        The response is parsed incrementally, so only the instance being yielded is kept in memory.
+        """
+        headers = {'Authorization': 'Bearer ' + token}
+        params = self.get_metadata_params(space, stage, _type, from_, size)
+        logger.info(f'Streaming metadata from space {space}')
+        parser = ArrayItemsParser('data')
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with client.stream('GET', self.url + 'instances', params=params, headers=headers) as response:
+                if response.is_error:
+                    await response.aread()
+                    self.check_response_error(response)
+
+                async for chunk in response.aiter_text():
+                    for instance in parser.feed(chunk):
+                        yield instance
+
+                for instance in parser.close():
+                    yield instance
+
+        if not parser.found:
+            raise NoData()
+
+    @staticmethod
+    def get_etag(data: dict[Any, Any], variant: str | None = None) -> str | None:
+        """Build an entity tag of the instance from its KG revision, each representation has its own variant.
+
+        The tag is weak, the representation may be sent compressed or not, and the tag has to be the same for both.
+        """
+
+        revision = data.get('https://core.kg.ebrains.eu/vocab/meta/revision')
+        if not revision:
+            return None
+
+        return f'W/"{revision}"' if variant is None else f'W/"{revision}-{variant}"'
+
+    async def get_metadata_details(
+        self, kg_instance_id: UUID, stage: str, token: str, cached: bool = False
+    ) -> dict[Any, str]:
+        """Get metadata for given ID.
+
+        With ``cached`` the instance may be served from a short-lived cache of the token owner.
+        """
+        if cached:
+            return await self.instances_cache.get_or_load(
+                f'instance:{get_token_subject(token)}:{stage}:{kg_instance_id}',
+                partial(self.fetch_metadata_details, kg_instance_id, stage, token),
+            )
+
+        return await self.fetch_metadata_details(kg_instance_id, stage, token)
+
+    async def fetch_metadata_details(self, kg_instance_id: UUID, stage: str, token: str) -> dict[Any, str]:
         headers = {'Authorization': 'Bearer ' + token}
         params = {'stage': stage}
         logger.info(f'Getting details of metadata {kg_instance_id}')
@@ -114,7 +250,7 @@ class KGManager:
         headers = {'Authorization': 'Bearer ' + token, 'Content-Type': 'application/json'}
         params = {'space': space}
         data = self.clean_data(data)
-        logger.info(f'Uploading metadata {data} to space {space}')
+        self.payload_logger.info('Uploading metadata of %(size)s bytes to space %(space)s', data, space=space)
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.post(self.url + 'instances', params=params, json=data, headers=headers)
             return self.check_response_data(response)
@@ -123,10 +259,15 @@ class KGManager:
         """Update given instance in the KG."""
         headers = {'Authorization': 'Bearer ' + token, 'Content-Type': 'application/json'}
         data = self.clean_data(data)
-        logger.info(f'Updating instance {instance_id} with metadata {data}')
+        self.payload_logger.info(
+            'Updating instance %(instance_id)s with metadata of %(size)s bytes', data, instance_id=str(instance_id)
+        )
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.put(self.url + f'instances/{instance_id}', json=data, headers=headers)
-            return self.check_response_data(response)
+            data = self.check_response_data(response)
+
+        await self.instances_cache.invalidate()
+        return data
 
     async def delete_metadata(self, metadata_id: UUID, token: str) -> Response:
         """Delete metadata with given ID."""
@@ -134,10 +275,18 @@ class KGManager:
         logger.info(f'Deleting metadata {metadata_id}')
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.delete(self.url + f'instances/{metadata_id}', headers=headers)
-            return self.check_response_error(response)
+            response = self.check_response_error(response)
+
+        await self.instances_cache.invalidate()
+        return response
 
     async def get_user_details(self, token: str) -> dict[Any, str]:
-        """Get information about given user's token."""
+        """Get information about given user's token, it is cached by token subject until the token expires."""
+        return await self.users_cache.get_or_load(
+            f'user:{get_token_subject(token)}', partial(self.fetch_user_details, token), ttl=get_token_lifetime(token)
+        )
+
+    async def fetch_user_details(self, token: str) -> dict[Any, str]:
         headers = {'Authorization': 'Bearer ' + token}
         logger.info('Getting user information')
         async with httpx.AsyncClient(timeout=self.timeout) as client:
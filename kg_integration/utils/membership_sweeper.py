@@ -0,0 +1,172 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from contextlib import suppress
+
+from kg_integration.config import Settings
+from kg_integration.core.exceptions import NoProject
+from kg_integration.core.exceptions import NotFound
+from kg_integration.core.metrics import MEMBERSHIP_DRIFT_FIXED
+from kg_integration.core.metrics import MEMBERSHIP_DRIFT_FOUND
+from kg_integration.core.metrics import SWEPT_SPACES
+from kg_integration.logger import logger
+from kg_integration.models import Spaces
+from kg_integration.models import SweepsCRUD
+from kg_integration.utils.auth_manager import AuthManager
+from kg_integration.utils.collab_manager import CollabManager
+from kg_integration.utils.dataset_manager import DatasetManager
+from kg_integration.utils.helpers import NamespaceHelper
+from kg_integration.utils.job_queue import SessionFactory
+from kg_integration.utils.keycloak_manager import KeycloakManager
+from kg_integration.utils.project_manager import ProjectManager
+
+
+class CallBudget:
+    """Token bucket limiting the number of upstream calls per minute of all the workers together.
+
+    The state of the bucket is kept in the sweep row, so the limit holds regardless of how many workers run the sweep.
+    """
+
+    def __init__(self, name: str, calls_per_minute: int, session_factory: SessionFactory) -> None:
+        self.name = name
+        self.capacity = calls_per_minute
+        self.rate = calls_per_minute / 60
+        self.session_factory = session_factory
+
+    async def acquire(self, calls: int = 1) -> None:
+        """Wait until the budget allows making the given number of calls."""
+
+        async with self.session_factory() as session:
+            tokens = await SweepsCRUD(session).take_budget(self.name, calls, self.capacity, self.rate)
+            await session.commit()
+
+        if tokens < 0:
+            await asyncio.sleep(-tokens / self.rate)
+
+
+class MembershipSweeper:
+    """Walk through all the registered spaces and bring Collab teams in line with project roles.
+
+    Spaces are claimed in batches through a cursor stored in the database, so an interrupted sweep continues where it
+    stopped and several workers can share one sweep. The cursor moves only after a batch is processed, an interrupted
+    batch is processed again after SWEEPER_BATCH_TIMEOUT.
+    """
+
+    NAME = 'membership'
+
+    def __init__(self, settings: Settings, session_factory: SessionFactory) -> None:
+        self.session_factory = session_factory
+        self.batch_size = settings.SWEEPER_BATCH_SIZE
+        self.batch_timeout = settings.SWEEPER_BATCH_TIMEOUT
+        self.concurrency = settings.SWEEPER_CONCURRENCY
+        self.interval = settings.SWEEPER_INTERVAL
+        self.poll_interval = settings.SWEEPER_POLL_INTERVAL
+        self.remove_extra = settings.SWEEPER_REMOVE_EXTRA
+        self.budget = CallBudget(self.NAME, settings.SWEEPER_CALLS_PER_MINUTE, session_factory)
+        self.namespace = NamespaceHelper(settings)
+        self.auth_manager = AuthManager(settings)
+        self.collab_manager = CollabManager(settings)
+        self.dataset_manager = DatasetManager(settings)
+        self.project_manager = ProjectManager(settings)
+        self.keycloak_manager = KeycloakManager(settings)
+
+    async def resolve_project_code(self, space_name: str) -> str:
+        """Find the project whose users should have access to the space.
+
+        Only a space the dataset service explicitly does not know as a dataset is a project space. Other errors are
+        raised, so the space is skipped rather than synced against the wrong project.
+        """
+
+        await self.budget.acquire()
+        try:
+            project_id = await self.dataset_manager.get_project_id(space_name)
+        except (NotFound, NoProject):
+            return space_name
+
+        await self.budget.acquire()
+        return await self.project_manager.get_project_code(project_id)
+
+    async def reconcile(self, space: Spaces, token: str) -> str:
+        """Compare the Collab team of the space with project roles, fix the drift and return the outcome."""
+
+        project_code = await self.resolve_project_code(space.name)
+        await self.budget.acquire()
+        users = await self.auth_manager.get_project_users(project_code)
+        if not users:
+            logger.info(f'Project {project_code} of space {space.name} has no users, skipping')
+            return 'skipped'
+
+        collab = self.namespace.for_collab(space.name)
+        await self.budget.acquire(len(self.collab_manager.COLLAB_ROLES))
+        team = await self.collab_manager.get_team(collab, token)
+
+        # the creator is made an administrator of the space regardless of the project role
+        desired = self.collab_manager.desired_team(users)
+        desired.pop(space.creator, None)
+        team.pop(space.creator, None)
+
+        additions, removals = self.collab_manager.compute_team_delta(team, desired, self.remove_extra)
+        if not additions and not removals:
+            return 'in_sync'
+
+        logger.info(f'Space {space.name} needs {len(additions)} additions and {len(removals)} removals')
+        MEMBERSHIP_DRIFT_FOUND.labels(change='add').inc(len(additions))
+        MEMBERSHIP_DRIFT_FOUND.labels(change='remove').inc(len(removals))
+
+        await self.budget.acquire(len(additions) + len(removals))
+        await self.collab_manager.apply_team_delta(collab, additions, removals, token)
+        MEMBERSHIP_DRIFT_FIXED.labels(change='add').inc(len(additions))
+        MEMBERSHIP_DRIFT_FIXED.labels(change='remove').inc(len(removals))
+
+        return 'fixed'
+
+    async def sweep_batch(self) -> int:
+        """Reconcile the next batch of spaces and return how many spaces were processed."""
+
+        async with self.session_factory() as session:
+            spaces = await SweepsCRUD(session).claim_batch(
+                self.NAME, self.batch_size, self.interval, self.batch_timeout
+            )
+            await session.commit()
+
+        if not spaces:
+            return 0
+
+        await self.budget.acquire()
+        token = await self.keycloak_manager.get_service_account_token()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(space: Spaces) -> None:
+            async with semaphore:
+                try:
+                    outcome = await self.reconcile(space, token)
+                except Exception as e:
+                    logger.error(f'Could not reconcile membership of space {space.name}: {e}')
+                    outcome = 'failed'
+            SWEPT_SPACES.labels(outcome=outcome).inc()
+
+        await asyncio.gather(*(run(space) for space in spaces))
+        async with self.session_factory() as session:
+            await SweepsCRUD(session).complete_batch(self.NAME, spaces[-1].name)
+            await session.commit()
+        logger.info(f'Membership of {len(spaces)} spaces was reconciled')
+
+        return len(spaces)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Keep sweeping until the stop event is set."""
+
+        while not stop.is_set():
+            try:
+                swept = await self.sweep_batch()
+            except Exception:
+                logger.exception('Could not run membership sweep')
+                swept = 0
+
+            if not swept:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
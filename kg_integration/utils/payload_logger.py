@@ -0,0 +1,101 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import hashlib
+import logging
+import random
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any
+
+import orjson
+
+from kg_integration.config import Settings
+from kg_integration.config import get_settings
+from kg_integration.logger import logger
+
+JSONLD_KEYS = ('@id', '@type')
+
+
+def serialize_payload(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS)
+
+
+def summarize_payload(payload: Any, body: bytes, keys: Iterable[str] = JSONLD_KEYS) -> dict[str, Any]:
+    """Describe the payload by its size and hash of the serialized JSON and a few of its top level fields."""
+
+    summary = {'size': len(body), 'hash': hashlib.blake2b(body, digest_size=16).hexdigest()}
+    if isinstance(payload, dict):
+        summary.update({key: payload[key] for key in keys if key in payload})
+    return summary
+
+
+class PayloadDetails(Mapping[str, Any]):
+    """Details of a log record, size and hash of the payload are computed when the record is formatted."""
+
+    SUMMARY_KEYS = ('size', 'hash')
+
+    def __init__(self, payload: Any, details: dict[str, Any]) -> None:
+        self.payload = payload
+        self.details = details
+        self.summary: dict[str, Any] | None = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.details:
+            return self.details[key]
+        if key not in self.SUMMARY_KEYS:
+            raise KeyError(key)
+
+        if self.summary is None:
+            self.summary = summarize_payload(self.payload, serialize_payload(self.payload), keys=())
+        return self.summary[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.details
+        yield from (key for key in self.SUMMARY_KEYS if key not in self.details)
+
+    def __len__(self) -> int:
+        return len(set(self.details) | set(self.SUMMARY_KEYS))
+
+
+class PayloadLogger:
+    """Log messages with a summary of the payload instead of the payload itself.
+
+    Nothing is computed when the level is disabled, size and hash of the payload are computed only when the record
+    is formatted. The full payload is added to the record details only when it is enabled with ``LOGGING_PAYLOADS``,
+    and then only for a sample of records.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.sample_rate = settings.LOGGING_PAYLOADS_SAMPLE_RATE if settings.LOGGING_PAYLOADS else 0.0
+
+    def log(self, level: int, message: str, payload: Any, keys: Iterable[str] = JSONLD_KEYS, **details: Any) -> None:
+        """Log the message formatted with the details and the payload summary, e.g. ``%(space)s`` or ``%(size)s``."""
+
+        if not logger.isEnabledFor(level):
+            return
+
+        if isinstance(payload, dict):
+            details.update({key: payload[key] for key in keys if key in payload})
+
+        if self.sample_rate and random.random() < self.sample_rate:
+            body = serialize_payload(payload)
+            details.update(summarize_payload(payload, body, keys=()))
+            # decoded back from JSON, so the formatter can dump values like dates as well
+            details['payload'] = orjson.loads(body)
+
+        logger.log(level, message, PayloadDetails(payload, details))
+
+    def info(self, message: str, payload: Any, keys: Iterable[str] = JSONLD_KEYS, **details: Any) -> None:
+        self.log(logging.INFO, message, payload, keys, **details)
+
+
+@lru_cache(1)
+def get_payload_logger() -> PayloadLogger:
+    """Return the payload logger configured with the application settings."""
+    return PayloadLogger(get_settings())
@@ -4,11 +4,15 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from functools import partial
+
 import httpx
 from fastapi import Depends
 
 from kg_integration.config import Settings
 from kg_integration.config import get_settings
+from kg_integration.core.cache import MISSING
+from kg_integration.core.cache import get_cache
 from kg_integration.core.exceptions import UnhandledException
 from kg_integration.logger import logger
 
@@ -16,8 +20,22 @@ from kg_integration.logger import logger
 class ProjectManager:
     def __init__(self, settings: Settings) -> None:
         self.url = settings.PROJECT_SERVICE + '/v1/'
+        self.cache = get_cache(settings, 'projects', settings.CACHE_PROJECTS_MAXSIZE, settings.CACHE_PROJECTS_TTL)
 
     async def get_project_code(self, project_id: str) -> str:
+        """Get code of the project by its id, the mapping is cached."""
+        return await self.cache.get_or_load(f'project-code:{project_id}', partial(self.fetch_project_code, project_id))
+
+    async def get_cached_project_code(self, project_id: str) -> str | None:
+        """Get code of the project only if it is already cached."""
+        project_code = await self.cache.get(f'project-code:{project_id}')
+        return None if project_code is MISSING else project_code
+
+    async def invalidate_project(self, project_id: str) -> None:
+        """Drop cached mappings of the project."""
+        await self.cache.invalidate(f'project-code:{project_id}')
+
+    async def fetch_project_code(self, project_id: str) -> str:
         logger.info(f'Getting project code from project service {project_id}')
         async with httpx.AsyncClient() as client:
             response = await client.get(self.url + f'projects/{project_id}')
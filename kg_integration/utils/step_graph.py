@@ -0,0 +1,113 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import Any
+
+from kg_integration.logger import logger
+
+
+class Step:
+    """Single unit of work in a step graph.
+
+    The action receives outputs of all the completed steps and returns its own output, which has to be JSON
+    serializable to be persisted with the job.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        action: Callable[[dict[str, Any]], Awaitable[Any]],
+        depends_on: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.action = action
+        self.depends_on = tuple(depends_on)
+
+
+class StepProgress:
+    """Outputs of already completed steps and a callback to persist newly completed ones."""
+
+    def __init__(
+        self,
+        completed: dict[str, Any] | None = None,
+        persist: Callable[[str, Any], Awaitable[None]] | None = None,
+    ) -> None:
+        self.completed = dict(completed or {})
+        self.persist = persist
+
+    async def complete(self, name: str, output: Any) -> None:
+        self.completed[name] = output
+        if self.persist is not None:
+            await self.persist(name, output)
+
+
+class StepGraph:
+    """Run steps as soon as their dependencies are completed, skipping the ones completed by a previous run."""
+
+    def __init__(self, steps: Sequence[Step]) -> None:
+        self.steps = {step.name: step for step in steps}
+        self.validate()
+
+    def validate(self) -> None:
+        """Make sure all dependencies are known and there are no cycles."""
+
+        for step in self.steps.values():
+            unknown = set(step.depends_on) - set(self.steps)
+            if unknown:
+                raise ValueError(f'Step {step.name} depends on unknown steps {sorted(unknown)}')
+
+        resolved = set()
+        remaining = dict(self.steps)
+        while remaining:
+            ready = [name for name, step in remaining.items() if set(step.depends_on) <= resolved]
+            if not ready:
+                raise ValueError(f'Steps {sorted(remaining)} have circular dependencies')
+            resolved.update(ready)
+            for name in ready:
+                del remaining[name]
+
+    async def run(self, progress: StepProgress) -> dict[str, Any]:
+        """Run all the pending steps and return outputs of every step.
+
+        When a step fails no new steps are started, but the ones already running are allowed to finish so their
+        progress is kept for the next run. The first error is raised afterwards.
+        """
+
+        pending = {name: step for name, step in self.steps.items() if name not in progress.completed}
+        running: dict[asyncio.Task, str] = {}
+        error = None
+
+        def start_ready() -> None:
+            for name, step in list(pending.items()):
+                if all(dependency in progress.completed for dependency in step.depends_on):
+                    running[asyncio.create_task(step.action(dict(progress.completed)))] = name
+                    del pending[name]
+
+        start_ready()
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is not None:
+                        logger.error(f'Step {name} has failed: {task.exception()}')
+                        error = error or task.exception()
+                        continue
+                    await progress.complete(name, task.result())
+                if error is None:
+                    start_ready()
+        finally:
+            for task in running:
+                task.cancel()
+
+        if error is not None:
+            raise error
+
+        return progress.completed
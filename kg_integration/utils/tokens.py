@@ -0,0 +1,47 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import base64
+import hashlib
+import json
+import time
+from typing import Any
+
+
+def get_token_claims(token: str) -> dict[str, Any]:
+    """Read claims of a JWT without verifying its signature.
+
+    Only use it for tokens received directly from Keycloak, e.g. the exchanged EBRAINS token, as the claims of any other
+    token can not be trusted.
+    """
+
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return {}
+
+    return claims if isinstance(claims, dict) else {}
+
+
+def get_token_subject(token: str) -> str:
+    """Return identity of the token owner, tokens without subject are identified by their hash."""
+
+    subject = get_token_claims(token).get('sub')
+    if subject:
+        return str(subject)
+
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_token_lifetime(token: str) -> float | None:
+    """Return number of seconds until the token expires or None when the expiration is unknown."""
+
+    expires_at = get_token_claims(token).get('exp')
+    if not isinstance(expires_at, int | float):
+        return None
+
+    return max(0.0, expires_at - time.time())
@@ -0,0 +1,48 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import signal
+
+from common import configure_logging
+
+from kg_integration.config import Settings
+from kg_integration.config import get_settings
+from kg_integration.core.invalidation import create_cache_invalidation_bus
+from kg_integration.worker.health import create_health_server
+from kg_integration.worker.runner import WorkerRunner
+
+
+async def main(settings: Settings) -> None:
+    """Run job consumers with a health probe until SIGTERM or SIGINT is received."""
+
+    runner = WorkerRunner(settings)
+    cache_invalidation_bus = create_cache_invalidation_bus(settings)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, runner.request_stop, sig)
+
+    if cache_invalidation_bus is not None:
+        cache_invalidation_bus.start()
+    runner.start()
+    health_server = create_health_server(runner)
+    health_task = asyncio.create_task(health_server.serve())
+
+    await runner.stop.wait()
+    await runner.drain()
+
+    health_server.should_exit = True
+    await health_task
+
+    if cache_invalidation_bus is not None:
+        await cache_invalidation_bus.close()
+
+
+if __name__ == '__main__':
+    settings = get_settings()
+    configure_logging(settings.LOGGING_LEVEL, settings.LOGGING_FORMAT)
+    asyncio.run(main(settings))
@@ -0,0 +1,58 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from kg_integration.logger import logger
+from kg_integration.worker.runner import WorkerRunner
+
+
+class HealthServer(uvicorn.Server):
+    """Uvicorn server that leaves signal handling to the worker runner."""
+
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+def create_worker_app(runner: WorkerRunner) -> FastAPI:
+    """Initialize the health probe application of the worker."""
+
+    app = FastAPI(title='KG Integration Worker', docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.get('/v1/health', summary='Healthcheck if job consumers and the database are online.')
+    async def get_worker_status() -> Response:
+        if not runner.is_running:
+            return JSONResponse(status_code=503, content='Job consumers are not running.')
+
+        try:
+            async with runner.session_factory() as session:
+                await session.execute(text('SELECT 1'))
+        except SQLAlchemyError:
+            logger.exception('DB connection failed, SQLAlchemyError')
+            return JSONResponse(status_code=503, content='Database is unavailable.')
+
+        return Response(status_code=204)
+
+    return app
+
+
+def create_health_server(runner: WorkerRunner) -> HealthServer:
+    """Create a server exposing the health probe of the worker."""
+
+    settings = runner.settings
+    config = uvicorn.Config(
+        create_worker_app(runner),
+        host=settings.WORKER_HEALTH_HOST,
+        port=settings.WORKER_HEALTH_PORT,
+        log_config=None,
+        access_log=False,
+    )
+    return HealthServer(config)
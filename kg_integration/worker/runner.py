@@ -0,0 +1,71 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import signal
+
+from kg_integration.config import Settings
+from kg_integration.core.db import create_session_factory
+from kg_integration.logger import logger
+from kg_integration.utils.job_queue import JobWorker
+from kg_integration.utils.job_queue import SessionFactory
+from kg_integration.utils.membership_sweeper import MembershipSweeper
+
+
+class WorkerRunner:
+    """Run a pool of job consumers with the membership sweeper and drain them gracefully on shutdown."""
+
+    def __init__(self, settings: Settings, session_factory: SessionFactory | None = None) -> None:
+        self.settings = settings
+        self.concurrency = settings.WORKER_CONCURRENCY
+        self.drain_timeout = settings.WORKER_DRAIN_TIMEOUT
+        self.session_factory = session_factory or create_session_factory(settings)
+        self.stop = asyncio.Event()
+        self.consumers: list[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        """Check if all the consumers are alive and accepting new jobs."""
+
+        return bool(self.consumers) and not self.stop.is_set() and not any(task.done() for task in self.consumers)
+
+    def start(self) -> None:
+        """Start the configured number of consumers."""
+
+        job_worker = JobWorker(self.settings, self.session_factory)
+        self.consumers = [
+            asyncio.create_task(job_worker.run(self.stop), name=f'job-consumer-{number}')
+            for number in range(self.concurrency)
+        ]
+        logger.info(f'Started {self.concurrency} job consumers')
+
+        if self.settings.SWEEPER_ENABLED:
+            sweeper = MembershipSweeper(self.settings, self.session_factory)
+            self.consumers.append(asyncio.create_task(sweeper.run(self.stop), name='membership-sweeper'))
+            logger.info('Started membership sweeper')
+
+    def request_stop(self, sig: signal.Signals | None = None) -> None:
+        """Stop claiming new jobs, in-flight jobs are allowed to finish."""
+
+        if sig is not None:
+            logger.info(f'Received {sig.name}, draining job consumers')
+        self.stop.set()
+
+    async def drain(self) -> None:
+        """Wait for in-flight jobs and interrupt the ones that exceed the drain timeout."""
+
+        self.request_stop()
+        if not self.consumers:
+            return
+
+        _, pending = await asyncio.wait(self.consumers, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if pending:
+            logger.warning(f'{len(pending)} job consumers did not finish within {self.drain_timeout} seconds')
+        logger.info('Job consumers are stopped')
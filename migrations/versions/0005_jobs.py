@@ -0,0 +1,46 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+"""jobs.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:12:41.208133
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('task', sa.VARCHAR(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('status', sa.VARCHAR(16), nullable=False),
+        sa.Column('attempts', sa.INTEGER(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.INTEGER(), nullable=False),
+        sa.Column('result', postgresql.JSONB(), nullable=True),
+        sa.Column('last_error', sa.TEXT(), nullable=True),
+        sa.Column('run_after', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('locked_until', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='kg_integration',
+    )
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'], schema='kg_integration')
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_run_after', table_name='jobs', schema='kg_integration')
+    op.drop_table('jobs', schema='kg_integration')
@@ -0,0 +1,32 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+"""job steps.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 13:40:17.512904
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'jobs',
+        sa.Column('steps', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        schema='kg_integration',
+    )
+
+
+def downgrade():
+    op.drop_column('jobs', 'steps', schema='kg_integration')
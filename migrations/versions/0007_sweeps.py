@@ -0,0 +1,36 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+"""sweeps.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:02:33.871245
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sweeps',
+        sa.Column('name', sa.VARCHAR(), nullable=False),
+        sa.Column('cursor', sa.VARCHAR(), nullable=True),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        schema='kg_integration',
+    )
+
+
+def downgrade():
+    op.drop_table('sweeps', schema='kg_integration')
@@ -0,0 +1,27 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+"""drop job tokens.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 17:21:08.304512
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # user tokens used to be stored with space creation jobs, they are not needed by the worker anymore
+    op.execute("UPDATE kg_integration.jobs SET payload = payload - 'external_token' WHERE payload ? 'external_token'")
+
+
+def downgrade():
+    pass
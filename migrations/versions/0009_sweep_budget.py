@@ -0,0 +1,31 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+"""sweep budget.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:48:52.106237
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sweeps', sa.Column('budget', sa.FLOAT(), nullable=True), schema='kg_integration')
+    op.add_column(
+        'sweeps', sa.Column('budget_updated_at', sa.TIMESTAMP(timezone=True), nullable=True), schema='kg_integration'
+    )
+
+
+def downgrade():
+    op.drop_column('sweeps', 'budget_updated_at', schema='kg_integration')
+    op.drop_column('sweeps', 'budget', schema='kg_integration')
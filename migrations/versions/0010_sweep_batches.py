@@ -0,0 +1,31 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+"""sweep batches.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 18:12:40.518730
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sweeps', sa.Column('batch_end', sa.VARCHAR(), nullable=True), schema='kg_integration')
+    op.add_column(
+        'sweeps', sa.Column('batch_until', sa.TIMESTAMP(timezone=True), nullable=True), schema='kg_integration'
+    )
+
+
+def downgrade():
+    op.drop_column('sweeps', 'batch_until', schema='kg_integration')
+    op.drop_column('sweeps', 'batch_end', schema='kg_integration')
@@ -4,7 +4,10 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import base64
+import json
 import re
+from collections.abc import Callable
 from urllib.parse import urlparse
 
 import pytest_asyncio
@@ -22,6 +25,7 @@ from testcontainers.postgres import PostgresContainer
 from kg_integration.app import create_app
 from kg_integration.config import Settings
 from kg_integration.config import get_settings
+from kg_integration.core.cache import clear_caches
 from kg_integration.core.db import get_db_session
 from kg_integration.models import MetadataCRUD
 
@@ -62,6 +66,12 @@ async def db_session(create_db):
         await session.close()
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def clear_cache() -> None:
+    yield
+    await clear_caches()
+
+
 @pytest_asyncio.fixture()
 def metadata_crud(db_session) -> MetadataCRUD:
     yield MetadataCRUD(db_session)
@@ -77,6 +87,20 @@ def keycloak_mock(settings: Settings, httpx_mock) -> None:
     )
 
 
+@pytest_asyncio.fixture()
+def jwt_factory() -> Callable[..., str]:
+    def create_token(**claims) -> str:
+        header, payload = ({'alg': 'none'}, claims)
+        return (
+            '.'.join(
+                base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip('=') for part in (header, payload)
+            )
+            + '.signature'
+        )
+
+    return create_token
+
+
 @pytest_asyncio.fixture()
 def keycloak_fail_mock(settings: Settings, httpx_mock) -> None:
     httpx_mock.add_response(
@@ -109,6 +133,7 @@ def external_keycloak_mock(settings, httpx_mock) -> None:
 def settings(db_postgres) -> Settings:
     settings = get_settings()
     settings.RDS_DB_URI = db_postgres
+    settings.CACHE_BACKEND = 'memory'
     yield settings
 
 
@@ -136,4 +161,5 @@ pytest_plugins = [
     'tests.fixtures.base',
     'tests.fixtures.spaces',
     'tests.fixtures.metadata',
+    'tests.fixtures.jobs',
 ]
@@ -0,0 +1,26 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from contextlib import asynccontextmanager
+
+import pytest_asyncio
+
+from kg_integration.models import JobsCRUD
+from kg_integration.utils.job_queue import JobWorker
+
+
+@pytest_asyncio.fixture()
+def jobs_crud(db_session) -> JobsCRUD:
+    yield JobsCRUD(db_session)
+
+
+@pytest_asyncio.fixture()
+def job_worker(settings, db_session) -> JobWorker:
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    yield JobWorker(settings, session_factory)
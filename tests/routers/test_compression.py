@@ -0,0 +1,127 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import json
+import re
+
+import pytest
+from prometheus_client import REGISTRY
+
+from kg_integration.middleware.compression import negotiate_encoding
+
+KG_INSTANCE = {
+    '@id': 'https://kg.ebrains.eu/api/instances/9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+    '@type': ['https://openminds.ebrains.eu/core/person'],
+    'http://schema.org/identifier': ['https://kg.ebrains.eu/api/instances/9bd75916-4dce-49f6-a70b-878cc7f36cf7'],
+    'http://schema.org/name': 'Matvey',
+    'https://core.kg.ebrains.eu/vocab/meta/space': 'myspace',
+    'https://core.kg.ebrains.eu/vocab/meta/revision': 'rev',
+    'https://core.kg.ebrains.eu/vocab/meta/user': {
+        '@id': 'https://kg.ebrains.eu/api/instances/0d3137ad-ff53-46dc-b68e-b781edc3e37b'
+    },
+}
+
+
+def get_compressed_bytes(stage: str) -> float:
+    value = REGISTRY.get_sample_value('kg_integration_compression_bytes_total', {'encoding': 'gzip', 'stage': stage})
+    return value or 0.0
+
+
+@pytest.mark.parametrize(
+    'accept_encoding,expected',
+    [
+        ('gzip, deflate', 'gzip'),
+        ('br;q=1.0, gzip;q=0.5', 'br'),
+        ('zstd, br', 'zstd'),
+        ('gzip;q=0.5, zstd;q=0.8', 'zstd'),
+        ('*', 'zstd'),
+        ('*, zstd;q=0', 'br'),
+        ('identity', None),
+        ('gzip;q=0', None),
+        ('', None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, ['zstd', 'br', 'gzip']) == expected
+
+
+def test_negotiate_encoding_ignores_unavailable_encodings():
+    assert negotiate_encoding('br, zstd, gzip;q=0.1', ['gzip']) == 'gzip'
+
+
+async def test_large_response_is_compressed(client):
+    input_bytes, output_bytes = get_compressed_bytes('input'), get_compressed_bytes('output')
+
+    response = await client.get('/v1/metrics', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert 'kg_integration_swept_spaces_total' in response.text
+    assert get_compressed_bytes('input') - input_bytes == len(response.content)
+    assert get_compressed_bytes('output') - output_bytes < len(response.content) / 2
+    assert REGISTRY.get_sample_value('kg_integration_compression_cpu_seconds_total', {'encoding': 'gzip'}) > 0
+
+
+async def test_response_is_not_compressed_without_accepted_encoding(client):
+    response = await client.get('/v1/metrics', headers={'Accept-Encoding': 'identity'})
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert int(response.headers['Content-Length']) == len(response.content)
+
+
+async def test_small_response_is_not_compressed(client, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(method='GET', url=re.compile('.*instances.*'), json={'data': [], 'total': 0})
+
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token'},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+
+
+async def test_streamed_response_is_compressed(client, keycloak_mock, httpx_mock):
+    instances = [dict(KG_INSTANCE) for _ in range(100)]
+    httpx_mock.add_response(method='GET', url=re.compile('.*instances.*'), json={'data': instances, 'total': 100})
+
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token', 'stream': True},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert len(json.loads(response.content)['result']) == 100
+
+
+@pytest.mark.parametrize('description_size,content_encoding', [(2048, 'gzip'), (0, None)])
+async def test_response_has_same_weak_etag_whether_compressed_or_not(
+    client, keycloak_mock, httpx_mock, description_size, content_encoding
+):
+    instance = {**KG_INSTANCE, 'http://schema.org/description': 'x' * description_size}
+    httpx_mock.add_response(method='GET', url=re.compile('.*instances/.*'), json={'data': instance})
+
+    response = await client.get(
+        '/v1/metadata/9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+        params={'token': 'access_token'},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+    not_modified = await client.get(
+        '/v1/metadata/9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+        params={'token': 'access_token'},
+        headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']},
+    )
+
+    assert response.headers.get('Content-Encoding') == content_encoding
+    assert response.headers['ETag'] == 'W/"rev"'
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == 'W/"rev"'
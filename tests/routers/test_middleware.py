@@ -8,6 +8,8 @@ import re
 
 import pytest
 
+from kg_integration.middleware import TokenMiddleware
+
 
 @pytest.mark.asyncio
 async def test_request_with_token_header(client, httpx_mock, keycloak_mock):
@@ -86,3 +88,24 @@ async def test_middleware_does_not_change_param_token(settings, client, httpx_mo
     response = await client.get('/v1/spaces/', params={'token': 'test_token'}, headers=headers)
     assert httpx_mock.get_request(match_headers={'Authorization': 'Bearer test_token'})
     assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    'headers,expected',
+    [
+        ([(b'authorization', b'Bearer test_token')], 'test_token'),
+        ([(b'authorization', b'Bearer')], None),
+        ([(b'accept', b'application/json')], None),
+    ],
+)
+async def test_token_middleware_puts_header_token_into_state(headers, expected):
+    scopes = []
+
+    async def app(scope, receive, send):
+        scopes.append(scope)
+
+    scope = {'type': 'http', 'headers': headers, 'query_string': b'space=myspace'}
+    await TokenMiddleware(app)(scope, None, None)
+
+    assert scopes[0]['query_string'] == b'space=myspace'
+    assert scopes[0].get('state', {}).get('token') == expected
@@ -0,0 +1,66 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import re
+from uuid import uuid4
+
+
+async def test_get_job_reports_space_creation_steps(client, external_keycloak_mock, httpx_mock, job_worker):
+    httpx_mock.add_response(method='PUT', url=re.compile('.*spaces/collab-hdc-test/specification'), status_code=200)
+    httpx_mock.add_response(method='POST', url=re.compile('.*collabs.*'), status_code=409)
+    httpx_mock.add_response(
+        method='GET', url=re.compile('.*users/me'), json={'data': {'http://schema.org/alternateName': 'test'}}
+    )
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs.*team.*users.*'), status_code=204)
+    response = await client.post(
+        '/v1/spaces/create', params={'name': 'test', 'username': 'tester', 'token': 'access_token'}
+    )
+    job_id = response.json()['job_id']
+
+    queued = await client.get(f'/v1/jobs/{job_id}')
+    await job_worker.run_pending()
+    finished = await client.get(f'/v1/jobs/{job_id}')
+
+    assert queued.status_code == 200
+    assert queued.json()['status'] == 'queued'
+    assert [step['completed'] for step in queued.json()['steps']] == [False] * 5
+    assert finished.status_code == 200
+    assert finished.json()['status'] == 'succeeded'
+    assert [step['name'] for step in finished.json()['steps']] == [
+        'user_found',
+        'collab_created',
+        'roles_ready',
+        'users_synced',
+        'kg_space_created',
+    ]
+    assert all(step['completed'] and step['completed_at'] for step in finished.json()['steps'])
+
+
+async def test_get_job_not_found(client):
+    response = await client.get(f'/v1/jobs/{uuid4()}')
+
+    assert response.status_code == 404
+
+
+async def test_space_creation_resumes_from_completed_steps(
+    client, external_keycloak_mock, httpx_mock, jobs_crud, job_worker
+):
+    httpx_mock.add_response(method='PUT', url=re.compile('.*spaces/collab-hdc-test/specification'), status_code=200)
+    job = await jobs_crud.enqueue('create_space', {'space_name': 'test', 'users': []}, max_attempts=3)
+    for step, output in [
+        ('user_found', 'test'),
+        ('collab_created', False),
+        ('roles_ready', None),
+        ('users_synced', None),
+    ]:
+        await jobs_crud.record_step(job.id, step, output)
+
+    await job_worker.run_pending()
+    response = await client.get(f'/v1/jobs/{job.id}')
+
+    assert response.json()['status'] == 'succeeded'
+    assert all(step['completed'] for step in response.json()['steps'])
+    assert len(httpx_mock.get_requests(url=re.compile('.*collabs.*'))) == 0
@@ -4,10 +4,20 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import json
 import re
 from unittest import mock
 from uuid import uuid4
 
+import orjson
+import pytest
+from pytest_httpx import IteratorStream
+
+from kg_integration.models import MetadataCRUD
+from kg_integration.schemas.metadata import MetadataKGResponseListSchema
+from kg_integration.schemas.metadata import MetadataKGResponseSchema
+from kg_integration.utils.jsonld import CONTEXT
+from kg_integration.utils.jsonld import expand
 from kg_integration.utils.spaces_activity_log import KGActivityLog
 
 PERSON_METADATA_1 = {
@@ -49,6 +59,71 @@ async def test_get_metadata_by_id(client, keycloak_mock, httpx_mock):
     assert response.json() == PERSON_METADATA_1
 
 
+async def test_get_metadata_by_id_returns_etag_of_kg_revision(client, keycloak_mock, httpx_mock):
+    metadata_id = uuid4()
+    httpx_mock.add_response(
+        method='GET', url=re.compile(f'.*instances/{metadata_id}.*'), json={'data': PERSON_METADATA_1}
+    )
+
+    first = await client.get(f'/v1/metadata/{metadata_id}', params={'token': 'access_token'})
+    second = await client.get(f'/v1/metadata/{metadata_id}', params={'token': 'access_token'})
+
+    assert first.headers['ETag'] == second.headers['ETag'] == 'W/"rev"'
+    assert second.json() == PERSON_METADATA_1
+    assert len(httpx_mock.get_requests(url=re.compile(f'.*instances/{metadata_id}.*'))) == 1
+
+
+@pytest.mark.parametrize('if_none_match', ['"rev"', 'W/"rev"', '"other", "rev"', '*'])
+async def test_get_metadata_by_id_not_modified(client, keycloak_mock, httpx_mock, if_none_match):
+    metadata_id = uuid4()
+    httpx_mock.add_response(
+        method='GET', url=re.compile(f'.*instances/{metadata_id}.*'), json={'data': PERSON_METADATA_1}
+    )
+
+    response = await client.get(
+        f'/v1/metadata/{metadata_id}',
+        params={'token': 'access_token'},
+        headers={'If-None-Match': if_none_match, 'Accept-Encoding': 'identity'},
+    )
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == 'W/"rev"'
+    assert response.content == b''
+
+
+async def test_get_metadata_by_id_modified(client, keycloak_mock, httpx_mock):
+    metadata_id = uuid4()
+    httpx_mock.add_response(
+        method='GET', url=re.compile(f'.*instances/{metadata_id}.*'), json={'data': PERSON_METADATA_1}
+    )
+
+    response = await client.get(
+        f'/v1/metadata/{metadata_id}', params={'token': 'access_token'}, headers={'If-None-Match': '"old"'}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == PERSON_METADATA_1
+
+
+async def test_get_metadata_by_id_compact(client, keycloak_mock, httpx_mock):
+    metadata_id = uuid4()
+    httpx_mock.add_response(
+        method='GET', url=re.compile(f'.*instances/{metadata_id}.*'), json={'data': PERSON_METADATA_1}
+    )
+
+    response = await client.get(f'/v1/metadata/{metadata_id}', params={'token': 'access_token', 'compact': True})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == 'W/"rev-compact"'
+    body = response.json()
+    assert body['@context'] == CONTEXT
+    assert body['@id'] == 'kg:9bd75916-4dce-49f6-a70b-878cc7f36cf7'
+    assert body['@type'] == ['om:core/person']
+    assert body['schema:name'] == 'Matvey'
+    assert body['kgmeta:user'] == {'@id': 'kg:0d3137ad-ff53-46dc-b68e-b781edc3e37b'}
+    assert expand(body) == PERSON_METADATA_1
+
+
 async def test_list_metadata(client, keycloak_mock, httpx_mock):
     httpx_mock.add_response(
         method='GET',
@@ -61,8 +136,8 @@ async def test_list_metadata(client, keycloak_mock, httpx_mock):
             'startTime': 1675867028544,
             'durationInMs': 49,
             'transactionId': None,
-            'total': 0,
-            'size': 0,
+            'total': 2,
+            'size': 2,
             'from': 0,
         },
     )
@@ -89,10 +164,149 @@ async def test_list_metadata(client, keycloak_mock, httpx_mock):
                 'space': 'myspace',
                 'type': ['https://openminds.ebrains.eu/core/person'],
             },
-        ]
+        ],
+        'total': 2,
+        'from': 0,
+        'size': 2,
     }
 
 
+async def test_list_metadata_page(client, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*space=myspace.*type=person.*'),
+        json={'data': [PERSON_METADATA_2], 'total': 12, 'size': 1, 'from': 5},
+    )
+    response = await client.get(
+        '/v1/metadata/',
+        params={
+            'space': 'myspace',
+            'stage': 'IN_PROGRESS',
+            'type': 'person',
+            'token': 'access_token',
+            'from': 5,
+            'size': 1,
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [instance['id'] for instance in body['result']] == ['b5817f36-da1e-44a2-81ed-3d769450eb65']
+    assert (body['total'], body['from'], body['size']) == (12, 5, 1)
+    request = httpx_mock.get_request(url=re.compile('.*instances.*'))
+    assert (request.url.params['from'], request.url.params['size']) == ('5', '1')
+
+
+async def test_list_metadata_collects_all_pages_without_size(client, keycloak_mock, httpx_mock, settings, monkeypatch):
+    monkeypatch.setattr(settings, 'KG_PAGE_SIZE', 1)
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*from=0&size=1$'),
+        json={'data': [PERSON_METADATA_1], 'total': 2, 'size': 1, 'from': 0},
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*from=1&size=1$'),
+        json={'data': [PERSON_METADATA_2], 'total': 2, 'size': 1, 'from': 1},
+    )
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token'},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [instance['id'] for instance in body['result']] == [
+        '9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+        'b5817f36-da1e-44a2-81ed-3d769450eb65',
+    ]
+    assert (body['total'], body['from'], body['size']) == (2, 0, 2)
+
+
+async def test_list_metadata_stream_walks_all_pages(client, keycloak_mock, httpx_mock, settings, monkeypatch):
+    monkeypatch.setattr(settings, 'KG_PAGE_SIZE', 1)
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*from=0&size=1$'),
+        json={'data': [PERSON_METADATA_1], 'total': 2, 'size': 1, 'from': 0},
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*from=1&size=1$'),
+        json={'data': [PERSON_METADATA_2], 'total': 2, 'size': 1, 'from': 1},
+    )
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token', 'stream': True},
+    )
+
+    assert response.status_code == 200
+    assert [instance['id'] for instance in response.json()['result']] == [
+        '9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+        'b5817f36-da1e-44a2-81ed-3d769450eb65',
+    ]
+    assert len(httpx_mock.get_requests(url=re.compile('.*instances.*'))) == 2
+
+
+async def test_list_metadata_compact(client, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(
+        method='GET', url=re.compile('.*instances.*'), json={'data': [PERSON_METADATA_1], 'total': 1}
+    )
+
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token', 'compact': True},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['@context'] == CONTEXT
+    assert body['total'] == 1
+    instance = body['result'][0]
+    assert instance['type'] == ['om:core/person']
+    assert instance['data']['schema:surname'] == 'Loshakov'
+    assert 'kgmeta:revision' not in instance['data']
+
+
+async def test_list_metadata_without_compact_has_no_context(client, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(method='GET', url=re.compile('.*instances.*'), json={'data': [PERSON_METADATA_1]})
+
+    response = await client.get(
+        '/v1/metadata/', params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token'}
+    )
+
+    assert response.status_code == 200
+    assert '@context' not in response.json()
+
+
+def test_kg_response_schema_trusted_construction_matches_validated():
+    validated = MetadataKGResponseListSchema.from_kg_response([dict(PERSON_METADATA_1), dict(PERSON_METADATA_2)])
+    trusted = MetadataKGResponseListSchema.from_kg_response(
+        [dict(PERSON_METADATA_1), dict(PERSON_METADATA_2)], trusted=True
+    )
+
+    assert trusted.to_json() == validated.to_json()
+    assert trusted.result[0].id == validated.result[0].id
+
+
+async def test_list_metadata_does_not_validate_kg_instances(client, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*space=myspace.*type=person.*'),
+        json={'data': [PERSON_METADATA_1], 'total': 1, 'size': 1, 'from': 0},
+    )
+
+    with mock.patch.object(MetadataKGResponseSchema, '__init__', side_effect=AssertionError) as init:
+        response = await client.get(
+            '/v1/metadata/',
+            params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token'},
+        )
+
+    assert response.status_code == 200
+    assert response.json()['result'][0]['id'] == '9bd75916-4dce-49f6-a70b-878cc7f36cf7'
+    init.assert_not_called()
+
+
 async def test_list_metadata_not_found(client, keycloak_mock, httpx_mock):
     httpx_mock.add_response(
         method='GET',
@@ -154,7 +368,70 @@ async def test_list_metadata_no_data(client, keycloak_mock, httpx_mock):
         params={'space': 'persons', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token'},
     )
     assert response.status_code == 200
-    assert response.json() == {'result': []}
+    assert response.json() == {'result': [], 'total': 0, 'from': 0, 'size': 0}
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64 * 1024])
+async def test_list_metadata_stream(client, keycloak_mock, httpx_mock, chunk_size):
+    body = json.dumps({'data': [PERSON_METADATA_1, PERSON_METADATA_2], 'total': 2, 'size': 2, 'from': 0}).encode()
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*space=myspace.*type=person.*'),
+        stream=IteratorStream([body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]),
+    )
+    params = {'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token'}
+
+    streamed = await client.get('/v1/metadata/', params={**params, 'stream': True, 'size': 2})
+    loaded = await client.get('/v1/metadata/', params={**params, 'size': 2})
+
+    assert streamed.status_code == 200
+    assert streamed.headers['Content-Type'] == 'application/json'
+    assert streamed.json()['result'] == loaded.json()['result']
+    assert [instance['id'] for instance in streamed.json()['result']] == [
+        '9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+        'b5817f36-da1e-44a2-81ed-3d769450eb65',
+    ]
+
+
+async def test_list_metadata_stream_ndjson(client, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances.*space=myspace.*type=person.*'),
+        json={'data': [PERSON_METADATA_1, PERSON_METADATA_2], 'total': 2, 'size': 2, 'from': 0},
+    )
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token', 'stream': True},
+        headers={'Accept': 'application/x-ndjson'},
+    )
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    lines = response.text.splitlines()
+    assert [json.loads(line)['data'] for line in lines] == [
+        {'http://schema.org/name': 'Matvey', 'http://schema.org/surname': 'Loshakov'},
+        {'http://schema.org/name': 'Also Matvey', 'http://schema.org/surname': 'Loshakov Again'},
+    ]
+
+
+@pytest.mark.parametrize(
+    'status_code,body,expected_status',
+    [(500, {'error': 'test_error_message'}, 500), (200, {'data': None}, 503), (200, {'data': []}, 200)],
+)
+async def test_list_metadata_stream_errors_before_first_instance(
+    client, keycloak_mock, httpx_mock, status_code, body, expected_status
+):
+    httpx_mock.add_response(
+        method='GET', url=re.compile('.*instances.*space=myspace.*type=person.*'), status_code=status_code, json=body
+    )
+    response = await client.get(
+        '/v1/metadata/',
+        params={'space': 'myspace', 'stage': 'IN_PROGRESS', 'type': 'person', 'token': 'access_token', 'stream': True},
+    )
+
+    assert response.status_code == expected_status
+    if expected_status == 200:
+        assert response.json() == {'result': []}
 
 
 async def test_list_metadata_token_exchange_failed(client, httpx_mock):
@@ -212,6 +489,24 @@ async def test_check_metadata_list_not_found(client, metadata_factory):
     assert response.status_code == 404
 
 
+async def test_check_metadata_list_not_found_is_remembered_until_metadata_is_created(client, metadata_factory):
+    metadata_id = str(uuid4())
+    other_metadata_id = str(uuid4())
+    payload = {'metadata': [{'id': metadata_id}, {'id': other_metadata_id}]}
+
+    with mock.patch.object(MetadataCRUD, 'scalars', autospec=True, side_effect=MetadataCRUD.scalars) as scalars:
+        first = await client.post('/v1/metadata/', json=payload)
+        second = await client.post('/v1/metadata/', json=payload)
+        assert scalars.call_count == 1
+
+    await metadata_factory.create(metadata_id=metadata_id, kg_instance_id=uuid4(), dataset_id=uuid4(), direction='KG')
+    third = await client.post('/v1/metadata/', json=payload)
+
+    assert first.status_code == second.status_code == 404
+    assert third.status_code == 200
+    assert [metadata['metadata_id'] for metadata in third.json()['metadata']] == [metadata_id]
+
+
 @mock.patch.object(KGActivityLog, 'send_metadata_on_upload_event')
 async def test_upload_metadata(mock_activity_log, client, keycloak_mock, httpx_mock, metadata_factory):
     httpx_mock.add_response(
@@ -282,6 +577,112 @@ async def test_upload_metadata_not_available(client, keycloak_mock, httpx_mock):
     assert 'Remote resource is not available' in response.text
 
 
+async def test_upload_metadata_invalid_json(client):
+    response = await client.post(
+        '/v1/metadata/upload',
+        params={
+            'space': 'myspace',
+            'metadata_id': str(uuid4()),
+            'dataset_id': str(uuid4()),
+            'uploader': 'test',
+            'token': 'access_token',
+        },
+        content=b'{"@type": ',
+        headers={'Content-Type': 'application/json'},
+    )
+
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['type'] == 'json_invalid'
+
+
+@mock.patch.object(KGActivityLog, 'send_metadata_on_upload_event')
+async def test_upload_metadata_passes_decoded_body_to_kg(mock_activity_log, client, keycloak_mock, httpx_mock):
+    metadata = {'@type': 'https://openminds.ebrains.eu/core/person', 'http://schema.org/name': 'Матвей'}
+    httpx_mock.add_response(method='POST', url=re.compile('.*instances.*'), json={'data': PERSON_METADATA_1})
+    httpx_mock.add_response(method='GET', url=re.compile('.*datasets/.*'), json={'code': 'test'})
+
+    with mock.patch('kg_integration.core.serialization.orjson.loads', wraps=orjson.loads) as loads:
+        response = await client.post(
+            '/v1/metadata/upload',
+            params={
+                'space': 'myspace',
+                'metadata_id': str(uuid4()),
+                'dataset_id': str(uuid4()),
+                'uploader': 'test',
+                'token': 'access_token',
+            },
+            json=metadata,
+        )
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    loads.assert_called_once()
+    request = httpx_mock.get_request(method='POST', url=re.compile('.*instances.*'))
+    assert json.loads(request.content) == metadata
+
+
+@mock.patch.object(KGActivityLog, 'send_metadata_on_upload_event')
+async def test_upload_metadata_expands_compact_metadata(mock_activity_log, client, keycloak_mock, httpx_mock):
+    metadata = {
+        '@context': CONTEXT,
+        '@type': ['om:core/person'],
+        'schema:name': 'Matvey',
+        'kgmeta:revision': 'rev',
+        'om:vocab/affiliation': {'@id': 'kg:0d3137ad-ff53-46dc-b68e-b781edc3e37b'},
+    }
+    httpx_mock.add_response(method='POST', url=re.compile('.*instances.*'), json={'data': PERSON_METADATA_1})
+    httpx_mock.add_response(method='GET', url=re.compile('.*datasets/.*'), json={'code': 'test'})
+
+    response = await client.post(
+        '/v1/metadata/upload',
+        params={
+            'space': 'myspace',
+            'metadata_id': str(uuid4()),
+            'dataset_id': str(uuid4()),
+            'uploader': 'test',
+            'token': 'access_token',
+        },
+        json=metadata,
+    )
+
+    assert response.status_code == 200
+    request = httpx_mock.get_request(method='POST', url=re.compile('.*instances.*'))
+    assert json.loads(request.content) == {
+        '@type': ['https://openminds.ebrains.eu/core/person'],
+        'http://schema.org/name': 'Matvey',
+        'https://openminds.ebrains.eu/vocab/affiliation': {
+            '@id': 'https://kg.ebrains.eu/api/instances/0d3137ad-ff53-46dc-b68e-b781edc3e37b'
+        },
+    }
+
+
+@mock.patch.object(KGActivityLog, 'send_metadata_on_upload_event')
+async def test_upload_metadata_keeps_document_with_own_context(mock_activity_log, client, keycloak_mock, httpx_mock):
+    metadata = {
+        '@context': {'@vocab': 'https://openminds.ebrains.eu/vocab/'},
+        '@type': 'https://openminds.ebrains.eu/core/Person',
+        'givenName': 'Matvey',
+    }
+    httpx_mock.add_response(method='POST', url=re.compile('.*instances.*'), json={'data': PERSON_METADATA_1})
+    httpx_mock.add_response(method='GET', url=re.compile('.*datasets/.*'), json={'code': 'test'})
+
+    response = await client.post(
+        '/v1/metadata/upload',
+        params={
+            'space': 'myspace',
+            'metadata_id': str(uuid4()),
+            'dataset_id': str(uuid4()),
+            'uploader': 'test',
+            'token': 'access_token',
+        },
+        json=metadata,
+    )
+
+    assert response.status_code == 200
+    request = httpx_mock.get_request(method='POST', url=re.compile('.*instances.*'))
+    assert json.loads(request.content) == metadata
+
+
 @mock.patch.object(KGActivityLog, 'send_metadata_on_upload_event')
 async def test_upload_metadata_creates_db_entry(mock_activity_log, client, keycloak_mock, httpx_mock, metadata_factory):
     metadata_id = str(uuid4())
@@ -779,6 +1180,72 @@ async def test_upload_metadata_from_kg_with_filename(mock_activity_log, client,
     mock_activity_log.assert_called_once_with(dataset_code='test', target_name='random_name', creator='test')
 
 
+@mock.patch.object(KGActivityLog, 'send_metadata_on_download_event')
+async def test_download_metadata_from_kg_refreshes_outdated_template(
+    mock_activity_log, client, keycloak_mock, httpx_mock
+):
+    kg_id = '9bd75916-4dce-49f6-a70b-878cc7f36cf7'
+    dataset_id = str(uuid4())
+    outdated_template_id = str(uuid4())
+    template_id = str(uuid4())
+    httpx_mock.add_response(
+        method='POST',
+        url=re.compile('.*dataset/default/schemaTPL/list.*'),
+        json={'result': [{'name': 'Open_minds', 'geid': outdated_template_id}]},
+    )
+    httpx_mock.add_response(
+        method='POST',
+        url=re.compile('.*dataset/default/schemaTPL/list.*'),
+        json={'result': [{'name': 'Open_minds', 'geid': template_id}]},
+    )
+    httpx_mock.add_response(method='GET', url=re.compile('.*datasets/.*'), json={'code': 'test'})
+    httpx_mock.add_response(method='GET', url=re.compile('.*release/status.*'), json={'data': 'UNRELEASED'})
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*instances/9bd75916-4dce-49f6-a70b-878cc7f36cf7.*stage=IN_PROGRESS.*'),
+        json={'data': PERSON_METADATA_1},
+    )
+    httpx_mock.add_response(
+        method='POST',
+        url=re.compile('.*schema$'),
+        match_json={
+            'name': kg_id + '.jsonld',
+            'dataset_geid': dataset_id,
+            'tpl_geid': outdated_template_id,
+            'standard': 'open_minds',
+            'system_defined': False,
+            'is_draft': False,
+            'content': PERSON_METADATA_1,
+            'creator': 'test',
+        },
+        status_code=404,
+        json={'error': 'template not found'},
+    )
+    httpx_mock.add_response(
+        method='POST',
+        url=re.compile('.*schema$'),
+        match_json={
+            'name': kg_id + '.jsonld',
+            'dataset_geid': dataset_id,
+            'tpl_geid': template_id,
+            'standard': 'open_minds',
+            'system_defined': False,
+            'is_draft': False,
+            'content': PERSON_METADATA_1,
+            'creator': 'test',
+        },
+        json={'result': {'geid': '2e9d768f-5c38-48e0-9436-c97199769ca9', 'tpl_geid': template_id}},
+    )
+
+    response = await client.get(
+        f'/v1/metadata/upload/{kg_id}/{dataset_id}',
+        params={'token': 'access_token', 'uploader': 'test'},
+    )
+
+    assert response.status_code == 200
+    assert response.json()['tpl_geid'] == template_id
+
+
 async def test_upload_metadata_from_kg_doesnt_exists(client, keycloak_mock, httpx_mock):
     kg_id = '9bd75916-4dce-49f6-a70b-878cc7f36cf7'
     dataset_id = str(uuid4())
@@ -0,0 +1,12 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+
+async def test_metrics(client):
+    response = await client.get('/v1/metrics')
+
+    assert response.status_code == 200
+    assert 'kg_integration_swept_spaces_total' in response.text
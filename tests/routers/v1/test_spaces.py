@@ -8,6 +8,8 @@ import re
 from datetime import datetime
 from unittest import mock
 
+from kg_integration.models import SpacesCRUD
+from kg_integration.utils.kg_manager import KGManager
 from kg_integration.utils.spaces_activity_log import KGActivityLog
 
 MYSPACE = {
@@ -58,6 +60,19 @@ async def test_list_spaces(client, keycloak_mock, httpx_mock):
     assert response.json() == {'spaces': [{'name': 'myspace'}, {'name': 'collab-hdc-space'}]}
 
 
+async def test_list_spaces_is_cached_until_space_is_created(client, settings, keycloak_mock, httpx_mock):
+    httpx_mock.add_response(method='GET', url=re.compile('.*v3/spaces$'), json={'data': [MYSPACE, COLLAB_SPACE]})
+    httpx_mock.add_response(method='PUT', url=re.compile('.*v3/spaces/collab-hdc-new/specification$'))
+
+    first = await client.get('/v1/spaces/', params={'token': 'access_token'})
+    second = await client.get('/v1/spaces/', params={'token': 'access_token'})
+    await KGManager(settings).create_space('collab-hdc-new', 'service_token')
+    third = await client.get('/v1/spaces/', params={'token': 'access_token'})
+
+    assert first.json() == second.json() == third.json()
+    assert len(httpx_mock.get_requests(method='GET', url=re.compile('.*v3/spaces$'))) == 2
+
+
 async def test_list_spaces_no_data(client, keycloak_mock, httpx_mock):
     httpx_mock.add_response(
         method='GET',
@@ -150,6 +165,19 @@ async def test_get_space_details_not_found(client, spaces_factory):
     assert 'Requested resource is not found' in response.text
 
 
+async def test_get_space_details_not_found_is_remembered_until_space_is_created(client, spaces_factory):
+    with mock.patch.object(SpacesCRUD, 'scalars', autospec=True, side_effect=SpacesCRUD.scalars) as scalars:
+        first = await client.get('/v1/spaces/test')
+        second = await client.get('/v1/spaces/test')
+        assert scalars.call_count == 1
+
+    await spaces_factory.create('test', 'tester')
+    third = await client.get('/v1/spaces/test')
+
+    assert first.status_code == second.status_code == 404
+    assert third.status_code == 200
+
+
 async def test_check_multiple_spaces(client, spaces_factory):
     await spaces_factory.create('test', 'tester')
     await spaces_factory.create('test2', 'tester')
@@ -172,7 +200,7 @@ async def test_check_multiple_spaces_missing_some(client, spaces_factory):
     assert len(data['spaces']) == 2
 
 
-async def test_create_space(client, external_keycloak_mock, httpx_mock):
+async def test_create_space(client, external_keycloak_mock, httpx_mock, job_worker):
     httpx_mock.add_response(method='PUT', url=re.compile('.*spaces/collab-hdc-test/specification'), status_code=200)
     httpx_mock.add_response(
         method='POST',
@@ -197,6 +225,7 @@ async def test_create_space(client, external_keycloak_mock, httpx_mock):
     )
 
     assert response.status_code == 201
+    assert await job_worker.run_pending() == 1
 
 
 async def test_create_duplicate_space(client, spaces_factory, httpx_mock):
@@ -209,7 +238,7 @@ async def test_create_duplicate_space(client, spaces_factory, httpx_mock):
     assert 'Space was already created' in response.text
 
 
-async def test_create_space_writes_to_db(client, external_keycloak_mock, httpx_mock):
+async def test_create_space_writes_to_db(client, external_keycloak_mock, httpx_mock, job_worker):
     httpx_mock.add_response(method='PUT', url=re.compile('.*spaces/collab-hdc-test/specification'), status_code=200)
     httpx_mock.add_response(
         method='POST',
@@ -234,6 +263,7 @@ async def test_create_space_writes_to_db(client, external_keycloak_mock, httpx_m
     )
 
     assert response.status_code == 201
+    await job_worker.run_pending()
     response = await client.get('/v1/spaces/test')
 
     space = response.json()
@@ -242,7 +272,7 @@ async def test_create_space_writes_to_db(client, external_keycloak_mock, httpx_m
     assert space['creator'] == 'tester'
 
 
-async def test_create_space_keycloak_not_available(client, httpx_mock):
+async def test_create_space_keycloak_not_available(client, httpx_mock, job_worker, jobs_crud):
     httpx_mock.add_response(
         method='POST',
         url=re.compile('.*/auth/realms/hbp/protocol/openid-connect/token'),
@@ -252,12 +282,16 @@ async def test_create_space_keycloak_not_available(client, httpx_mock):
     response = await client.post(
         '/v1/spaces/create', params={'name': 'test', 'username': 'tester', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
 
-    assert response.status_code == 401
-    assert 'Could not get the service account token' in response.text
+    job = (await jobs_crud.scalars(jobs_crud.select_query)).one()
+    assert response.status_code == 201
+    assert job.status == 'queued'
+    assert job.attempts == 1
+    assert 'Could not get the service account token' in job.last_error
 
 
-async def test_create_space_for_project(client, keycloak_mock, external_keycloak_mock, httpx_mock):
+async def test_create_space_for_project(client, keycloak_mock, external_keycloak_mock, httpx_mock, job_worker):
     httpx_mock.add_response(
         method='POST',
         url=re.compile('.*collabs.*'),
@@ -314,9 +348,12 @@ async def test_create_space_for_project(client, keycloak_mock, external_keycloak
     response = await client.post('/v1/spaces/create/project/test', params={'token': 'access_token'})
 
     assert response.status_code == 201
+    assert await job_worker.run_pending() == 1
 
 
-async def test_create_space_for_project_pre_existing_collab(client, keycloak_mock, external_keycloak_mock, httpx_mock):
+async def test_create_space_for_project_pre_existing_collab(
+    client, keycloak_mock, external_keycloak_mock, httpx_mock, job_worker
+):
     httpx_mock.add_response(method='POST', url=re.compile('.*collabs.*'), status_code=409)
     httpx_mock.add_response(
         method='POST',
@@ -360,9 +397,10 @@ async def test_create_space_for_project_pre_existing_collab(client, keycloak_moc
     response = await client.post('/v1/spaces/create/project/test', params={'token': 'access_token'})
 
     assert response.status_code == 201
+    assert await job_worker.run_pending() == 1
 
 
-async def test_create_space_for_project_fails(client, keycloak_mock, httpx_mock):
+async def test_create_space_for_project_fails(client, keycloak_mock, httpx_mock, job_worker, jobs_crud):
     httpx_mock.add_response(
         method='POST',
         url=re.compile('.*collabs.*'),
@@ -435,19 +473,28 @@ async def test_create_space_for_project_fails(client, keycloak_mock, httpx_mock)
         status_code=503,
         json={'error_message': 'KG is down'},
     )
-    start_time = datetime.now()
     response = await client.post('/v1/spaces/create/project/test', params={'token': 'access_token'})
+    start_time = datetime.now()
+    await job_worker.run_pending()
     finish_time = datetime.now()
     time_diff = finish_time - start_time
 
-    # response is always 201, due to background task
+    # response is always 201, due to background job
     assert response.status_code == 201
     # backoff should retry 4 times: 1 sec, 1 sec, 2 sec, 3 sec = 7+ sec for test
     assert time_diff.total_seconds() > 7
+    job = (await jobs_crud.scalars(jobs_crud.select_query)).one()
+    assert job.status == 'queued'
+    assert 'KG is down' in job.last_error
+    assert response.json() == {'job_id': str(job.id)}
+    assert set(job.steps) == {'user_found', 'collab_created', 'roles_ready', 'users_synced'}
+    # only the identity of the user is kept with the job, never the token
+    assert job.payload['username'] == 'test'
+    assert 'external_token' not in job.payload
 
 
 @mock.patch.object(KGActivityLog, 'send_kg_on_create_event')
-async def test_create_space_for_dataset(mock_space_activity_log, client, keycloak_mock, httpx_mock):
+async def test_create_space_for_dataset(mock_space_activity_log, client, keycloak_mock, httpx_mock, job_worker):
     httpx_mock.add_response(
         method='POST',
         url=re.compile('.*collabs.*'),
@@ -524,24 +571,11 @@ async def test_create_space_for_dataset(mock_space_activity_log, client, keycloa
     response = await client.post('/v1/spaces/create/dataset/test', params={'token': 'access_token'})
 
     assert response.status_code == 201
+    assert await job_worker.run_pending() == 1
     mock_space_activity_log.assert_called_once_with('test', 'test')
 
 
 async def test_create_duplicate_space_for_dataset(client, httpx_mock, keycloak_mock, spaces_factory):
-    httpx_mock.add_response(
-        method='POST',
-        url=re.compile('.*/auth/realms/hbp/protocol/openid-connect/token'),
-        status_code=200,
-        json={
-            'access_token': 'TOKEN',
-            'expires_in': 604797,
-            'refresh_expires_in': 0,
-            'token_type': 'Bearer',
-            'id_token': 'TOKEN',
-            'not-before-policy': 0,
-            'scope': 'openid profile roles email',
-        },
-    )
     httpx_mock.add_response(
         method='GET', url=re.compile('.*users/me'), json={'data': {'http://schema.org/alternateName': 'tester'}}
     )
@@ -553,20 +587,6 @@ async def test_create_duplicate_space_for_dataset(client, httpx_mock, keycloak_m
 
 
 async def test_create_duplicate_space_for_project(client, httpx_mock, keycloak_mock, spaces_factory):
-    httpx_mock.add_response(
-        method='POST',
-        url=re.compile('.*/auth/realms/hbp/protocol/openid-connect/token'),
-        status_code=200,
-        json={
-            'access_token': 'TOKEN',
-            'expires_in': 604797,
-            'refresh_expires_in': 0,
-            'token_type': 'Bearer',
-            'id_token': 'TOKEN',
-            'not-before-policy': 0,
-            'scope': 'openid profile roles email',
-        },
-    )
     httpx_mock.add_response(
         method='GET', url=re.compile('.*users/me'), json={'data': {'http://schema.org/alternateName': 'tester'}}
     )
@@ -5,9 +5,17 @@
 # You may not use this file except in compliance with the License.
 
 import re
+from datetime import timedelta
 from uuid import uuid4
 
 import pytest
+from sqlalchemy import func
+from sqlalchemy import update
+
+from kg_integration.core.cache import MISSING
+from kg_integration.models import Jobs
+from kg_integration.utils.auth_manager import AuthManager
+from kg_integration.utils.project_manager import ProjectManager
 
 
 @pytest.mark.asyncio
@@ -96,7 +104,7 @@ async def test_get_user_list_token_exchange_failed(client, httpx_mock):
 
 
 @pytest.mark.asyncio
-async def test_invite_user(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_invite_user(client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker):
     project_id = uuid4()
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -112,13 +120,16 @@ async def test_invite_user(client, external_keycloak_mock, httpx_mock, spaces_fa
     response = await client.post(
         f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
 
     assert response.status_code == 204
     assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 3
 
 
 @pytest.mark.asyncio
-async def test_invite_user_not_all_spaces_are_created(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_invite_user_not_all_spaces_are_created(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker
+):
     project_id = uuid4()
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -133,13 +144,16 @@ async def test_invite_user_not_all_spaces_are_created(client, external_keycloak_
     response = await client.post(
         f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
 
     assert response.status_code == 204
     assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 2
 
 
 @pytest.mark.asyncio
-async def test_invite_user_remote_service_error(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_invite_user_remote_service_error(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker, jobs_crud
+):
     project_id = uuid4()
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -157,11 +171,61 @@ async def test_invite_user_remote_service_error(client, external_keycloak_mock,
     response = await client.post(
         f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
+
+    job = (await jobs_crud.scalars(jobs_crud.select_query)).one()
     assert response.status_code == 204
+    # backoff of CollabManager retries each call 5 times, then the job is rescheduled
+    assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 15
+    assert job.status == 'queued'
+    assert job.result['succeeded'] == []
+    assert sorted(job.result['failed']) == ['dataset_test1', 'dataset_test2', 'dataset_test3']
+    assert 'test_error_message' in job.result['failed']['dataset_test1']
+    assert 'DatasetsUpdateFailed' in job.last_error
 
 
 @pytest.mark.asyncio
-async def test_remove_user(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_invite_user_partial_failure_retries_only_failed_datasets(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker, jobs_crud
+):
+    project_id = uuid4()
+    await spaces_factory.create('dataset_test1', 'tester')
+    await spaces_factory.create('dataset_test2', 'tester')
+    await spaces_factory.create('dataset_test3', 'tester')
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*datasets.*project_id.*'),
+        status_code=200,
+        json={'result': [{'code': 'dataset_test1'}, {'code': 'dataset_test2'}, {'code': 'dataset_test3'}]},
+    )
+    httpx_mock.add_response(
+        method='PUT', url=re.compile('.*collabs/hdc-dataset_test2/team.*'), status_code=403, json={'error': 'denied'}
+    )
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs/hdc-dataset_test[13]/team.*'), status_code=204)
+
+    await client.post(f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'})
+    await job_worker.run_pending()
+
+    job = (await jobs_crud.scalars(jobs_crud.select_query)).one()
+    assert job.status == 'queued'
+    assert job.result['succeeded'] == ['dataset_test1', 'dataset_test3']
+    assert list(job.result['failed']) == ['dataset_test2']
+    assert 'denied' in job.result['failed']['dataset_test2']
+    assert {'dataset:dataset_test1', 'dataset:dataset_test3'} <= set(job.steps)
+
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs/hdc-dataset_test2/team.*'), status_code=204)
+    await jobs_crud.execute(update(Jobs).where(Jobs.id == job.id).values(run_after=func.now() - timedelta(seconds=1)))
+    await job_worker.run_pending()
+
+    await jobs_crud.session.refresh(job)
+    assert job.status == 'succeeded'
+    assert job.result == {'succeeded': ['dataset_test1', 'dataset_test2', 'dataset_test3'], 'failed': {}}
+    assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*collabs/hdc-dataset_test[13]/team.*'))) == 2
+    assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*collabs/hdc-dataset_test2/team.*'))) == 6
+
+
+@pytest.mark.asyncio
+async def test_remove_user(client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker):
     project_id = uuid4()
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -177,13 +241,16 @@ async def test_remove_user(client, external_keycloak_mock, httpx_mock, spaces_fa
     response = await client.delete(
         f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
 
     assert response.status_code == 204
     assert len(httpx_mock.get_requests(method='DELETE', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 3
 
 
 @pytest.mark.asyncio
-async def test_remove_user_not_all_spaces_are_created(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_remove_user_not_all_spaces_are_created(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker
+):
     project_id = uuid4()
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -198,13 +265,16 @@ async def test_remove_user_not_all_spaces_are_created(client, external_keycloak_
     response = await client.delete(
         f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
 
     assert response.status_code == 204
     assert len(httpx_mock.get_requests(method='DELETE', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 2
 
 
 @pytest.mark.asyncio
-async def test_remove_user_remote_service_error(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_remove_user_remote_service_error(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker, jobs_crud
+):
     project_id = uuid4()
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -225,12 +295,17 @@ async def test_remove_user_remote_service_error(client, external_keycloak_mock,
     response = await client.delete(
         f'/v1/users/{project_id}/test', params={'role': 'administrator', 'token': 'access_token'}
     )
+    await job_worker.run_pending()
 
+    job = (await jobs_crud.scalars(jobs_crud.select_query)).one()
     assert response.status_code == 204
+    assert len(httpx_mock.get_requests(method='DELETE', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 15
+    assert job.status == 'queued'
+    assert 'DatasetsUpdateFailed' in job.last_error
 
 
 @pytest.mark.asyncio
-async def test_update_user(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_update_user(client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker):
     project_id = str(uuid4())
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -248,6 +323,7 @@ async def test_update_user(client, external_keycloak_mock, httpx_mock, spaces_fa
         f'/v1/users/{project_id}/test',
         params={'current_role': 'administrator', 'new_role': 'editor', 'token': 'access_token'},
     )
+    await job_worker.run_pending()
 
     assert response.status_code == 204
     assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 3
@@ -255,7 +331,36 @@ async def test_update_user(client, external_keycloak_mock, httpx_mock, spaces_fa
 
 
 @pytest.mark.asyncio
-async def test_update_user_not_all_spaces_are_created(client, external_keycloak_mock, httpx_mock, spaces_factory):
+async def test_update_user_already_removed_from_current_role(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker, jobs_crud
+):
+    project_id = str(uuid4())
+    await spaces_factory.create('dataset_test1', 'tester')
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*datasets.*project_id.*'),
+        status_code=200,
+        json={'result': [{'code': 'dataset_test1'}]},
+    )
+    httpx_mock.add_response(method='DELETE', url=re.compile('.*collabs.*team.*users.*'), status_code=404)
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs.*team.*users.*'), status_code=204)
+
+    await client.put(
+        f'/v1/users/{project_id}/test',
+        params={'current_role': 'administrator', 'new_role': 'editor', 'token': 'access_token'},
+    )
+    await job_worker.run_pending()
+
+    job = (await jobs_crud.scalars(jobs_crud.select_query)).one()
+    assert job.status == 'succeeded'
+    assert len(httpx_mock.get_requests(method='DELETE', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 1
+    assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 1
+
+
+@pytest.mark.asyncio
+async def test_update_user_not_all_spaces_are_created(
+    client, external_keycloak_mock, httpx_mock, spaces_factory, job_worker
+):
     project_id = str(uuid4())
     await spaces_factory.create('dataset_test1', 'tester')
     await spaces_factory.create('dataset_test2', 'tester')
@@ -272,7 +377,36 @@ async def test_update_user_not_all_spaces_are_created(client, external_keycloak_
         f'/v1/users/{project_id}/test',
         params={'current_role': 'administrator', 'new_role': 'editor', 'token': 'access_token'},
     )
+    await job_worker.run_pending()
 
     assert response.status_code == 204
     assert len(httpx_mock.get_requests(method='PUT', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 2
     assert len(httpx_mock.get_requests(method='DELETE', url=re.compile('.*wiki.ebrains.eu/rest/v1/collabs.*'))) == 2
+
+
+@pytest.mark.asyncio
+async def test_invite_user_invalidates_cached_project_membership(client, settings, httpx_mock):
+    project_id = uuid4()
+    auth_manager = AuthManager(settings)
+    await ProjectManager(settings).cache.set(f'project-code:{project_id}', 'project')
+    await auth_manager.cache.set('project-users:project', [{'username': 'tester'}])
+    await auth_manager.cache.set('project-users:other', [{'username': 'tester'}])
+    httpx_mock.add_response(method='GET', url=re.compile('.*datasets.*project_id.*'), json={'result': []})
+
+    response = await client.post(f'/v1/users/{project_id}/test', params={'role': 'administrator'})
+
+    assert response.status_code == 204
+    assert await auth_manager.cache.get('project-users:project') is MISSING
+    assert await auth_manager.cache.get('project-users:other') == [{'username': 'tester'}]
+
+
+@pytest.mark.asyncio
+async def test_remove_user_invalidates_all_memberships_when_project_is_unknown(client, settings, httpx_mock):
+    auth_manager = AuthManager(settings)
+    await auth_manager.cache.set('project-users:project', [{'username': 'tester'}])
+    httpx_mock.add_response(method='GET', url=re.compile('.*datasets.*project_id.*'), json={'result': []})
+
+    response = await client.delete(f'/v1/users/{uuid4()}/test', params={'role': 'administrator'})
+
+    assert response.status_code == 204
+    assert await auth_manager.cache.get('project-users:project') is MISSING
@@ -0,0 +1,267 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import re
+import time
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+from prometheus_client import REGISTRY
+from redis import ConnectionError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kg_integration.core.cache import MISSING
+from kg_integration.core.cache import CacheBackend
+from kg_integration.core.cache import MemoryBackend
+from kg_integration.core.cache import RedisBackend
+from kg_integration.core.cache import TTLCache
+from kg_integration.core.exceptions import NotFound
+from kg_integration.core.exceptions import UnhandledException
+from kg_integration.models import SpacesCRUD
+from kg_integration.utils.auth_manager import AuthManager
+from kg_integration.utils.dataset_manager import DatasetManager
+from kg_integration.utils.kg_manager import KGManager
+from kg_integration.utils.project_manager import ProjectManager
+
+
+def cache_requests(cache: str, result: str) -> float:
+    return REGISTRY.get_sample_value('kg_integration_cache_requests_total', {'cache': cache, 'result': result}) or 0
+
+
+async def test_ttl_cache_evicts_least_recently_used_entries():
+    cache = TTLCache('test', MemoryBackend(maxsize=2), ttl=60)
+    await cache.set('first', 1)
+    await cache.set('second', 2)
+    await cache.get('first')
+    await cache.set('third', 3)
+
+    assert await cache.get('first') == 1
+    assert await cache.get('second') is MISSING
+    assert await cache.get('third') == 3
+
+
+async def test_ttl_cache_expires_entries():
+    cache = TTLCache('test', MemoryBackend(maxsize=2), ttl=60)
+    await cache.set('key', 'value')
+    await cache.set('short', 'value', ttl=0)
+
+    with mock.patch('kg_integration.core.cache.time.monotonic', return_value=10**9):
+        assert await cache.get('key') is MISSING
+    assert await cache.get('short') is MISSING
+
+
+async def test_ttl_cache_namespaces_keys():
+    backend = MemoryBackend(maxsize=10)
+    first = TTLCache('first', backend, ttl=60, namespace='service')
+    second = TTLCache('second', backend, ttl=60, namespace='service')
+    await first.set('key', 1)
+    await second.set('key', 2)
+    await first.clear()
+
+    assert list(backend.entries) == ['service:second:key']
+    assert await second.get('key') == 2
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+async def test_memory_backend_returns_copies_of_serialized_entries():
+    cache = TTLCache('test', MemoryBackend(maxsize=2), ttl=60)
+    value = {'users': ['first']}
+    await cache.set('key', value)
+    value['users'].append('second')
+
+    cached = await cache.get('key')
+    cached['users'].append('third')
+
+    assert await cache.get('key') == {'users': ['first']}
+
+
+async def test_memory_backend_rejects_values_which_can_not_be_shared():
+    cache = TTLCache('test', MemoryBackend(maxsize=2), ttl=60)
+
+    with pytest.raises(TypeError):
+        await cache.set('key', uuid4())
+
+
+async def test_redis_backend_stores_serialized_entries_with_expiration():
+    client = mock.AsyncMock()
+    client.get.return_value = b'{"value": "cached", "refresh_at": 0}'
+    cache = TTLCache('test', RedisBackend(client), ttl=1.5, namespace='service')
+
+    await cache.set('key', 'value', refresh_after=0)
+
+    assert client.set.await_args.args[0] == 'service:test:key'
+    assert client.set.await_args.kwargs == {'px': 1500}
+    assert await cache.get('key') == 'cached'
+
+
+async def test_redis_backend_treats_unavailable_redis_as_empty_cache():
+    client = mock.AsyncMock()
+    client.get.side_effect = ConnectionError()
+    client.set.side_effect = ConnectionError()
+    cache = TTLCache('test', RedisBackend(client), ttl=60)
+    loader = mock.AsyncMock(return_value='value')
+
+    assert await cache.get_or_load('key', loader) == 'value'
+    assert await cache.get_or_load('key', loader) == 'value'
+    assert loader.await_count == 2
+
+
+async def test_ttl_cache_get_or_load_does_not_cache_errors():
+    cache = TTLCache('test_errors', MemoryBackend(maxsize=2), ttl=60)
+    loader = mock.AsyncMock(side_effect=[UnhandledException(), 'value'])
+
+    with pytest.raises(UnhandledException):
+        await cache.get_or_load('key', loader)
+    assert await cache.get_or_load('key', loader) == 'value'
+    assert await cache.get_or_load('key', loader) == 'value'
+
+    assert loader.await_count == 2
+    assert cache_requests('test_errors', 'hit') == 1
+    assert cache_requests('test_errors', 'miss') == 2
+
+
+async def test_ttl_cache_get_or_load_refreshes_old_entries_in_background():
+    cache = TTLCache('test_refresh', MemoryBackend(maxsize=2), ttl=60)
+    loader = mock.AsyncMock(side_effect=['old', 'new'])
+
+    assert await cache.get_or_load('key', loader, refresh_after=0) == 'old'
+    assert await cache.get_or_load('key', loader, refresh_after=0) == 'old'
+    await asyncio.gather(*cache.refreshing.values())
+
+    assert await cache.get('key') == 'new'
+    assert loader.await_count == 2
+
+
+async def test_ttl_cache_keeps_value_when_background_refresh_fails():
+    cache = TTLCache('test_refresh', MemoryBackend(maxsize=2), ttl=60)
+    loader = mock.AsyncMock(side_effect=['old', UnhandledException()])
+
+    await cache.get_or_load('key', loader, refresh_after=0)
+    await cache.get_or_load('key', loader, refresh_after=0)
+    await asyncio.gather(*cache.refreshing.values())
+
+    assert await cache.get('key') == 'old'
+    assert not cache.refreshing
+
+
+async def test_dataset_manager_caches_openminds_template(settings, httpx_mock):
+    template_id = str(uuid4())
+    dataset_manager = DatasetManager(settings)
+    httpx_mock.add_response(
+        method='POST',
+        url=re.compile('.*dataset/default/schemaTPL/list.*'),
+        json={'result': [{'name': 'Other', 'geid': str(uuid4())}, {'name': 'Open_minds', 'geid': template_id}]},
+    )
+
+    assert await dataset_manager.get_openminds_template() == template_id
+    assert await DatasetManager(settings).get_openminds_template() == template_id
+    assert len(httpx_mock.get_requests()) == 1
+
+    assert await dataset_manager.get_openminds_template(refresh=True) == template_id
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_dataset_manager_caches_dataset_code(settings, httpx_mock):
+    dataset_id = uuid4()
+    dataset_manager = DatasetManager(settings)
+    httpx_mock.add_response(method='GET', url=re.compile(f'.*/datasets/{dataset_id}$'), json={'code': 'dataset'})
+
+    first = await dataset_manager.get_dataset_code(dataset_id)
+    second = await DatasetManager(settings).get_dataset_code(dataset_id)
+    await dataset_manager.invalidate_dataset(dataset_id=dataset_id)
+    third = await dataset_manager.get_dataset_code(dataset_id)
+
+    assert first == second == third == 'dataset'
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_project_manager_caches_project_code(settings, httpx_mock):
+    project_manager = ProjectManager(settings)
+    httpx_mock.add_response(method='GET', url=re.compile('.*/projects/pid$'), json={'code': 'project'})
+
+    assert await project_manager.get_project_code('pid') == 'project'
+    assert await project_manager.get_project_code('pid') == 'project'
+    assert len(httpx_mock.get_requests()) == 1
+
+    await project_manager.invalidate_project('pid')
+
+    assert await project_manager.get_cached_project_code('pid') is None
+    assert await project_manager.get_project_code('pid') == 'project'
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_kg_manager_caches_spaces_per_user(settings, httpx_mock, jwt_factory):
+    first_token = jwt_factory(sub='first')
+    second_token = jwt_factory(sub='second')
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*v3/spaces$'),
+        match_headers={'Authorization': f'Bearer {first_token}'},
+        json={'data': [{'http://schema.org/name': 'first'}]},
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile('.*v3/spaces$'),
+        match_headers={'Authorization': f'Bearer {second_token}'},
+        json={'data': [{'http://schema.org/name': 'second'}]},
+    )
+    kg_manager = KGManager(settings)
+
+    assert await kg_manager.get_spaces(first_token) == [{'http://schema.org/name': 'first'}]
+    assert await kg_manager.get_spaces(second_token) == [{'http://schema.org/name': 'second'}]
+    assert await kg_manager.get_spaces(jwt_factory(sub='first', exp=1)) == [{'http://schema.org/name': 'first'}]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_kg_manager_caches_user_details_until_token_expires(settings, httpx_mock, jwt_factory):
+    user = {'http://schema.org/alternateName': 'user'}
+    httpx_mock.add_response(method='GET', url=re.compile('.*v3/users/me$'), json={'data': user})
+    kg_manager = KGManager(settings)
+
+    assert await kg_manager.get_user_details(jwt_factory(sub='user', exp=time.time() + 60)) == user
+    assert await kg_manager.get_user_details(jwt_factory(sub='user', exp=time.time() + 120)) == user
+    assert len(httpx_mock.get_requests()) == 1
+
+    assert await kg_manager.get_user_details(jwt_factory(sub='expired', exp=1)) == user
+    assert await kg_manager.get_user_details(jwt_factory(sub='expired', exp=1)) == user
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_auth_manager_caches_project_users(settings, httpx_mock):
+    users = [{'username': 'tester', 'role': 'project-admin'}]
+    httpx_mock.add_response(method='POST', url=re.compile('.*admin/roles/users$'), json={'result': users})
+    auth_manager = AuthManager(settings)
+
+    assert await auth_manager.get_project_users('project') == users
+    assert await AuthManager(settings).get_project_users('project') == users
+    assert len(httpx_mock.get_requests()) == 1
+
+    await auth_manager.invalidate_project_users('project')
+
+    assert await auth_manager.get_project_users('project') == users
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_missing_space_is_forgotten_when_its_creation_is_committed(settings, create_db):
+    async with AsyncSession(create_db) as writer, AsyncSession(create_db) as reader:
+        with pytest.raises(NotFound):
+            await SpacesCRUD(reader).retrieve_by_name('new')
+
+        await SpacesCRUD(writer).create_space('new', 'tester')
+        # lookup running concurrently with the creation does not see the space yet
+        with pytest.raises(NotFound):
+            await SpacesCRUD(reader).retrieve_by_name('new')
+        await writer.commit()
+
+        space = await SpacesCRUD(reader).retrieve_by_name('new')
+
+    assert space.name == 'new'
@@ -0,0 +1,65 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import re
+
+import pytest
+
+from kg_integration.utils.collab_manager import CollabManager
+
+PROJECT_USERS = [
+    {'username': 'admin', 'permission': 'admin'},
+    {'username': 'promoted', 'permission': 'collaborator'},
+    {'username': 'newcomer', 'permission': 'contributor'},
+]
+
+
+@pytest.fixture
+def collab_manager(settings) -> CollabManager:
+    yield CollabManager(settings)
+
+
+def test_compute_team_delta():
+    team = {'admin': {'administrator'}, 'promoted': {'viewer'}, 'former': {'editor'}}
+    desired = {'admin': 'administrator', 'promoted': 'editor', 'newcomer': 'viewer'}
+
+    additions, removals = CollabManager.compute_team_delta(team, desired)
+    _, removals_with_extra = CollabManager.compute_team_delta(team, desired, remove_extra=True)
+
+    assert additions == [('promoted', 'editor'), ('newcomer', 'viewer')]
+    assert removals == [('promoted', 'viewer')]
+    assert removals_with_extra == [('promoted', 'viewer'), ('former', 'editor')]
+
+
+async def test_sync_users_in_collab_applies_only_delta(collab_manager, httpx_mock):
+    teams = {'administrator': ['admin'], 'editor': [], 'viewer': ['promoted']}
+    for role, usernames in teams.items():
+        httpx_mock.add_response(
+            method='GET',
+            url=re.compile(f'.*collabs/hdc-test/team/{role}$'),
+            json={'users': [{'username': username} for username in usernames], 'units': [], 'groups': []},
+        )
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs/hdc-test/team/.*/users/.*'), status_code=204)
+    httpx_mock.add_response(method='DELETE', url=re.compile('.*collabs/hdc-test/team/.*/users/.*'), status_code=204)
+
+    result = await collab_manager.sync_users_in_collab('hdc-test', PROJECT_USERS, 'token')
+
+    written = sorted(request.url.path for request in httpx_mock.get_requests() if request.method != 'GET')
+    assert result == {'added': 2, 'removed': 1}
+    assert written == [
+        '/rest/v1/collabs/hdc-test/team/editor/users/promoted',
+        '/rest/v1/collabs/hdc-test/team/viewer/users/newcomer',
+        '/rest/v1/collabs/hdc-test/team/viewer/users/promoted',
+    ]
+
+
+async def test_sync_users_in_collab_full_mode_adds_everyone(collab_manager, httpx_mock):
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs/hdc-test/team/.*/users/.*'), status_code=409)
+
+    result = await collab_manager.sync_users_in_collab('hdc-test', PROJECT_USERS, 'token', delta=False)
+
+    assert result == {'added': 3, 'removed': 0}
+    assert len(httpx_mock.get_requests(method='PUT')) == 3
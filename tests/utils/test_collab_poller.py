@@ -0,0 +1,99 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import re
+
+import httpx
+import pytest
+
+from kg_integration.core.exceptions import UnhandledException
+from kg_integration.utils.collab_poller import CollabStatusPoller
+
+
+@pytest.fixture
+def collab_poller(settings, monkeypatch) -> CollabStatusPoller:
+    monkeypatch.setattr(settings, 'COLLAB_POLL_MIN_INTERVAL', 0.01)
+    monkeypatch.setattr(settings, 'COLLAB_POLL_MAX_INTERVAL', 0.05)
+    monkeypatch.setattr(settings, 'COLLAB_POLL_TIMEOUT', 1)
+    yield CollabStatusPoller(settings)
+
+
+async def test_collab_poller_shares_polls_between_waiters(collab_poller, httpx_mock):
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-first'), status_code=404)
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-first'), status_code=200)
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-second'), status_code=200)
+
+    await asyncio.gather(
+        collab_poller.wait_until_ready('hdc-first', 'token'),
+        collab_poller.wait_until_ready('hdc-first', 'token'),
+        collab_poller.wait_until_ready('hdc-second', 'token'),
+    )
+
+    assert len(httpx_mock.get_requests(url=re.compile('.*collabs/hdc-first'))) == 2
+    assert len(httpx_mock.get_requests(url=re.compile('.*collabs/hdc-second'))) == 1
+    assert collab_poller.pending == {}
+
+
+async def test_collab_poller_limits_polls_per_round(collab_poller, httpx_mock, monkeypatch):
+    monkeypatch.setattr(collab_poller, 'batch_size', 2)
+    in_flight = []
+    max_in_flight = []
+
+    async def respond(request):
+        in_flight.append(request)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(request)
+        return httpx.Response(status_code=200)
+
+    httpx_mock.add_callback(respond, url=re.compile('.*collabs/hdc-.*'))
+
+    await asyncio.gather(*(collab_poller.wait_until_ready(f'hdc-{i}', 'token') for i in range(5)))
+
+    assert max(max_in_flight) == 2
+
+
+async def test_collab_poller_gives_up_after_timeout(collab_poller, httpx_mock, monkeypatch):
+    monkeypatch.setattr(collab_poller, 'wait_timeout', 0.1)
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-stuck'), status_code=404)
+
+    with pytest.raises(UnhandledException):
+        await collab_poller.wait_until_ready('hdc-stuck', 'token')
+
+
+async def test_collab_poller_serves_waiter_arriving_during_shutdown(collab_poller, httpx_mock, monkeypatch):
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-first'), status_code=200)
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-second'), status_code=200)
+    closing = asyncio.Event()
+    aexit = httpx.AsyncClient.__aexit__
+
+    async def slow_aexit(client, *args):
+        closing.set()
+        await asyncio.sleep(0.05)
+        return await aexit(client, *args)
+
+    monkeypatch.setattr(httpx.AsyncClient, '__aexit__', slow_aexit)
+    first = asyncio.create_task(collab_poller.wait_until_ready('hdc-first', 'token'))
+    await closing.wait()
+
+    await asyncio.wait_for(collab_poller.wait_until_ready('hdc-second', 'token'), 1)
+    await first
+    await collab_poller.scheduler
+
+    assert len(httpx_mock.get_requests(url=re.compile('.*collabs/hdc-second'))) == 1
+    assert collab_poller.pending == {}
+
+
+async def test_collab_poller_fails_waiters_when_cancelled(collab_poller, httpx_mock):
+    httpx_mock.add_response(method='GET', url=re.compile('.*collabs/hdc-slow'), status_code=404)
+    waiter = asyncio.create_task(collab_poller.wait_until_ready('hdc-slow', 'token'))
+    await asyncio.sleep(0.02)
+
+    collab_poller.scheduler.cancel()
+
+    with pytest.raises(UnhandledException):
+        await waiter
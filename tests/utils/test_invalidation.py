@@ -0,0 +1,85 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from unittest import mock
+
+import pytest_asyncio
+
+from kg_integration.core.cache import MISSING
+from kg_integration.core.cache import TTLCache
+from kg_integration.core.cache import get_cache
+from kg_integration.core.cache import set_invalidation_publisher
+from kg_integration.core.invalidation import CacheInvalidationBus
+
+
+async def wait_for_eviction(cache: TTLCache, key: str, timeout: float = 5) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        if await cache.get(key) is MISSING:
+            return True
+        await asyncio.sleep(0.05)
+
+    return False
+
+
+@pytest_asyncio.fixture()
+async def listening_bus(create_db) -> CacheInvalidationBus:
+    bus = CacheInvalidationBus(create_db, reconnect_delay=0.1)
+    bus.start()
+    await asyncio.wait_for(bus.listening.wait(), 5)
+    yield bus
+    await bus.close()
+
+
+async def test_invalidation_published_by_another_process_evicts_local_entry(settings, create_db, listening_bus):
+    cache = get_cache(settings, 'test_bus', 10, 60)
+    await cache.set('key', 'value')
+    await cache.set('other', 'value')
+
+    await CacheInvalidationBus(create_db).publish('test_bus', 'key')
+
+    assert await wait_for_eviction(cache, 'key')
+    assert await cache.get('other') == 'value'
+
+
+async def test_invalidation_published_with_session_is_delivered_on_commit(
+    settings, create_db, db_session, listening_bus
+):
+    cache = get_cache(settings, 'test_bus', 10, 60)
+    await cache.set('key', 'value')
+
+    await CacheInvalidationBus(create_db).publish('test_bus', 'key', session=db_session)
+    await asyncio.sleep(0.2)
+    assert await cache.get('key') == 'value'
+
+    await db_session.commit()
+    assert await wait_for_eviction(cache, 'key')
+
+
+async def test_invalidation_published_by_same_process_is_ignored(settings, listening_bus):
+    cache = get_cache(settings, 'test_bus', 10, 60)
+    await cache.set('key', 'value')
+
+    await listening_bus.handle(f'{{"origin": "{listening_bus.origin}", "cache": "test_bus", "key": "key"}}')
+
+    assert await cache.get('key') == 'value'
+
+
+async def test_cache_invalidate_evicts_locally_and_publishes(settings):
+    publisher = mock.AsyncMock()
+    cache = get_cache(settings, 'test_bus', 10, 60)
+    await cache.set('key', 'value')
+
+    set_invalidation_publisher(publisher)
+    try:
+        await cache.invalidate('key')
+    finally:
+        set_invalidation_publisher(None)
+
+    assert await cache.get('key') is MISSING
+    publisher.assert_awaited_once_with('test_bus', 'key', session=None)
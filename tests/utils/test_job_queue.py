@@ -0,0 +1,147 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from unittest import mock
+
+from kg_integration.core.exceptions import DatasetsUpdateFailed
+from kg_integration.core.exceptions import RemoteServiceException
+from kg_integration.models import JobsCRUD
+from kg_integration.utils.job_queue import JobWorker
+
+
+async def test_claimed_job_is_not_claimed_twice(jobs_crud):
+    job = await jobs_crud.enqueue('create_space', {'space_name': 'test', 'users': []}, max_attempts=3)
+
+    claimed = await jobs_crud.claim(visibility_timeout=60)
+    claimed_again = await jobs_crud.claim(visibility_timeout=60)
+
+    assert claimed.id == job.id
+    assert claimed.status == 'running'
+    assert claimed.attempts == 1
+    assert claimed_again is None
+
+
+async def test_abandoned_job_is_claimed_again(jobs_crud, db_session):
+    job = await jobs_crud.enqueue('create_space', {'space_name': 'test', 'users': []}, max_attempts=3)
+    await jobs_crud.claim(visibility_timeout=0)
+    await db_session.commit()
+
+    claimed = await jobs_crud.claim(visibility_timeout=60)
+
+    assert claimed.id == job.id
+    assert claimed.attempts == 2
+
+
+async def test_abandoned_job_is_dead_lettered_after_last_attempt(jobs_crud, db_session):
+    job = await jobs_crud.enqueue('create_space', {'space_name': 'test', 'users': []}, max_attempts=1)
+    await jobs_crud.claim(visibility_timeout=0)
+    await db_session.commit()
+
+    assert await jobs_crud.dead_letter_abandoned() == 1
+    await db_session.refresh(job)
+    assert job.status == 'dead'
+
+
+async def test_failed_job_is_rescheduled(jobs_crud, job_worker, db_session):
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=3)
+
+    with mock.patch.object(JobWorker, 'run_task', side_effect=RemoteServiceException(500, 'Collab is down')):
+        assert await job_worker.run_pending() == 1
+
+    await db_session.refresh(job)
+    assert job.status == 'queued'
+    assert job.attempts == 1
+    assert 'Collab is down' in job.last_error
+    assert job.run_after > job.created_at
+
+
+async def test_failed_job_is_dead_lettered_after_last_attempt(jobs_crud, job_worker, db_session):
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=1)
+
+    with mock.patch.object(JobWorker, 'run_task', side_effect=RemoteServiceException(500, 'Collab is down')):
+        await job_worker.run_pending()
+
+    await db_session.refresh(job)
+    assert job.status == 'dead'
+    assert 'Collab is down' in job.last_error
+
+
+async def test_dead_lettered_job_stores_partial_result(jobs_crud, job_worker, db_session):
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=1)
+    error = DatasetsUpdateFailed(['first'], {'second': 'Collab is down'})
+
+    with mock.patch.object(JobWorker, 'run_task', side_effect=error):
+        await job_worker.run_pending()
+
+    await db_session.refresh(job)
+    assert job.status == 'dead'
+    assert job.result == {'succeeded': ['first'], 'failed': {'second': 'Collab is down'}}
+
+
+async def test_succeeded_job_stores_result(jobs_crud, job_worker, db_session):
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=3)
+
+    with mock.patch.object(JobWorker, 'run_task', return_value={'succeeded': ['test']}):
+        await job_worker.run_pending()
+
+    await db_session.refresh(job)
+    assert job.status == 'succeeded'
+    assert job.result == {'succeeded': ['test']}
+
+
+def test_retry_delay_grows_and_is_capped(settings):
+    settings.JOBS_RETRY_BASE_DELAY = 10
+    settings.JOBS_RETRY_MAX_DELAY = 60
+    job_worker = JobWorker(settings, session_factory=None)
+
+    assert 5 <= job_worker.retry_delay(1) <= 10
+    assert 20 <= job_worker.retry_delay(3) <= 40
+    assert 30 <= job_worker.retry_delay(10) <= 60
+
+
+async def test_outcome_of_expired_attempt_is_not_recorded(jobs_crud, job_worker, db_session):
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=3)
+    expired = await jobs_crud.claim(visibility_timeout=0)
+    await db_session.commit()
+    db_session.expunge(expired)
+    await jobs_crud.claim(visibility_timeout=60)
+    await db_session.commit()
+
+    with mock.patch.object(JobWorker, 'run_task', return_value={'succeeded': ['test']}):
+        await job_worker.process(expired)
+
+    job = await jobs_crud.retrieve_by_pk(job.id)
+    assert job.status == 'running'
+    assert job.attempts == 2
+    assert job.result is None
+
+
+async def test_lease_is_extended_while_job_is_running(jobs_crud, job_worker, db_session):
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=3)
+    claimed = await jobs_crud.claim(visibility_timeout=3)
+    await db_session.commit()
+    job_worker.heartbeat_interval = 0.5
+
+    async def run_task(*args, **kwargs):
+        await asyncio.sleep(1.2)
+
+    with mock.patch.object(JobWorker, 'run_task', side_effect=run_task):
+        with mock.patch.object(JobsCRUD, 'extend_lease', wraps=jobs_crud.extend_lease) as extend_lease:
+            await job_worker.process(claimed)
+
+    assert extend_lease.call_count == 2
+    extend_lease.assert_called_with(job.id, 1, job_worker.visibility_timeout)
+    await db_session.refresh(job)
+    assert job.status == 'succeeded'
+
+
+async def test_abandoned_jobs_are_dead_lettered_once_per_maintenance_interval(job_worker):
+    with mock.patch.object(JobsCRUD, 'dead_letter_abandoned', return_value=0) as dead_letter_abandoned:
+        await job_worker.run_once()
+        await job_worker.run_once()
+
+    dead_letter_abandoned.assert_called_once()
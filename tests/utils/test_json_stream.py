@@ -0,0 +1,53 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import json
+
+import pytest
+
+from kg_integration.utils.json_stream import ArrayItemsParser
+
+
+def parse(text: str, chunk_size: int, key: str = 'data') -> tuple[list, ArrayItemsParser]:
+    parser = ArrayItemsParser(key)
+    items = []
+    for start in range(0, len(text), chunk_size):
+        items.extend(parser.feed(text[start : start + chunk_size]))
+    items.extend(parser.close())
+    return items, parser
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 17, 1024])
+def test_array_items_parser_yields_items_of_any_chunking(chunk_size):
+    data = [{'@id': 'a', 'name': 'Jörg "J" \\ Müller'}, [1, 2.5e3], 'text', 12345, None, True]
+    text = json.dumps({'message': None, 'total': 123456, 'nested': {'data': [0]}, 'data': data, 'from': 0}, indent=2)
+
+    items, parser = parse(text, chunk_size)
+
+    assert items == data
+    assert parser.found is True
+
+
+def test_array_items_parser_yields_items_before_the_document_is_complete():
+    parser = ArrayItemsParser('data')
+
+    assert list(parser.feed('{"data": [{"id": 1}, {"id": 2}, {"i')) == [{'id': 1}, {'id': 2}]
+    assert list(parser.feed('d": 3}]}')) == [{'id': 3}]
+    assert list(parser.close()) == []
+
+
+@pytest.mark.parametrize('text', ['{"data": null}', '{"other": [1]}', '{}'])
+def test_array_items_parser_reports_missing_array(text):
+    items, parser = parse(text, 2)
+
+    assert items == []
+    assert parser.found is False
+
+
+@pytest.mark.parametrize('text', ['', '[1]', '{"data": [1,', '{"data": {"a": 1}}', '{"data": [1]} []', '{"data": nul}'])
+def test_array_items_parser_rejects_invalid_documents(text):
+    with pytest.raises(json.JSONDecodeError):
+        parse(text, 4)
@@ -0,0 +1,61 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from kg_integration.utils.jsonld import CONTEXT
+from kg_integration.utils.jsonld import compact
+from kg_integration.utils.jsonld import compact_iri
+from kg_integration.utils.jsonld import expand
+
+DATASET_VERSION = {
+    '@id': 'https://kg.ebrains.eu/api/instances/9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+    '@type': 'https://openminds.ebrains.eu/core/DatasetVersion',
+    'https://openminds.ebrains.eu/vocab/shortName': 'dataset',
+    'https://openminds.ebrains.eu/vocab/author': [
+        {'@id': 'https://kg.ebrains.eu/api/instances/0d3137ad-ff53-46dc-b68e-b781edc3e37b'}
+    ],
+    'https://core.kg.ebrains.eu/vocab/meta/revision': 'rev',
+    'http://example.org/other': 'https://openminds.ebrains.eu/vocab/value',
+}
+
+
+def test_compact_iri_uses_longest_prefix():
+    assert compact_iri('https://openminds.ebrains.eu/vocab/shortName') == 'omv:shortName'
+    assert compact_iri('https://openminds.ebrains.eu/core/Person') == 'om:core/Person'
+    assert compact_iri('http://example.org/name') == 'http://example.org/name'
+
+
+def test_compact_keeps_values_other_than_identifiers():
+    compacted = compact(DATASET_VERSION)
+
+    assert compacted == {
+        '@id': 'kg:9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+        '@type': 'om:core/DatasetVersion',
+        'omv:shortName': 'dataset',
+        'omv:author': [{'@id': 'kg:0d3137ad-ff53-46dc-b68e-b781edc3e37b'}],
+        'kgmeta:revision': 'rev',
+        'http://example.org/other': 'https://openminds.ebrains.eu/vocab/value',
+    }
+
+
+def test_expand_reverses_compact():
+    assert expand({'@context': CONTEXT, **compact(DATASET_VERSION)}) == DATASET_VERSION
+
+
+def test_expand_keeps_document_with_other_context():
+    data = {
+        '@context': {'@vocab': 'https://openminds.ebrains.eu/vocab/', 'om': 'https://openminds.ebrains.eu/'},
+        '@type': 'om:core/Person',
+        'givenName': 'Matvey',
+        'omv:shortName': 'dataset',
+    }
+
+    assert expand(data) is data
+
+
+def test_expand_keeps_document_without_context():
+    data = {'omv:shortName': 'dataset', '@id': 'kg:9bd75916-4dce-49f6-a70b-878cc7f36cf7'}
+
+    assert expand(data) is data
@@ -0,0 +1,79 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import re
+
+import pytest
+
+from kg_integration.core.exceptions import RemoteServiceException
+from kg_integration.utils.kg_manager import KGManager
+
+
+def add_page(httpx_mock, from_: int, size: int, total: int | None) -> None:
+    data = [{'@id': f'instance-{index}'} for index in range(from_, min(from_ + size, total or from_ + size))]
+    body = {'data': data, 'size': len(data), 'from': from_}
+    if total is not None:
+        body['total'] = total
+    httpx_mock.add_response(method='GET', url=re.compile(f'.*instances.*from={from_}&size={size}$'), json=body)
+
+
+async def test_iter_metadata_walks_all_pages(settings, httpx_mock):
+    for from_ in (0, 2, 4):
+        add_page(httpx_mock, from_, 2, 5)
+
+    instances = [
+        instance async for instance in KGManager(settings).iter_metadata('myspace', 'IN_PROGRESS', 'person', 'token', 2)
+    ]
+
+    assert [instance['@id'] for instance in instances] == [f'instance-{index}' for index in range(5)]
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_iter_metadata_stops_on_short_page_without_total(settings, httpx_mock):
+    add_page(httpx_mock, 0, 3, None)
+    httpx_mock.add_response(
+        method='GET', url=re.compile('.*instances.*from=3&size=3$'), json={'data': [{'@id': 'instance-3'}]}
+    )
+
+    instances = [
+        instance async for instance in KGManager(settings).iter_metadata('myspace', 'IN_PROGRESS', 'person', 'token', 3)
+    ]
+
+    assert len(instances) == 4
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_iter_metadata_prefetches_next_page(settings, httpx_mock):
+    add_page(httpx_mock, 0, 2, 4)
+    add_page(httpx_mock, 2, 2, 4)
+    instances = KGManager(settings).iter_metadata('myspace', 'IN_PROGRESS', 'person', 'token', 2)
+
+    await anext(instances)
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert len(httpx_mock.get_requests()) == 2
+    await instances.aclose()
+
+
+async def test_iter_metadata_raises_page_errors(settings, httpx_mock):
+    add_page(httpx_mock, 0, 2, 4)
+    httpx_mock.add_response(method='GET', url=re.compile('.*instances.*from=2&size=2$'), status_code=500, text='error')
+
+    with pytest.raises(RemoteServiceException):
+        async for _ in KGManager(settings).iter_metadata('myspace', 'IN_PROGRESS', 'person', 'token', 2):
+            pass
+
+
+async def test_get_metadata_collects_all_pages(settings, httpx_mock, monkeypatch):
+    monkeypatch.setattr(settings, 'KG_PAGE_SIZE', 2)
+    for from_ in (0, 2):
+        add_page(httpx_mock, from_, 2, 3)
+
+    instances = await KGManager(settings).get_metadata('myspace', 'IN_PROGRESS', 'person', 'token')
+
+    assert [instance['@id'] for instance in instances] == ['instance-0', 'instance-1', 'instance-2']
@@ -0,0 +1,156 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import re
+from datetime import timedelta
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import func
+from sqlalchemy import update
+
+from kg_integration.models import Sweeps
+from kg_integration.models import SweepsCRUD
+from kg_integration.utils.membership_sweeper import CallBudget
+from kg_integration.utils.membership_sweeper import MembershipSweeper
+
+
+@pytest.fixture
+def sweeper(settings, job_worker, monkeypatch) -> MembershipSweeper:
+    monkeypatch.setattr(settings, 'SWEEPER_BATCH_SIZE', 2)
+    yield MembershipSweeper(settings, job_worker.session_factory)
+
+
+def drift_fixed(change: str) -> float:
+    return REGISTRY.get_sample_value('kg_integration_membership_drift_fixed_total', {'change': change}) or 0
+
+
+async def test_sweeps_claim_batches_with_cursor(db_session, spaces_factory):
+    for name in ('space_c', 'space_a', 'space_b'):
+        await spaces_factory.create(name, 'tester')
+    sweeps_crud = SweepsCRUD(db_session)
+
+    first = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+    await sweeps_crud.complete_batch('test', first[-1].name)
+    second = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+    await sweeps_crud.complete_batch('test', second[-1].name)
+    finished = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+    not_due = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+    restarted = await sweeps_crud.claim_batch('test', 2, interval=0, timeout=60)
+
+    assert [space.name for space in first] == ['space_a', 'space_b']
+    assert [space.name for space in second] == ['space_c']
+    assert finished == []
+    assert not_due == []
+    assert [space.name for space in restarted] == ['space_a', 'space_b']
+
+
+async def test_sweeps_claim_unfinished_batch_again_after_timeout(db_session, spaces_factory):
+    for name in ('space_c', 'space_a', 'space_b'):
+        await spaces_factory.create(name, 'tester')
+    sweeps_crud = SweepsCRUD(db_session)
+
+    held = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+    while_held = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+    await db_session.execute(update(Sweeps).values(batch_until=func.now() - timedelta(seconds=1)))
+    after_timeout = await sweeps_crud.claim_batch('test', 2, interval=3600, timeout=60)
+
+    assert [space.name for space in held] == ['space_a', 'space_b']
+    assert while_held == []
+    assert [space.name for space in after_timeout] == ['space_a', 'space_b']
+
+
+async def test_sweeper_fixes_membership_drift(sweeper, db_session, spaces_factory, external_keycloak_mock, httpx_mock):
+    await spaces_factory.create('dataset_test', 'creator')
+    httpx_mock.add_response(method='GET', url=re.compile('.*/datasets/dataset_test$'), json={'project_id': 'pid'})
+    httpx_mock.add_response(method='GET', url=re.compile('.*/projects/pid$'), json={'code': 'project_test'})
+    httpx_mock.add_response(
+        method='POST',
+        url=re.compile('.*admin/roles/users'),
+        json={
+            'result': [
+                {'username': 'creator', 'permission': 'contributor'},
+                {'username': 'admin', 'permission': 'admin'},
+                {'username': 'newcomer', 'permission': 'collaborator'},
+            ]
+        },
+    )
+    teams = {'administrator': ['creator', 'admin'], 'editor': [], 'viewer': []}
+    for role, usernames in teams.items():
+        httpx_mock.add_response(
+            method='GET',
+            url=re.compile(f'.*collabs/hdc-dataset_test/team/{role}$'),
+            json={'users': [{'username': username} for username in usernames], 'units': [], 'groups': []},
+        )
+    httpx_mock.add_response(method='PUT', url=re.compile('.*collabs/hdc-dataset_test/team/editor/users/newcomer'))
+    fixed_before = drift_fixed('add')
+
+    swept = await sweeper.sweep_batch()
+
+    assert swept == 1
+    sweep = await db_session.get(Sweeps, 'membership', populate_existing=True)
+    assert sweep.cursor == 'dataset_test'
+    assert sweep.batch_end is None
+    assert drift_fixed('add') - fixed_before == 1
+    assert len(httpx_mock.get_requests(method='DELETE')) == 0
+
+
+def swept_spaces(outcome: str) -> float:
+    return REGISTRY.get_sample_value('kg_integration_swept_spaces_total', {'outcome': outcome}) or 0
+
+
+async def test_sweeper_syncs_space_unknown_to_dataset_service_with_project(
+    sweeper, spaces_factory, external_keycloak_mock, httpx_mock
+):
+    await spaces_factory.create('project_test', 'creator')
+    httpx_mock.add_response(method='GET', url=re.compile('.*/datasets/project_test$'), status_code=404, json={})
+    httpx_mock.add_response(method='POST', url=re.compile('.*admin/roles/users'), json={'result': []})
+
+    assert await sweeper.sweep_batch() == 1
+
+    request = httpx_mock.get_request(method='POST', url=re.compile('.*admin/roles/users'))
+    assert b'project_test' in request.content
+
+
+async def test_sweeper_skips_space_when_dataset_service_fails(
+    sweeper, spaces_factory, external_keycloak_mock, httpx_mock
+):
+    await spaces_factory.create('dataset_test', 'creator')
+    httpx_mock.add_response(method='GET', url=re.compile('.*/datasets/dataset_test$'), status_code=503, text='down')
+    failed_before = swept_spaces('failed')
+
+    assert await sweeper.sweep_batch() == 1
+
+    assert swept_spaces('failed') - failed_before == 1
+    assert not httpx_mock.get_requests(url=re.compile('.*admin/roles/users'))
+    assert not httpx_mock.get_requests(url=re.compile('.*collabs.*'))
+
+
+async def test_call_budget_limits_calls_per_minute(job_worker):
+    budget = CallBudget('test', calls_per_minute=600, session_factory=job_worker.session_factory)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await budget.acquire(600)
+    burst = loop.time() - start
+    await budget.acquire(2)
+    throttled = loop.time() - start
+
+    assert burst < 0.5
+    assert throttled >= 0.15
+
+
+async def test_call_budget_is_shared_between_workers(job_worker):
+    first = CallBudget('test', calls_per_minute=60, session_factory=job_worker.session_factory)
+    second = CallBudget('test', calls_per_minute=60, session_factory=job_worker.session_factory)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await first.acquire(60)
+    await second.acquire(1)
+
+    assert loop.time() - start >= 0.9
@@ -0,0 +1,102 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import logging
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from kg_integration.logger import logger
+from kg_integration.utils.payload_logger import PayloadLogger
+from kg_integration.utils.payload_logger import serialize_payload
+from kg_integration.utils.payload_logger import summarize_payload
+
+PAYLOAD = {
+    '@id': 'https://kg.ebrains.eu/api/instances/9bd75916-4dce-49f6-a70b-878cc7f36cf7',
+    '@type': ['https://openminds.ebrains.eu/core/person'],
+    'http://schema.org/name': 'Matvey',
+}
+
+
+@pytest.fixture
+def payload_logger(settings, monkeypatch):
+    # loggers may be disabled by logging configuration of other tests
+    monkeypatch.setattr(logger, 'disabled', False)
+
+    def create(enabled: bool, sample_rate: float = 1.0) -> PayloadLogger:
+        monkeypatch.setattr(settings, 'LOGGING_PAYLOADS', enabled)
+        monkeypatch.setattr(settings, 'LOGGING_PAYLOADS_SAMPLE_RATE', sample_rate)
+        return PayloadLogger(settings)
+
+    return create
+
+
+def test_summarize_payload_does_not_depend_on_key_order():
+    reordered = dict(reversed(PAYLOAD.items()))
+
+    summary = summarize_payload(PAYLOAD, serialize_payload(PAYLOAD))
+
+    assert summary == summarize_payload(reordered, serialize_payload(reordered))
+    assert summary['size'] == len(serialize_payload(PAYLOAD))
+    assert summary['@id'] == PAYLOAD['@id']
+    assert summary['@type'] == PAYLOAD['@type']
+    assert 'http://schema.org/name' not in summary
+
+
+def test_payload_logger_logs_summary_by_default(payload_logger, caplog):
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        payload_logger(enabled=False).info('Uploading %(size)s bytes to %(space)s', PAYLOAD, space='myspace')
+
+    record = caplog.records[-1]
+    assert record.getMessage() == f'Uploading {len(serialize_payload(PAYLOAD))} bytes to myspace'
+    assert record.args['space'] == 'myspace'
+    assert record.args['@id'] == PAYLOAD['@id']
+    assert 'payload' not in record.args
+
+
+def test_payload_logger_logs_sampled_payloads_when_enabled(payload_logger, caplog):
+    payload = {**PAYLOAD, 'created': datetime(2024, 1, 1)}
+
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        with mock.patch('kg_integration.utils.payload_logger.random.random', side_effect=[0.4, 0.6]):
+            payload_logger(enabled=True, sample_rate=0.5).info('Uploading', payload)
+            payload_logger(enabled=True, sample_rate=0.5).info('Uploading', payload)
+
+    first, second = caplog.records[-2:]
+    assert first.args['payload'] == {**PAYLOAD, 'created': '2024-01-01T00:00:00'}
+    assert 'payload' not in second.args
+    assert first.args['hash'] == second.args['hash']
+
+
+def test_payload_logger_logs_hash_by_default(payload_logger, caplog):
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        payload_logger(enabled=False).info('Uploading %(size)s bytes with hash %(hash)s', PAYLOAD)
+
+    digest = summarize_payload(PAYLOAD, serialize_payload(PAYLOAD))['hash']
+    assert caplog.records[-1].getMessage() == f'Uploading {len(serialize_payload(PAYLOAD))} bytes with hash {digest}'
+
+
+def test_payload_logger_computes_summary_when_record_is_formatted(payload_logger, caplog):
+    with caplog.at_level(logging.INFO, logger=logger.name), mock.patch.object(logger, 'log') as log:
+        with mock.patch('kg_integration.utils.payload_logger.serialize_payload', wraps=serialize_payload) as serialize:
+            payload_logger(enabled=False).info('Uploading %(size)s bytes', PAYLOAD)
+            serialize.assert_not_called()
+
+            (_, message, details), _ = log.call_args
+            assert message % details == f'Uploading {len(serialize_payload(PAYLOAD))} bytes'
+            assert details['hash'] == summarize_payload(PAYLOAD, serialize_payload(PAYLOAD))['hash']
+
+    assert serialize.call_count == 1
+
+
+def test_payload_logger_does_not_serialize_payload_when_level_is_disabled(payload_logger, caplog):
+    with caplog.at_level(logging.WARNING, logger=logger.name):
+        with mock.patch('kg_integration.utils.payload_logger.serialize_payload') as serialize:
+            payload_logger(enabled=True).info('Uploading', PAYLOAD)
+
+    serialize.assert_not_called()
+    assert not caplog.records
@@ -0,0 +1,82 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+
+import pytest
+
+from kg_integration.utils.step_graph import Step
+from kg_integration.utils.step_graph import StepGraph
+from kg_integration.utils.step_graph import StepProgress
+
+
+def test_step_graph_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match='unknown steps'):
+        StepGraph([Step('a', None, depends_on=['b'])])
+
+
+def test_step_graph_rejects_cycles():
+    with pytest.raises(ValueError, match='circular dependencies'):
+        StepGraph([Step('a', None, depends_on=['b']), Step('b', None, depends_on=['a'])])
+
+
+async def test_step_graph_runs_independent_steps_concurrently():
+    started = []
+    both_started = asyncio.Event()
+
+    async def independent(outputs):
+        started.append(len(started))
+        if len(started) == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), 1)
+        return len(started)
+
+    async def dependent(outputs):
+        return outputs['a'] + outputs['b']
+
+    graph = StepGraph([Step('a', independent), Step('b', independent), Step('c', dependent, depends_on=['a', 'b'])])
+    outputs = await graph.run(StepProgress())
+
+    assert outputs == {'a': 2, 'b': 2, 'c': 4}
+
+
+async def test_step_graph_resumes_from_completed_steps():
+    calls = []
+    persisted = {}
+
+    async def action(outputs):
+        calls.append(sorted(outputs))
+        return 'done'
+
+    async def persist(name, output):
+        persisted[name] = output
+
+    graph = StepGraph([Step('a', action), Step('b', action, depends_on=['a'])])
+    outputs = await graph.run(StepProgress({'a': 'previous'}, persist))
+
+    assert calls == [['a']]
+    assert persisted == {'b': 'done'}
+    assert outputs == {'a': 'previous', 'b': 'done'}
+
+
+async def test_step_graph_keeps_progress_of_running_steps_on_failure():
+    async def failing(outputs):
+        raise RuntimeError('failed')
+
+    async def slow(outputs):
+        await asyncio.sleep(0.1)
+        return 'slow'
+
+    async def never(outputs):
+        raise AssertionError('Dependent step must not start')
+
+    progress = StepProgress()
+    graph = StepGraph([Step('a', failing), Step('b', slow), Step('c', never, depends_on=['b'])])
+
+    with pytest.raises(RuntimeError, match='failed'):
+        await graph.run(progress)
+
+    assert progress.completed == {'b': 'slow'}
@@ -0,0 +1,34 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import hashlib
+import time
+
+import pytest
+
+from kg_integration.utils.tokens import get_token_claims
+from kg_integration.utils.tokens import get_token_lifetime
+from kg_integration.utils.tokens import get_token_subject
+
+
+def test_get_token_claims_reads_jwt_payload(jwt_factory):
+    assert get_token_claims(jwt_factory(sub='user', exp=100)) == {'sub': 'user', 'exp': 100}
+
+
+@pytest.mark.parametrize('token', ['opaque', 'header.not-base64!.signature', 'a.W10.b'])
+def test_get_token_claims_returns_nothing_for_invalid_tokens(token):
+    assert get_token_claims(token) == {}
+
+
+def test_get_token_subject_falls_back_to_token_hash(jwt_factory):
+    assert get_token_subject(jwt_factory(sub='user')) == 'user'
+    assert get_token_subject('opaque') == hashlib.sha256(b'opaque').hexdigest()
+
+
+def test_get_token_lifetime(jwt_factory):
+    assert 50 < get_token_lifetime(jwt_factory(exp=time.time() + 60)) <= 60
+    assert get_token_lifetime(jwt_factory(exp=1)) == 0
+    assert get_token_lifetime(jwt_factory(sub='user')) is None
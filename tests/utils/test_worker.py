@@ -0,0 +1,81 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from unittest import mock
+
+import pytest
+from httpx import ASGITransport
+from httpx import AsyncClient
+
+from kg_integration.utils.job_queue import JobWorker
+from kg_integration.worker.health import create_worker_app
+from kg_integration.worker.runner import WorkerRunner
+
+
+@pytest.fixture
+def worker_runner(settings, job_worker, monkeypatch) -> WorkerRunner:
+    monkeypatch.setattr(settings, 'WORKER_CONCURRENCY', 1)
+    monkeypatch.setattr(settings, 'WORKER_DRAIN_TIMEOUT', 5)
+    monkeypatch.setattr(settings, 'JOBS_POLL_INTERVAL', 0.1)
+    monkeypatch.setattr(settings, 'SWEEPER_ENABLED', False)
+    yield WorkerRunner(settings, job_worker.session_factory)
+
+
+async def wait_for_status(db_session, job, status: str) -> None:
+    for _ in range(50):
+        await db_session.refresh(job)
+        if job.status == status:
+            return
+        await asyncio.sleep(0.1)
+
+
+async def test_worker_health_probe(worker_runner):
+    transport = ASGITransport(app=create_worker_app(worker_runner))
+    async with AsyncClient(transport=transport, base_url='https://kg_integration_worker') as client:
+        worker_runner.start()
+        running_response = await client.get('/v1/health')
+        await worker_runner.drain()
+        stopped_response = await client.get('/v1/health')
+
+    assert running_response.status_code == 204
+    assert stopped_response.status_code == 503
+
+
+async def test_worker_drain_finishes_in_flight_job(worker_runner, jobs_crud, db_session):
+    async def slow_task(*args, **kwargs):
+        await asyncio.sleep(0.5)
+        return {'finished': True}
+
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=3)
+    await db_session.commit()
+
+    with mock.patch.object(JobWorker, 'run_task', side_effect=slow_task):
+        worker_runner.start()
+        await wait_for_status(db_session, job, 'running')
+        await worker_runner.drain()
+
+    await db_session.refresh(job)
+    assert job.status == 'succeeded'
+    assert job.result == {'finished': True}
+
+
+async def test_worker_drain_timeout_returns_job_to_queue(worker_runner, jobs_crud, db_session):
+    async def stuck_task(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    worker_runner.drain_timeout = 0.5
+    job = await jobs_crud.enqueue('add_user_task', {'username': 'test'}, max_attempts=3)
+    await db_session.commit()
+
+    with mock.patch.object(JobWorker, 'run_task', side_effect=stuck_task):
+        worker_runner.start()
+        await wait_for_status(db_session, job, 'running')
+        await worker_runner.drain()
+
+    await db_session.refresh(job)
+    assert job.status == 'queued'
+    assert job.attempts == 0